@@ -0,0 +1,228 @@
+"""
+Audio Activity Track
+Decodes the soundtrack and computes short-time energy and spectral flux. Crowd
+roar, whistles and excited commentary show up as peaks, which the processor uses
+to focus the heavy models and search uses as a re-ranking feature.
+"""
+import os
+import shutil
+import subprocess
+import logging
+from typing import Optional
+
+import numpy as np
+
+from .frame_cache import get_artifact_dir
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+AUDIO_ENABLED = os.environ.get("TACSEARCH_AUDIO", "1") == "1"
+SAMPLE_RATE = 16000
+HOP_SECONDS = 0.1          # One activity value every 100ms
+FRAME_SECONDS = 0.2        # Analysis window
+PEAK_MIN_DISTANCE = 3.0    # Seconds between distinct peaks
+PEAK_STD = 1.5             # Peak must exceed mean + PEAK_STD * std of activity
+PEAK_WINDOW = 4.0          # Seconds around a peak sampled densely
+FFT_CHUNK = 2048           # Analysis frames per FFT batch
+
+# Sampling intervals used by the processor (seconds)
+DENSE_INTERVAL = 0.25
+DEFAULT_INTERVAL = 0.5
+SPARSE_INTERVAL = 1.0
+QUIET_ACTIVITY = 0.2       # Below this the heavy model is skipped
+
+ACTIVITY_FILE = "audio_activity.npz"
+_activity_cache = LRUCache("audio", maxsize=64)  # (path, mtime) -> AudioActivity
+FFMPEG_BIN = os.environ.get("TACSEARCH_FFMPEG", "ffmpeg")
+
+
+def decode_audio(video_path: str, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+    """
+    Decodes the soundtrack to mono float32 PCM in [-1, 1].
+    Uses the ffmpeg CLI, or PyAV when ffmpeg is not on the PATH.
+
+    Returns:
+        1-D sample array, or None if the file has no audio
+    """
+    if shutil.which(FFMPEG_BIN):
+        cmd = [FFMPEG_BIN, "-loglevel", "error", "-i", video_path,
+               "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"]
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0 or not result.stdout:
+            return None
+        return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+    try:
+        import av
+    except ImportError:
+        logger.warning("Neither ffmpeg nor PyAV available, cannot decode audio")
+        return None
+
+    with av.open(video_path) as container:
+        if not container.streams.audio:
+            return None
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        chunks = []
+        for frame in container.decode(container.streams.audio[0]):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+    if not chunks:
+        return None
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """Robust 0..1 scaling (5th-95th percentile)."""
+    if values.size == 0:
+        return values
+    low, high = np.percentile(values, [5, 95])
+    if high - low < 1e-9:
+        return np.zeros_like(values)
+    return np.clip((values - low) / (high - low), 0.0, 1.0)
+
+
+def compute_activity(samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """
+    Computes the activity features on a hop grid.
+
+    Returns:
+        (times, energy_db, flux, activity) arrays of equal length
+    """
+    hop = int(HOP_SECONDS * sample_rate)
+    frame_len = int(FRAME_SECONDS * sample_rate)
+    if samples.size < frame_len:
+        empty = np.zeros(0, dtype=np.float32)
+        return empty, empty, empty, empty
+
+    n_frames = 1 + (samples.size - frame_len) // hop
+    # Strided view: (n_frames, frame_len) without copying the signal
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(n_frames, frame_len), strides=(samples.strides[0] * hop, samples.strides[0])
+    )
+    window = np.hanning(frame_len).astype(np.float32)
+
+    energy_db = np.zeros(n_frames, dtype=np.float32)
+    flux = np.zeros(n_frames, dtype=np.float32)
+    prev_spectrum = None
+    # Chunked so a full match never materialises the whole spectrogram
+    for start in range(0, n_frames, FFT_CHUNK):
+        chunk = frames[start:start + FFT_CHUNK]
+        energy_db[start:start + len(chunk)] = 10.0 * np.log10(np.mean(chunk ** 2, axis=1) + 1e-10)
+
+        spectrum = np.abs(np.fft.rfft(chunk * window, axis=1)).astype(np.float32)
+        spectrum /= (spectrum.sum(axis=1, keepdims=True) + 1e-10)
+        if prev_spectrum is not None:
+            spectrum_prev = np.vstack([prev_spectrum[None, :], spectrum[:-1]])
+        else:
+            spectrum_prev = np.vstack([spectrum[:1], spectrum[:-1]])
+        flux[start:start + len(chunk)] = np.maximum(spectrum - spectrum_prev, 0.0).sum(axis=1)
+        prev_spectrum = spectrum[-1]
+
+    activity = 0.6 * _normalize(energy_db) + 0.4 * _normalize(flux)
+    # 1 second moving average so single clicks do not count as events
+    kernel = np.ones(int(1.0 / HOP_SECONDS)) / int(1.0 / HOP_SECONDS)
+    activity = np.convolve(activity, kernel, mode="same")
+
+    times = (np.arange(n_frames) * hop + frame_len / 2) / sample_rate
+    return times.astype(np.float32), energy_db.astype(np.float32), flux, activity.astype(np.float32)
+
+
+def find_peaks(times: np.ndarray, activity: np.ndarray) -> np.ndarray:
+    """Timestamps of local activity maxima above mean + PEAK_STD * std, at least PEAK_MIN_DISTANCE apart."""
+    if activity.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    threshold = activity.mean() + PEAK_STD * activity.std()
+    candidates = np.where(activity > threshold)[0]
+    # Strongest first, suppress neighbours (same NMS idea as smart_clipper.isolate_peaks)
+    order = candidates[np.argsort(activity[candidates])[::-1]]
+    peaks = []
+    for idx in order:
+        t = times[idx]
+        if all(abs(t - p) >= PEAK_MIN_DISTANCE for p in peaks):
+            peaks.append(t)
+    return np.sort(np.asarray(peaks, dtype=np.float32))
+
+
+class AudioActivity:
+    """Per-video activity track stored in the video's artifact directory."""
+
+    def __init__(self, times: np.ndarray, energy_db: np.ndarray, flux: np.ndarray,
+                 activity: np.ndarray, peaks: np.ndarray):
+        self.times = times
+        self.energy_db = energy_db
+        self.flux = flux
+        self.activity = activity
+        self.peaks = peaks
+
+    @staticmethod
+    def path(video_id: int) -> str:
+        return os.path.join(get_artifact_dir(video_id), ACTIVITY_FILE)
+
+    @classmethod
+    def load(cls, video_id: int, cache_stats: Optional[dict] = None) -> Optional["AudioActivity"]:
+        """Loads the track; repeated loads (every search) are served from memory until the file changes."""
+        path = cls.path(video_id)
+        if not os.path.exists(path):
+            return None
+        key = (path, os.path.getmtime(path))
+        track = _activity_cache.get(key, stats=cache_stats)
+        if track is None:
+            data = np.load(path)
+            track = cls(data["times"], data["energy_db"], data["flux"], data["activity"], data["peaks"])
+            _activity_cache.put(key, track)
+        return track
+
+    def save(self, video_id: int):
+        os.makedirs(get_artifact_dir(video_id), exist_ok=True)
+        np.savez(self.path(video_id), times=self.times, energy_db=self.energy_db,
+                 flux=self.flux, activity=self.activity, peaks=self.peaks)
+
+    def activity_at(self, timestamp: float) -> float:
+        if self.times.size == 0:
+            return 0.0
+        idx = int(np.clip(np.searchsorted(self.times, timestamp), 0, self.times.size - 1))
+        return float(self.activity[idx])
+
+    def window_activity(self, start: float, end: float) -> float:
+        """Maximum activity inside [start, end] (re-ranking feature for a segment)."""
+        if self.times.size == 0:
+            return 0.0
+        lo = int(np.searchsorted(self.times, start, side="left"))
+        hi = int(np.searchsorted(self.times, end, side="right"))
+        if hi <= lo:
+            return self.activity_at(start)
+        return float(self.activity[lo:hi].max())
+
+    def near_peak(self, timestamp: float, window: float = PEAK_WINDOW) -> bool:
+        if self.peaks.size == 0:
+            return False
+        idx = int(np.searchsorted(self.peaks, timestamp))
+        for j in (idx - 1, idx):
+            if 0 <= j < self.peaks.size and abs(self.peaks[j] - timestamp) <= window:
+                return True
+        return False
+
+    def sample_interval(self, timestamp: float) -> float:
+        """Seconds until the next sample point: dense around peaks, sparse when quiet."""
+        if self.near_peak(timestamp):
+            return DENSE_INTERVAL
+        if self.activity_at(timestamp) < QUIET_ACTIVITY:
+            return SPARSE_INTERVAL
+        return DEFAULT_INTERVAL
+
+    def use_heavy_model(self, timestamp: float) -> bool:
+        """Whether VideoMAE is worth running here (CLIP covers quiet stretches)."""
+        return self.near_peak(timestamp) or self.activity_at(timestamp) >= QUIET_ACTIVITY
+
+
+def analyze_audio(video_id: int, video_path: str) -> Optional[AudioActivity]:
+    """Ingest stage: decodes the soundtrack and stores the activity track."""
+    samples = decode_audio(video_path)
+    if samples is None or samples.size == 0:
+        return None
+    times, energy_db, flux, activity = compute_activity(samples)
+    track = AudioActivity(times, energy_db, flux, activity, find_peaks(times, activity))
+    track.save(video_id)
+    return track
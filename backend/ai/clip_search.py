@@ -1,30 +1,86 @@
 from PIL import Image
 import cv2
 import numpy as np
+import logging
+from .proxy import resolve_analysis_path
+from .onnx_backend import use_onnx
 
 class CLIPSearchEngine:
-    def __init__(self, model_id="openai/clip-vit-base-patch16"):
+    def __init__(self, model_id="openai/clip-vit-base-patch16", backend=None):
+        """
+        backend: "torch" or "onnx" (defaults to TACSEARCH_INFERENCE_BACKEND).
+        The ONNX backend is only used on CPU and only if it passes the parity check.
+        """
         import torch
         from transformers import CLIPProcessor, CLIPModel
+        from .model_store import load_pretrained
         
+        self.model_id = model_id
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = CLIPModel.from_pretrained(model_id).to(self.device)
-        self.processor = CLIPProcessor.from_pretrained(model_id)
+        self.model, self.processor = load_pretrained(model_id, CLIPModel, CLIPProcessor, self.device)
+        self.onnx_text = None
+        self.onnx_image = None
+        if use_onnx(backend, self.device):
+            self._load_onnx()
 
-    def get_text_embedding(self, text: str):
+    def _load_onnx(self):
+        from .onnx_backend import load_or_export, clip_text_exporter, clip_image_exporter, check_parity
+        try:
+            onnx_text = load_or_export(self.model_id, "text", clip_text_exporter(self.model))
+            onnx_image = load_or_export(self.model_id, "image", clip_image_exporter(self.model))
+        except Exception as e:
+            logging.error(f"[CLIP] ONNX export/load failed, staying on torch: {e}")
+            return
+
+        # Parity: same inputs through both backends before switching over
+        text_inputs = self.processor(text=["a photo of a football match"], return_tensors="pt", padding=True)
+        image_inputs = self.processor(images=Image.new("RGB", (224, 224), (40, 120, 40)), return_tensors="pt")
+        torch_text = self._torch_features(self.model.get_text_features, text_inputs)
+        torch_image = self._torch_features(self.model.get_image_features, image_inputs)
+        onnx_text_out = onnx_text.run(**{k: v.numpy() for k, v in text_inputs.items()})["text_embeds"]
+        onnx_image_out = onnx_image.run(pixel_values=image_inputs["pixel_values"].numpy())["image_embeds"]
+        if check_parity("CLIP text", torch_text, onnx_text_out) and check_parity("CLIP image", torch_image, onnx_image_out):
+            self.onnx_text = onnx_text
+            self.onnx_image = onnx_image
+            logging.info("[CLIP] Using ONNX Runtime backend")
+
+    def _torch_features(self, fn, inputs):
         import torch
-        inputs = self.processor(text=[text], return_tensors="pt", padding=True).to(self.device)
         with torch.no_grad():
-            outputs = self.model.get_text_features(**inputs)
-            
+            outputs = fn(**inputs.to(self.device))
             if hasattr(outputs, 'text_embeds'):
-                text_features = outputs.text_embeds
+                features = outputs.text_embeds
+            elif hasattr(outputs, 'image_embeds'):
+                features = outputs.image_embeds
             elif hasattr(outputs, 'pooler_output'):
-                text_features = outputs.pooler_output
+                features = outputs.pooler_output
             else:
-                text_features = outputs
-                
-        return text_features.cpu().numpy().flatten().tolist()
+                features = outputs
+        return features.cpu().numpy()
+
+    def _text_features(self, texts):
+        """(n, dim) text embeddings from whichever backend is active."""
+        if self.onnx_text is not None:
+            inputs = self.processor(text=texts, return_tensors="np", padding=True)
+            return self.onnx_text.run(input_ids=inputs["input_ids"].astype(np.int64),
+                                      attention_mask=inputs["attention_mask"].astype(np.int64))["text_embeds"]
+        inputs = self.processor(text=texts, return_tensors="pt", padding=True)
+        return self._torch_features(self.model.get_text_features, inputs)
+
+    def _image_features(self, images):
+        """(n, dim) image embeddings for a list of PIL images."""
+        if self.onnx_image is not None:
+            inputs = self.processor(images=images, return_tensors="np")
+            return self.onnx_image.run(pixel_values=inputs["pixel_values"].astype(np.float32))["image_embeds"]
+        inputs = self.processor(images=images, return_tensors="pt")
+        return self._torch_features(self.model.get_image_features, inputs)
+
+    def get_text_embedding(self, text: str):
+        return self._text_features([text]).flatten().tolist()
+
+    def get_text_embeddings(self, texts):
+        """Embeddings of several prompts from one batched forward pass."""
+        return self._text_features(list(texts)).tolist()
 
     def embed_frame(self, frame):
         """
@@ -35,63 +91,43 @@ class CLIPSearchEngine:
         pil_image = Image.fromarray(rgb_frame)
         
         # Generator embedding
-        import torch
-        inputs = self.processor(images=pil_image, return_tensors="pt").to(self.device)
-        with torch.no_grad():
-            outputs = self.model.get_image_features(**inputs)
-            if hasattr(outputs, 'image_embeds'):
-                image_features = outputs.image_embeds
-            elif hasattr(outputs, 'pooler_output'):
-                image_features = outputs.pooler_output
-            else:
-                image_features = outputs
-                
-        return image_features.cpu().numpy().flatten().tolist()
+        return self._image_features([pil_image]).flatten().tolist()
 
-    def analyze_video_segments(self, video_path: str, interval: int = 2):
+    def embed_frames(self, frames, batch_size: int = 32, rgb: bool = False):
+        """
+        Generates embeddings for many frames, batching the forward passes.
+        Frames are BGR (OpenCV) unless `rgb` is True.
+        """
+        embeddings = []
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            images = [Image.fromarray(f if rgb else cv2.cvtColor(f, cv2.COLOR_BGR2RGB)) for f in batch]
+            embeddings.extend(self._image_features(images).tolist())
+        return embeddings
+
+    def analyze_video_segments(self, video_path: str, interval: int = 2, decoder: str = None):
         """
         Extracts frames every 'interval' seconds and generates embeddings.
         Returns a list of segments with start_time, end_time, and embedding.
+        `decoder` selects the frame source backend (see decoders.open_frame_source).
         """
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
+        from .decoders import open_frame_source
         segments = []
         
-        current_sec = 0
-        while True:
-            # Jump to the specific second
-            cap.set(cv2.CAP_PROP_POS_MSEC, current_sec * 1000)
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Resize for performance (CLIP uses 224x224 usually)
-            frame = cv2.resize(frame, (224, 224))
-            
-            # Convert BGR to RGB for PIL
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(rgb_frame)
-            
-            # Generate embedding
-            import torch
-            inputs = self.processor(images=pil_image, return_tensors="pt").to(self.device)
-            with torch.no_grad():
-                outputs = self.model.get_image_features(**inputs)
-                # Handle cases where output is not just a tensor
-                if hasattr(outputs, 'image_embeds'):
-                    image_features = outputs.image_embeds
-                elif hasattr(outputs, 'pooler_output'):
-                    image_features = outputs.pooler_output
-                else:
-                    image_features = outputs
-            
-            segments.append({
-                "start_time": current_sec,
-                "end_time": current_sec + interval, # Approximation
-                "embedding": image_features.cpu().numpy().flatten().tolist()
-            })
-            
-            current_sec += interval
+        # Frames come out of the decoder already resized (CLIP uses 224x224 usually) and in RGB
+        with open_frame_source(resolve_analysis_path(video_path), backend=decoder,
+                               size=(224, 224), pix_fmt="rgb24") as source:
+            source.stride = max(1, int(round(source.fps * interval)))
+            for decoded in source.frames():
+                pil_image = Image.fromarray(decoded.image)
+                
+                # Generate embedding
+                image_features = self._image_features([pil_image])
+                
+                segments.append({
+                    "start_time": decoded.timestamp,
+                    "end_time": decoded.timestamp + interval, # Approximation
+                    "embedding": image_features.flatten().tolist()
+                })
             
-        cap.release()
         return segments
@@ -0,0 +1,209 @@
+"""
+Frame Sources
+Pluggable video decoding: an OpenCV backend (always available) and a PyAV/FFmpeg
+backend with threaded decoding, keyframe-only decoding and direct conversion to
+the target size and pixel format.
+"""
+import os
+import logging
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+DECODER_BACKEND = os.environ.get("TACSEARCH_DECODER", "opencv")  # "opencv", "pyav" or "auto"
+DECODER_THREADS = int(os.environ.get("TACSEARCH_DECODER_THREADS", "0"))  # 0 = let FFmpeg decide
+
+BACKENDS = ("opencv", "pyav")
+
+
+class DecodedFrame(NamedTuple):
+    index: int          # Frame number in the source stream
+    timestamp: float    # Seconds from the start of the video
+    image: np.ndarray   # HxWx3 uint8 (BGR unless another pixel format was requested)
+
+
+class FrameSource:
+    """
+    Base class for decoders. Use as a context manager:
+
+        with open_frame_source(path) as source:
+            for frame in source.frames():
+                ...
+    """
+    backend = "base"
+
+    def __init__(self, video_path: str, size: Optional[Tuple[int, int]] = None,
+                 keyframes_only: bool = False, stride: int = 1, pix_fmt: str = "bgr24"):
+        """
+        Args:
+            video_path: File to decode
+            size: Optional (width, height) to scale decoded frames to
+            keyframes_only: Only return keyframes (I-frames)
+            stride: Return every `stride`-th frame
+            pix_fmt: Output pixel format ("bgr24" matches OpenCV, "rgb24" matches PIL/models)
+        """
+        self.video_path = video_path
+        self.size = size
+        self.pix_fmt = pix_fmt
+        self.keyframes_only = keyframes_only
+        self.stride = max(1, int(stride))
+        self.fps = 0.0
+        self.frame_count = 0
+        self.width = 0
+        self.height = 0
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.fps else 0.0
+
+    def frames(self) -> Iterator[DecodedFrame]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class OpenCVFrameSource(FrameSource):
+    """
+    cv2.VideoCapture backend. Skipped frames are only grabbed, never converted.
+    OpenCV cannot tell keyframes apart, so `keyframes_only` falls back to one frame per second.
+    """
+    backend = "opencv"
+
+    def __init__(self, video_path: str, **kwargs):
+        super().__init__(video_path, **kwargs)
+        if self.pix_fmt not in ("bgr24", "rgb24"):
+            raise ValueError(f"OpenCV decoder cannot output {self.pix_fmt}")
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video: {video_path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self.keyframes_only:
+            self.stride = max(self.stride, int(round(self.fps)))
+
+    def frames(self) -> Iterator[DecodedFrame]:
+        index = 0
+        while True:
+            if index % self.stride != 0:
+                if not self.cap.grab():
+                    break
+                index += 1
+                continue
+            ret, image = self.cap.read()
+            if not ret:
+                break
+            if self.size:
+                image = cv2.resize(image, self.size, interpolation=cv2.INTER_AREA)
+            if self.pix_fmt == "rgb24":
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            yield DecodedFrame(index, index / self.fps, image)
+            index += 1
+
+    def close(self):
+        self.cap.release()
+
+
+class PyAVFrameSource(FrameSource):
+    """
+    PyAV (FFmpeg) backend.
+    - threads: frame/slice threaded decoding (0 = FFmpeg default)
+    - keyframes_only: the decoder discards non-key frames without decoding them
+    - size/pix_fmt: scaling and colour conversion happen in libswscale, straight to the target format
+    """
+    backend = "pyav"
+
+    def __init__(self, video_path: str, threads: int = DECODER_THREADS, **kwargs):
+        super().__init__(video_path, **kwargs)
+        import av
+
+        self.container = av.open(video_path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        if threads:
+            self.stream.codec_context.thread_count = threads
+        if self.keyframes_only:
+            self.stream.codec_context.skip_frame = "NONKEY"
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 25.0
+        # nb_frames is often missing (0); estimate from the stream, then the container duration
+        if self.stream.frames:
+            self.frame_count = self.stream.frames
+        elif self.stream.duration and self.stream.time_base:
+            self.frame_count = int(float(self.stream.duration * self.stream.time_base) * self.fps)
+        elif self.container.duration:
+            self.frame_count = int(self.container.duration / av.time_base * self.fps)
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+
+    @property
+    def codec(self) -> str:
+        return self.stream.codec_context.name
+
+    @property
+    def container_format(self) -> str:
+        return self.container.format.name
+
+    def frames(self) -> Iterator[DecodedFrame]:
+        width, height = self.size if self.size else (None, None)
+        decoded = 0
+        for frame in self.container.decode(self.stream):
+            if decoded % self.stride != 0:
+                decoded += 1
+                continue
+            decoded += 1
+            timestamp = float(frame.time) if frame.time is not None else 0.0
+            image = frame.reformat(width=width, height=height, format=self.pix_fmt).to_ndarray()
+            yield DecodedFrame(int(round(timestamp * self.fps)), timestamp, image)
+
+    def close(self):
+        self.container.close()
+
+
+def pyav_available() -> bool:
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def open_frame_source(video_path: str, backend: Optional[str] = None, **kwargs) -> FrameSource:
+    """
+    Opens `video_path` with the requested decoder backend.
+
+    Args:
+        video_path: File to decode
+        backend: "opencv", "pyav" or "auto" (defaults to TACSEARCH_DECODER)
+        **kwargs: size, keyframes_only, stride, pix_fmt, and threads for PyAV
+
+    Returns:
+        FrameSource (falls back to OpenCV if PyAV is not installed)
+    """
+    backend = (backend or DECODER_BACKEND).lower()
+    if backend == "auto":
+        backend = "pyav" if pyav_available() else "opencv"
+
+    if backend == "pyav":
+        if pyav_available():
+            return PyAVFrameSource(video_path, **kwargs)
+        logger.warning("PyAV not installed, falling back to OpenCV decoder")
+    elif backend != "opencv":
+        raise ValueError(f"Unknown decoder backend: {backend}")
+
+    kwargs.pop("threads", None)
+    return OpenCVFrameSource(video_path, **kwargs)
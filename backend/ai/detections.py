@@ -0,0 +1,183 @@
+"""
+Detection Table
+Compact columnar storage of YOLO detections per video (NumPy arrays in an .npz
+next to the other artifacts). Rows of all frames are concatenated; `offsets`
+marks where each sampled frame starts, like a CSR matrix.
+"""
+import os
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .frame_cache import get_artifact_dir
+from .scheduler import scheduler
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+DETECTIONS_AT_INGEST = os.environ.get("TACSEARCH_DETECT_AT_INGEST", "0") == "1"  # Else computed on first request
+DETECTION_INTERVAL = 0.5  # Seconds between sampled frames when computed on demand
+
+DETECTIONS_FILE = "detections.npz"
+
+
+class DetectionTable:
+    """
+    Columns:
+        timestamps: (F,) float64   time of each sampled frame
+        offsets:    (F+1,) int64   rows of frame i are offsets[i]:offsets[i+1]
+        boxes:      (N, 4) float32 xyxy normalised to 0..1
+        classes:    (N,) uint8     COCO class id
+        scores:     (N,) float16   confidence
+    """
+
+    def __init__(self, timestamps: np.ndarray, offsets: np.ndarray, boxes: np.ndarray,
+                 classes: np.ndarray, scores: np.ndarray):
+        self.timestamps = timestamps
+        self.offsets = offsets
+        self.boxes = boxes
+        self.classes = classes
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def num_detections(self) -> int:
+        return len(self.classes)
+
+    @staticmethod
+    def path(video_id: int) -> str:
+        return os.path.join(get_artifact_dir(video_id), DETECTIONS_FILE)
+
+    @classmethod
+    def exists(cls, video_id: int) -> bool:
+        return os.path.exists(cls.path(video_id))
+
+    @classmethod
+    def load(cls, video_id: int) -> Optional["DetectionTable"]:
+        if not cls.exists(video_id):
+            return None
+        data = np.load(cls.path(video_id))
+        return cls(data["timestamps"], data["offsets"], data["boxes"], data["classes"], data["scores"])
+
+    def save(self, video_id: int):
+        os.makedirs(get_artifact_dir(video_id), exist_ok=True)
+        tmp_path = self.path(video_id) + ".tmp.npz"
+        np.savez(tmp_path, timestamps=self.timestamps, offsets=self.offsets,
+                 boxes=self.boxes, classes=self.classes, scores=self.scores)
+        os.replace(tmp_path, self.path(video_id))
+
+    def frame(self, i: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(boxes, classes, scores) of the i-th sampled frame."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.boxes[lo:hi], self.classes[lo:hi], self.scores[lo:hi]
+
+    def frame_index(self, timestamp: float) -> int:
+        idx = int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1
+        return min(max(idx, 0), len(self) - 1)
+
+    def frame_ids(self) -> np.ndarray:
+        """Sampled-frame index of every detection row."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def count_per_frame(self, class_id: int, min_score: float = 0.0) -> np.ndarray:
+        """Vectorised per-frame count of one class."""
+        mask = (self.classes == class_id) & (self.scores >= min_score)
+        return np.bincount(self.frame_ids()[mask], minlength=len(self)).astype(np.int32)
+
+    def slice_time(self, start: float, end: float) -> List[dict]:
+        """JSON-friendly rows for the frames in [start, end]."""
+        lo = int(np.searchsorted(self.timestamps, start, side="left"))
+        hi = int(np.searchsorted(self.timestamps, end, side="right"))
+        rows = []
+        for i in range(lo, hi):
+            boxes, classes, scores = self.frame(i)
+            rows.append({
+                "timestamp": float(self.timestamps[i]),
+                "boxes": boxes.round(4).tolist(),
+                "classes": classes.tolist(),
+                "scores": scores.astype(np.float32).round(3).tolist(),
+            })
+        return rows
+
+
+class DetectionTableBuilder:
+    """Accumulates per-frame YOLO output and packs it into a DetectionTable."""
+
+    def __init__(self):
+        self.timestamps = []
+        self.counts = []
+        self.boxes = []
+        self.classes = []
+        self.scores = []
+
+    def add(self, timestamp: float, boxes: np.ndarray, classes: np.ndarray, scores: np.ndarray):
+        self.timestamps.append(timestamp)
+        self.counts.append(len(classes))
+        self.boxes.append(boxes.reshape(-1, 4))
+        self.classes.append(classes)
+        self.scores.append(scores)
+
+    def build(self) -> DetectionTable:
+        offsets = np.zeros(len(self.counts) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=offsets[1:])
+        if self.boxes:
+            boxes = np.concatenate(self.boxes).astype(np.float32)
+            classes = np.concatenate(self.classes).astype(np.uint8)
+            scores = np.concatenate(self.scores).astype(np.float16)
+        else:
+            boxes = np.zeros((0, 4), dtype=np.float32)
+            classes = np.zeros(0, dtype=np.uint8)
+            scores = np.zeros(0, dtype=np.float16)
+        return DetectionTable(np.asarray(self.timestamps, dtype=np.float64), offsets, boxes, classes, scores)
+
+
+def flush_detections(yolo, builder: DetectionTableBuilder, frames: List[np.ndarray], timestamps: List[float]):
+    """Runs one batched YOLO pass over pending sampled frames and empties the lists."""
+    if not frames:
+        return
+    with scheduler.batch(), stage("yolo"):
+        results = yolo.detect_batch(frames)
+    for t, (boxes, classes, scores) in zip(timestamps, results):
+        builder.add(t, boxes, classes, scores)
+    frames.clear()
+    timestamps.clear()
+
+
+def compute_detections(video_id: int, video_path: str, interval: float = DETECTION_INTERVAL,
+                       decoder: str = None) -> Optional[DetectionTable]:
+    """
+    Runs batched YOLO over frames sampled every `interval` seconds and persists the table.
+    Used when detections are requested for a video that was ingested without them.
+    """
+    from .processor import get_yolo_tracker
+    from .decoders import open_frame_source
+    from .proxy import resolve_analysis_path
+    from .yolo_tracker import YOLO_BATCH_SIZE
+
+    yolo = get_yolo_tracker()
+    if not yolo:
+        logger.error("YOLO not available, cannot compute detections")
+        return None
+
+    builder = DetectionTableBuilder()
+    batch_frames, batch_times = [], []
+
+    with open_frame_source(resolve_analysis_path(video_path), backend=decoder) as source:
+        source.stride = max(1, int(round(source.fps * interval)))
+        for decoded in source.frames():
+            batch_frames.append(decoded.image)
+            batch_times.append(decoded.timestamp)
+            if len(batch_frames) >= YOLO_BATCH_SIZE:
+                flush_detections(yolo, builder, batch_frames, batch_times)
+    flush_detections(yolo, builder, batch_frames, batch_times)
+
+    table = builder.build()
+    table.save(video_id)
+
+    from .track_index import build_track_index
+    build_track_index(video_id, table)
+    return table
@@ -2,12 +2,11 @@
 Football Action Recognition Model
 Uses VideoMAE for temporal action understanding in football videos.
 """
-import torch
 import numpy as np
 from typing import List, Dict, Optional
-from transformers import VideoMAEImageProcessor, VideoMAEForVideoClassification
 from PIL import Image
 import cv2
+from .onnx_backend import use_onnx
 
 class FootballActionModel:
     """
@@ -45,34 +44,84 @@ class FootballActionModel:
         "jumping": ["header", "aerial duel"],
     }
     
-    def __init__(self, model_name: str = "MCG-NJU/videomae-base-finetuned-kinetics"):
+    def __init__(self, model_name: str = "MCG-NJU/videomae-base-finetuned-kinetics", backend: Optional[str] = None):
         """
         Initialize the VideoMAE model.
         
         Args:
             model_name: Hugging Face model identifier
+            backend: "torch" or "onnx" (defaults to TACSEARCH_INFERENCE_BACKEND, CPU only)
         """
+        # torch/transformers are imported here, not at module level, so importing this
+        # module (and the API that references it) stays cheap until a model is needed
+        import torch
+        from transformers import VideoMAEImageProcessor, VideoMAEForVideoClassification
+        from .model_store import load_pretrained
+        
         print(f"[FootballActionModel] Loading {model_name}...")
         
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"[FootballActionModel] Using device: {self.device}")
         
         try:
-            self.processor = VideoMAEImageProcessor.from_pretrained(model_name)
-            self.model = VideoMAEForVideoClassification.from_pretrained(model_name)
-            self.model.to(self.device)
-            self.model.eval()
+            self.model, self.processor = load_pretrained(
+                model_name, VideoMAEForVideoClassification, VideoMAEImageProcessor, self.device
+            )
             print("[FootballActionModel] Model loaded successfully")
         except Exception as e:
             print(f"[FootballActionModel] Failed to load model: {e}")
             self.processor = None
             self.model = None
+        
+        self.model_name = model_name
+        self.onnx_model = None
+        if self.is_loaded() and use_onnx(backend, self.device):
+            self._load_onnx()
+    
+    def _load_onnx(self):
+        """Exports/loads the ONNX graph and switches to it if it matches the torch outputs."""
+        from .onnx_backend import load_or_export, videomae_exporter, check_parity
+        try:
+            onnx_model = load_or_export(self.model_name, "action", videomae_exporter(self.model))
+        except Exception as e:
+            print(f"[FootballActionModel] ONNX export/load failed, staying on torch: {e}")
+            return
+        
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (224, 224, 3), dtype=np.uint8) for _ in range(16)]
+        pixel_values = self.preprocess_frames(frames)
+        torch_logits, torch_embedding = self._forward_torch(pixel_values)
+        outputs = onnx_model.run(pixel_values=pixel_values.cpu().numpy())
+        if (check_parity("VideoMAE embedding", torch_embedding, outputs["embedding"])
+                and check_parity("VideoMAE logits", torch_logits, outputs["logits"])):
+            self.onnx_model = onnx_model
+            print("[FootballActionModel] Using ONNX Runtime backend")
+    
+    def _forward_torch(self, pixel_values: "torch.Tensor"):
+        import torch
+        with torch.no_grad():
+            outputs = self.model(pixel_values, output_hidden_states=True)
+            # Use the last hidden state's CLS token as embedding
+            embedding = outputs.hidden_states[-1][:, 0, :]
+        return outputs.logits.cpu().numpy(), embedding.cpu().numpy()
+    
+    def _forward(self, pixel_values: "torch.Tensor"):
+        """
+        Runs the active backend.
+        
+        Returns:
+            (logits, embedding) numpy arrays of shape (batch, classes) and (batch, hidden)
+        """
+        if self.onnx_model is not None:
+            outputs = self.onnx_model.run(pixel_values=pixel_values.cpu().numpy())
+            return outputs["logits"], outputs["embedding"]
+        return self._forward_torch(pixel_values)
     
     def is_loaded(self) -> bool:
         """Check if model is successfully loaded."""
         return self.model is not None and self.processor is not None
     
-    def preprocess_frames(self, frames: List[np.ndarray]) -> torch.Tensor:
+    def preprocess_frames(self, frames: List[np.ndarray]) -> "torch.Tensor":
         """
         Convert OpenCV frames to format expected by VideoMAE.
         
@@ -108,25 +157,13 @@ class FootballActionModel:
             return None
         
         try:
-            # Ensure we have exactly 16 frames
-            if len(frames) < 16:
-                # Repeat last frame to reach 16
-                frames = frames + [frames[-1]] * (16 - len(frames))
-            elif len(frames) > 16:
-                # Sample 16 frames evenly
-                indices = np.linspace(0, len(frames) - 1, 16, dtype=int)
-                frames = [frames[i] for i in indices]
-            
             # Preprocess
-            pixel_values = self.preprocess_frames(frames)
+            pixel_values = self.preprocess_frames(self._sample_16(frames))
             
             # Get hidden states (embeddings)
-            with torch.no_grad():
-                outputs = self.model(pixel_values, output_hidden_states=True)
-                # Use the last hidden state's CLS token as embedding
-                embedding = outputs.hidden_states[-1][:, 0, :].squeeze()
+            _, embedding = self._forward(pixel_values)
                 
-            return embedding.cpu().numpy().tolist()
+            return embedding.squeeze().tolist()
             
         except Exception as e:
             print(f"[FootballActionModel] Error extracting embedding: {e}")
@@ -148,36 +185,65 @@ class FootballActionModel:
             return {}
         
         try:
-            # Ensure we have exactly 16 frames
-            if len(frames) < 16:
-                frames = frames + [frames[-1]] * (16 - len(frames))
-            elif len(frames) > 16:
-                indices = np.linspace(0, len(frames) - 1, 16, dtype=int)
-                frames = [frames[i] for i in indices]
-            
             # Preprocess
-            pixel_values = self.preprocess_frames(frames)
+            pixel_values = self.preprocess_frames(self._sample_16(frames))
             
             # Get predictions
-            with torch.no_grad():
-                outputs = self.model(pixel_values)
-                logits = outputs.logits
-                probs = torch.nn.functional.softmax(logits, dim=-1)
-            
-            # Get top-k predictions
-            top_probs, top_indices = torch.topk(probs[0], top_k)
-            
-            results = {}
-            for prob, idx in zip(top_probs, top_indices):
-                label = self.model.config.id2label[idx.item()]
-                results[label] = float(prob.item())
-            
-            return results
+            logits, _ = self._forward(pixel_values)
+            return self._top_k(logits[0], top_k)
             
         except Exception as e:
             print(f"[FootballActionModel] Error classifying action: {e}")
             return {}
     
+    def analyze_actions(self, clips: List[List[np.ndarray]], top_k: int = 5) -> List[tuple]:
+        """
+        Embedding and top-k classification of several clips in one batched forward pass.
+        
+        Args:
+            clips: List of frame lists (each sampled/padded to 16 frames)
+            top_k: Number of top predictions per clip
+            
+        Returns:
+            List of (embedding, action_scores) per clip, like get_action_embedding
+            and classify_action would return them
+        """
+        if not self.is_loaded():
+            print("[FootballActionModel] Model not loaded, cannot analyze clips")
+            return [(None, {}) for _ in clips]
+        
+        import torch
+        from .metrics import stage
+        with stage("videomae_preprocess"):
+            pixel_values = torch.cat([self.preprocess_frames(self._sample_16(frames)) for frames in clips])
+        with stage("videomae_forward"):
+            logits, embeddings = self._forward(pixel_values)
+        return [(embedding.tolist(), self._top_k(row, top_k)) for embedding, row in zip(embeddings, logits)]
+    
+    def analyze_action(self, frames: List[np.ndarray], top_k: int = 5) -> tuple:
+        """(embedding, action_scores) of one clip from a single forward pass."""
+        try:
+            return self.analyze_actions([frames], top_k)[0]
+        except Exception as e:
+            print(f"[FootballActionModel] Error analyzing action: {e}")
+            return None, {}
+    
+    @staticmethod
+    def _sample_16(frames: List[np.ndarray]) -> List[np.ndarray]:
+        """Pads (repeating the last frame) or evenly subsamples to exactly 16 frames."""
+        if len(frames) < 16:
+            return frames + [frames[-1]] * (16 - len(frames))
+        if len(frames) > 16:
+            indices = np.linspace(0, len(frames) - 1, 16, dtype=int)
+            return [frames[i] for i in indices]
+        return frames
+    
+    def _top_k(self, logits: np.ndarray, top_k: int) -> Dict[str, float]:
+        """Softmax over one clip's logits, top-k labels with probabilities."""
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        return {self.model.config.id2label[int(idx)]: float(probs[idx]) for idx in np.argsort(-probs)[:top_k]}
+    
     def map_to_football_event(self, action_scores: Dict[str, float]) -> Dict[str, float]:
         """
         Map generic action labels to football-specific events.
@@ -202,27 +268,12 @@ class FootballActionModel:
         return event_scores
 
 
-# Singleton instance
-_football_model_instance: Optional[FootballActionModel] = None
-
-
 def get_football_model() -> Optional[FootballActionModel]:
     """
-    Get or create the singleton FootballActionModel instance.
+    Get the shared FootballActionModel instance from the model registry.
     
     Returns:
         FootballActionModel instance, or None if failed to load
     """
-    global _football_model_instance
-    
-    if _football_model_instance is None:
-        try:
-            _football_model_instance = FootballActionModel()
-            if not _football_model_instance.is_loaded():
-                print("[WARNING] FootballActionModel failed to load, returning None")
-                _football_model_instance = None
-        except Exception as e:
-            print(f"[ERROR] Failed to create FootballActionModel: {e}")
-            _football_model_instance = None
-    
-    return _football_model_instance
+    from .registry import registry
+    return registry.get("videomae")
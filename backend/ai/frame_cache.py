@@ -0,0 +1,205 @@
+"""
+Decoded Frame Cache
+Stores frames downscaled to model resolution in a memory-mapped file so that
+re-analysis passes, thumbnails and experiments can skip decoding the source video.
+"""
+import os
+import json
+import shutil
+import numpy as np
+import cv2
+from typing import Iterator, Optional, Tuple
+
+# --- CONFIGURATION ---
+FRAME_CACHE_ENABLED = os.environ.get("TACSEARCH_FRAME_CACHE", "0") == "1"  # Write cache during ingest
+FRAME_CACHE_SIZE = int(os.environ.get("TACSEARCH_FRAME_CACHE_SIZE", "224"))  # 224 (CLIP/VideoMAE) or 256
+FRAME_CACHE_FPS = float(os.environ.get("TACSEARCH_FRAME_CACHE_FPS", "8"))  # Frames kept per second of video
+ARTIFACT_DIR = os.environ.get("TACSEARCH_ARTIFACT_DIR", "data/artifacts")
+
+FRAMES_FILE = "frames.u8"
+TIMESTAMPS_FILE = "timestamps.npy"
+META_FILE = "frames.json"
+
+
+def get_artifact_dir(video_id: int) -> str:
+    """Directory holding derived per-video data (frame cache, indexes, ...)."""
+    return os.path.join(ARTIFACT_DIR, str(video_id))
+
+
+def remove_artifacts(video_id: int):
+    """Deletes every derived artifact of a video."""
+    path = get_artifact_dir(video_id)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def downscale_frame(frame: np.ndarray, size: int = FRAME_CACHE_SIZE) -> np.ndarray:
+    """
+    Resizes the short side to `size` and center-crops to a square, which is
+    what the CLIP and VideoMAE processors do to their inputs anyway.
+    """
+    h, w = frame.shape[:2]
+    scale = size / min(h, w)
+    new_w, new_h = max(size, round(w * scale)), max(size, round(h * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    top = (new_h - size) // 2
+    left = (new_w - size) // 2
+    return np.ascontiguousarray(resized[top:top + size, left:left + size])
+
+
+class FrameCacheWriter:
+    """
+    Appends downscaled frames to the cache while the video is being decoded.
+    Files are written under temporary names and renamed on close, so readers
+    never see a half-written cache.
+    """
+
+    def __init__(self, video_id: int, source_fps: float,
+                 size: int = FRAME_CACHE_SIZE, cache_fps: float = FRAME_CACHE_FPS):
+        self.directory = get_artifact_dir(video_id)
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = size
+        self.source_fps = source_fps
+        self.stride = max(1, int(round(source_fps / cache_fps))) if cache_fps > 0 else 1
+        self.timestamps = []
+        self._tmp_frames = os.path.join(self.directory, FRAMES_FILE + ".tmp")
+        self._file = open(self._tmp_frames, "wb")
+
+    def add(self, frame_idx: int, frame: np.ndarray):
+        """Stores the frame if it falls on the cache stride."""
+        if frame_idx % self.stride != 0:
+            return
+        small = downscale_frame(frame, self.size)
+        self._file.write(small.tobytes())
+        self.timestamps.append(frame_idx / self.source_fps)
+
+    def close(self):
+        self._file.close()
+        np.save(os.path.join(self.directory, TIMESTAMPS_FILE), np.asarray(self.timestamps, dtype=np.float64))
+        os.replace(self._tmp_frames, os.path.join(self.directory, FRAMES_FILE))
+        meta = {
+            "count": len(self.timestamps),
+            "size": self.size,
+            "fps": self.source_fps / self.stride,
+            "source_fps": self.source_fps,
+        }
+        with open(os.path.join(self.directory, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp_frames):
+            os.remove(self._tmp_frames)
+
+
+class FrameCache:
+    """
+    Read-only view of a video's cached frames.
+    Frames are BGR uint8 arrays of shape (size, size, 3), like OpenCV returns.
+    """
+
+    def __init__(self, video_id: int):
+        self.video_id = video_id
+        self.directory = get_artifact_dir(video_id)
+        self._frames: Optional[np.ndarray] = None
+        self._timestamps: Optional[np.ndarray] = None
+        self.meta = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, META_FILE))
+
+    def open(self) -> "FrameCache":
+        if self._frames is not None:
+            return self
+        with open(os.path.join(self.directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        size = self.meta["size"]
+        count = self.meta["count"]
+        if count:
+            self._frames = np.memmap(os.path.join(self.directory, FRAMES_FILE), dtype=np.uint8,
+                                     mode="r", shape=(count, size, size, 3))
+        else:
+            self._frames = np.empty((0, size, size, 3), dtype=np.uint8)
+        self._timestamps = np.load(os.path.join(self.directory, TIMESTAMPS_FILE))
+        return self
+
+    @property
+    def fps(self) -> float:
+        return self.open().meta["fps"]
+
+    @property
+    def source_fps(self) -> float:
+        """Frame rate of the decoded video the cache was sampled from."""
+        meta = self.open().meta
+        return meta.get("source_fps", meta["fps"])
+
+    @property
+    def size(self) -> int:
+        return self.open().meta["size"]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.open()._timestamps
+
+    def __len__(self) -> int:
+        return self.open().meta["count"]
+
+    def index_at(self, timestamp: float) -> int:
+        """Index of the cached frame closest to (at or before) `timestamp`."""
+        idx = int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1
+        return min(max(idx, 0), len(self) - 1)
+
+    def frame_at(self, timestamp: float) -> np.ndarray:
+        return self.open()._frames[self.index_at(timestamp)]
+
+    def window(self, timestamp: float, num_frames: int = 16) -> np.ndarray:
+        """The `num_frames` cached frames ending at `timestamp` (for VideoMAE clips)."""
+        end = self.index_at(timestamp) + 1
+        return self.open()._frames[max(0, end - num_frames):end]
+
+    def iter_frames(self, start_time: float = 0.0, end_time: Optional[float] = None) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yields (timestamp, frame) pairs straight from the memory map."""
+        self.open()
+        first = int(np.searchsorted(self._timestamps, start_time, side="left"))
+        last = len(self) if end_time is None else int(np.searchsorted(self._timestamps, end_time, side="right"))
+        for i in range(first, last):
+            yield float(self._timestamps[i]), self._frames[i]
+
+
+def build_frame_cache(video_id: int, video_path: str, size: int = FRAME_CACHE_SIZE,
+                      cache_fps: float = FRAME_CACHE_FPS) -> FrameCache:
+    """Decodes a video once and writes its frame cache (for videos ingested without one)."""
+    from .proxy import resolve_analysis_path
+    cap = cv2.VideoCapture(resolve_analysis_path(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    writer = FrameCacheWriter(video_id, fps, size=size, cache_fps=cache_fps)
+    frame_idx = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.add(frame_idx, frame)
+            frame_idx += 1
+    except Exception:
+        writer.abort()
+        raise
+    finally:
+        cap.release()
+    writer.close()
+    return FrameCache(video_id)
+
+
+def read_thumbnail(video_id: int, video_path: str, timestamp: float) -> Optional[np.ndarray]:
+    """Returns a frame for a thumbnail, from the cache when present, else by seeking the video."""
+    cache = FrameCache(video_id)
+    if cache.exists() and len(cache) > 0:
+        return np.array(cache.frame_at(timestamp))
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    return frame if ret else None
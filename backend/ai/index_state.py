@@ -0,0 +1,46 @@
+"""
+Index Version
+A counter stored in the database next to the segments and incremented in the
+same transaction that changes what search can see (quick index publish, full
+pass promotion, video deletion). Search result caches key on it, so every
+worker - not only the one that ran the ingest - stops serving stale results
+as soon as the change commits. Each video also carries its own
+segments_version - the index version at which its segments last changed - so
+per-video caches only drop the video that changed. Taking the global value
+rather than counting per video keeps (video_id, segments_version) unique even
+when SQLite reuses a deleted video's id: the new row's first bump is newer
+than anything the old row had.
+"""
+from typing import Optional
+
+from sqlalchemy import select, text, update
+from sqlmodel import Session
+
+from ..database import engine
+from ..models import IndexState, Video
+
+INDEX_STATE_ID = 1
+
+
+def bump_index_version(session: Session, video_id: Optional[int] = None, all_videos: bool = False):
+    """
+    Increments the version inside the caller's transaction and stamps it as the
+    segments_version of `video_id` (or of every video); takes effect on its commit.
+    """
+    # INSERT OR IGNORE: concurrent first bumps from several workers must not collide
+    session.execute(text(f"INSERT OR IGNORE INTO indexstate (id, version) VALUES ({INDEX_STATE_ID}, 0)"))
+    session.execute(update(IndexState).where(IndexState.id == INDEX_STATE_ID)
+                    .values(version=IndexState.version + 1))
+    if video_id is not None or all_videos:
+        version = select(IndexState.version).where(IndexState.id == INDEX_STATE_ID).scalar_subquery()
+        statement = update(Video).values(segments_version=version)
+        if not all_videos:
+            statement = statement.where(Video.id == video_id)
+        session.execute(statement)
+
+
+def index_version() -> int:
+    """Current version (0 before the first change)."""
+    with Session(engine) as session:
+        state = session.get(IndexState, INDEX_STATE_ID)
+        return state.version if state else 0
@@ -0,0 +1,173 @@
+"""
+Inference Client
+Thin stand-ins for CLIPSearchEngine, FootballActionModel and YOLOTracker that
+forward calls to the shared inference server (inference_server.py) over its Unix
+socket. The registry hands these out instead of loading models when
+TACSEARCH_INFERENCE_SOCKET is set, so the rest of the backend is unchanged.
+
+Connections authenticate with a shared key. The server writes a random one to
+a 0600 file next to the socket on every start (unless TACSEARCH_INFERENCE_AUTHKEY
+is set), so only the user running the workers can talk to it - the protocol
+unpickles whatever an authenticated peer sends.
+"""
+import os
+import logging
+import secrets
+import threading
+from multiprocessing.connection import Client
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# --- CONFIGURATION ---
+INFERENCE_SOCKET = os.environ.get("TACSEARCH_INFERENCE_SOCKET", "")  # Empty = models load in-process
+INFERENCE_AUTHKEY = os.environ.get("TACSEARCH_INFERENCE_AUTHKEY", "")  # Empty = random key in the key file
+INFERENCE_AUTHKEY_FILE = os.environ.get("TACSEARCH_INFERENCE_AUTHKEY_FILE", "")  # Default: <socket>.key
+
+# Set by the server itself, which must load the real models
+SERVER_PROCESS = False
+
+logger = logging.getLogger(__name__)
+
+
+def authkey_path(socket_path: str) -> str:
+    return INFERENCE_AUTHKEY_FILE or socket_path + ".key"
+
+
+def read_authkey(socket_path: str) -> bytes:
+    """The key clients present: the configured one, else the server's key file."""
+    if INFERENCE_AUTHKEY:
+        return INFERENCE_AUTHKEY.encode()
+    with open(authkey_path(socket_path), "rb") as f:
+        return f.read()
+
+
+def create_authkey(socket_path: str) -> bytes:
+    """
+    Server side: the configured key, or a fresh random key written atomically to a
+    file that is 0600 from the moment it exists.
+    """
+    if INFERENCE_AUTHKEY:
+        return INFERENCE_AUTHKEY.encode()
+    key = secrets.token_bytes(32)
+    path = authkey_path(socket_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp, path)
+    return key
+
+
+class InferenceClient:
+    """One connection per thread (connections are not thread-safe); reconnects once on failure."""
+
+    def __init__(self, socket_path: str = INFERENCE_SOCKET):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Read on every connect: a restarted server has a new key
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=read_authkey(self.socket_path))
+            self._local.conn = conn
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, op: str, items=None):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, items))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._drop()  # Server restarted: retry on a fresh connection
+                if attempt:
+                    raise
+        if status != "ok":
+            raise RuntimeError(f"Inference server: {result}")
+        return result
+
+
+class RemoteCLIP:
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def get_text_embedding(self, text: str):
+        return self.client.call("text", [text])[0]
+
+    def get_text_embeddings(self, texts):
+        return self.client.call("text", list(texts))
+
+    def embed_frame(self, frame):
+        return self.client.call("images_bgr", [frame])[0]
+
+    def embed_frames(self, frames, batch_size: int = 32, rgb: bool = False):
+        # The server batches across callers, so send everything at once
+        return self.client.call("images_rgb" if rgb else "images_bgr", [np.ascontiguousarray(f) for f in frames])
+
+
+class RemoteActionModel:
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def is_loaded(self) -> bool:
+        return True
+
+    def analyze_actions(self, clips: List[List[np.ndarray]], top_k: int = 5) -> List[tuple]:
+        return self.client.call("action", clips)
+
+    def analyze_action(self, frames: List[np.ndarray], top_k: int = 5) -> tuple:
+        try:
+            return self.analyze_actions([frames])[0]
+        except Exception as e:
+            logger.warning(f"[FootballActionModel] Remote analysis failed: {e}")
+            return None, {}
+
+    def get_action_embedding(self, frames: List[np.ndarray]) -> Optional[List[float]]:
+        return self.analyze_action(frames)[0]
+
+    def classify_action(self, frames: List[np.ndarray], top_k: int = 5) -> Dict[str, float]:
+        return self.analyze_action(frames)[1]
+
+
+class RemoteYOLO:
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def detect_batch(self, frames: List[np.ndarray], batch_size: int = 16):
+        return self.client.call("detect", frames)
+
+    def count_players(self, frame) -> int:
+        boxes, _, _ = self.detect_batch([frame])[0]
+        return len(boxes)
+
+    @staticmethod
+    def track(table):
+        from .yolo_tracker import YOLOTracker
+        return YOLOTracker.track(table)
+
+
+_REMOTES = {"clip": RemoteCLIP, "videomae": RemoteActionModel, "yolo": RemoteYOLO}
+
+
+def remote_model(name: str):
+    """
+    Client stand-in for `name` if a server is configured (None otherwise).
+    Raises if the server is not reachable, so the registry records a failed load.
+    """
+    if not INFERENCE_SOCKET or SERVER_PROCESS:
+        return None
+    client = InferenceClient(INFERENCE_SOCKET)
+    client.call("ping")
+    return _REMOTES[name](client)
@@ -0,0 +1,201 @@
+"""
+Inference Server
+One process that hosts CLIP, VideoMAE and YOLO for every API worker and ingest
+job on the machine. Requests arrive over a Unix socket; concurrent requests of
+the same kind are coalesced into one forward pass (dynamic batching) as long as
+the first request has not waited longer than the latency deadline.
+
+    python -m backend.ai.inference_server [--models clip,videomae,yolo]
+
+Workers use it when TACSEARCH_INFERENCE_SOCKET is set (see inference_client.py).
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import argparse
+import threading
+from multiprocessing.connection import Listener
+from typing import Callable, Dict, List
+
+from . import inference_client
+from .inference_client import INFERENCE_SOCKET, create_authkey
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+INFERENCE_MAX_BATCH = int(os.environ.get("TACSEARCH_INFERENCE_MAX_BATCH", "32"))  # Items per forward pass
+INFERENCE_MAX_LATENCY_MS = float(os.environ.get("TACSEARCH_INFERENCE_MAX_LATENCY_MS", "10"))  # Wait to fill a batch
+
+
+class _Request:
+    def __init__(self, items: List):
+        self.items = items
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class DynamicBatcher:
+    """
+    Collects submitted items for one operation and runs `run_batch(items) -> results`
+    once per batch. A batch closes when it holds `max_batch` items or `max_latency`
+    seconds after its first request arrived; requests are never split.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[List], List],
+                 max_batch: int = INFERENCE_MAX_BATCH, max_latency: float = INFERENCE_MAX_LATENCY_MS / 1000):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue: "queue.Queue[_Request]" = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.requests = 0
+        self.busy_seconds = 0.0
+        threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True).start()
+
+    def submit(self, items: List) -> List:
+        request = _Request(list(items))
+        if not request.items:
+            return []
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect(self) -> List[_Request]:
+        batch = [self.queue.get()]
+        size = len(batch[0].items)
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            items = [item for request in batch for item in request.items]
+            start = time.perf_counter()
+            try:
+                results = list(self.run_batch(items))
+                offset = 0
+                for request in batch:
+                    request.results = results[offset:offset + len(request.items)]
+                    offset += len(request.items)
+            except Exception as e:
+                logger.error(f"[InferenceServer] {self.name} batch of {len(items)} failed: {e}")
+                for request in batch:
+                    request.error = RuntimeError(f"{self.name} failed: {e}")
+            self.busy_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.items += len(items)
+            self.requests += len(batch)
+            for request in batch:
+                request.done.set()
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "queued": self.queue.qsize(),
+        }
+
+
+class InferenceServer:
+    def __init__(self, socket_path: str = INFERENCE_SOCKET, models=("clip", "videomae", "yolo")):
+        from .registry import registry
+
+        # Models load in this process; never loop back to ourselves through the socket
+        inference_client.SERVER_PROCESS = True
+        self.socket_path = socket_path
+        self.registry = registry
+        self.batchers: Dict[str, DynamicBatcher] = {}
+        for name in models:
+            if registry.get(name) is None:
+                logger.error(f"[InferenceServer] {name} failed to load, requests for it will fail")
+
+        self._add("text", "clip", lambda clip, texts: clip.get_text_embeddings(texts))
+        self._add("images_bgr", "clip", lambda clip, frames: clip.embed_frames(frames))
+        self._add("images_rgb", "clip", lambda clip, frames: clip.embed_frames(frames, rgb=True))
+        self._add("action", "videomae", lambda model, clips: model.analyze_actions(clips))
+        self._add("detect", "yolo", lambda yolo, frames: yolo.detect_batch(frames))
+
+    def _add(self, op: str, model_name: str, fn):
+        def run_batch(items):
+            model = self.registry.get(model_name)
+            if model is None:
+                raise RuntimeError(f"{model_name} is not available")
+            return fn(model, items)
+        self.batchers[op] = DynamicBatcher(op, run_batch)
+
+    def handle(self, op: str, items: List):
+        if op == "ping":
+            return "pong"
+        if op == "stats":
+            return {"batchers": {name: b.stats() for name, b in self.batchers.items()},
+                    "registry": self.registry.stats()}
+        if op not in self.batchers:
+            raise ValueError(f"Unknown operation '{op}'")
+        return self.batchers[op].submit(items)
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, items = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.handle(op, items)))
+                except Exception as e:
+                    conn.send(("error", str(e)))
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Stale socket from a previous run
+        # Owner-only from creation: the socket and key file never exist with looser permissions
+        old_umask = os.umask(0o077)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+            authkey = create_authkey(self.socket_path)
+            listener = Listener(self.socket_path, family="AF_UNIX", authkey=authkey)
+        finally:
+            os.umask(old_umask)
+        with listener:
+            logger.info(f"[InferenceServer] Listening on {self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:  # Failed handshake (wrong authkey) etc.
+                    logger.warning(f"[InferenceServer] Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared model server for TacSearch workers")
+    parser.add_argument("--socket", default=INFERENCE_SOCKET or "data/inference.sock")
+    parser.add_argument("--models", default="clip,videomae,yolo", help="Models to load at startup")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    InferenceServer(args.socket, models).serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Ingest Memory
+Samples resident memory (and, optionally, tracemalloc) while an ingest job runs
+and reports the job's peak, and enforces an optional memory budget by shrinking
+the pipeline's buffers - embedding and YOLO batch sizes, DB flush interval - when the process gets close to it, growing them back when it has room.
+
+RSS and tracemalloc are process-wide: with several jobs in one worker each job's
+peak includes the others, and the budget is shared by all of them, which is the
+point - every job backs off when the box is full.
+"""
+import os
+import time
+import logging
+import threading
+import tracemalloc
+from typing import Dict, Optional
+
+from .registry import current_rss_bytes
+from .metrics import gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+INGEST_MEMORY_BUDGET_MB = float(os.environ.get("TACSEARCH_INGEST_MEMORY_BUDGET_MB", "0"))  # 0 = no budget
+MEMORY_SAMPLE_INTERVAL = float(os.environ.get("TACSEARCH_MEMORY_SAMPLE_INTERVAL", "0.25"))  # Seconds
+TRACEMALLOC_ENABLED = os.environ.get("TACSEARCH_TRACEMALLOC", "0") == "1"  # Python/NumPy allocations; slows ingest
+SEGMENT_FLUSH_EVERY = int(os.environ.get("TACSEARCH_SEGMENT_FLUSH_EVERY", "256"))  # Segments held before a DB write
+EMBED_BATCH_SIZE = int(os.environ.get("TACSEARCH_INGEST_EMBED_BATCH", "4"))  # Samples per VideoMAE/CLIP forward pass
+
+# Budget pressure (RSS / budget) at which knobs shrink, and below which they grow back
+SHRINK_AT = 0.9
+GROW_BELOW = 0.7
+MIN_BATCH_SIZE = 1
+MIN_FLUSH_EVERY = 8
+
+_MB = 2**20
+
+PEAK_RSS = histogram("tacsearch_ingest_peak_rss_bytes", "Peak process RSS during an ingest job",
+                     buckets=tuple(b * _MB for b in (256, 512, 1024, 2048, 4096, 8192, 16384)))
+PEAK_GROWTH = histogram("tacsearch_ingest_peak_rss_growth_bytes", "Peak RSS above the level at job start",
+                        buckets=tuple(b * _MB for b in (16, 64, 128, 256, 512, 1024, 2048, 4096)))
+BUDGET_KNOBS = gauge("tacsearch_ingest_memory_knob", "Current buffer sizes chosen by the memory budget")
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False  # Started by us, so stopped by us when the last job ends
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class MemoryProbe:
+    """
+    Background sampler for one job. `rss` is the latest sample (cheap to read from
+    hot loops), `stop()` returns the job's peaks and records them once.
+    """
+
+    def __init__(self, label: str, interval: float = MEMORY_SAMPLE_INTERVAL, trace: bool = TRACEMALLOC_ENABLED):
+        self.label = label
+        self.interval = interval
+        self.trace = trace
+        self.start_rss = 0
+        self.rss = 0
+        self.peak_rss = 0
+        self.start_traced = 0
+        self.peak_traced = 0
+        self._started = 0.0
+        self._report: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MemoryProbe":
+        if self.trace:
+            _start_tracemalloc()
+            self.start_traced = self.peak_traced = tracemalloc.get_traced_memory()[0]
+        self.start_rss = self.rss = self.peak_rss = current_rss_bytes()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"memory-probe-{self.label}", daemon=True)
+        self._thread.start()
+        return self
+
+    def sample(self):
+        self.rss = current_rss_bytes()
+        self.peak_rss = max(self.peak_rss, self.rss)
+        if self.trace:
+            self.peak_traced = max(self.peak_traced, tracemalloc.get_traced_memory()[0])
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> Dict:
+        """Stops sampling and returns the peaks in MB; later calls return the same report."""
+        if self._report is not None:
+            return self._report
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+        if self.trace:
+            _stop_tracemalloc()
+        self._report = {
+            "start_rss_mb": round(self.start_rss / _MB, 1),
+            "peak_rss_mb": round(self.peak_rss / _MB, 1),
+            "peak_growth_mb": round((self.peak_rss - self.start_rss) / _MB, 1),
+            "seconds": round(time.perf_counter() - self._started, 1),
+        }
+        if self.trace:
+            self._report["traced_peak_mb"] = round((self.peak_traced - self.start_traced) / _MB, 1)
+        PEAK_RSS.observe(self.peak_rss)
+        PEAK_GROWTH.observe(self.peak_rss - self.start_rss)
+        logger.info(f"[Memory] {self.label}: " + " ".join(f"{k}={v}" for k, v in self._report.items()))
+        return self._report
+
+
+class MemoryGovernor:
+    """
+    Picks buffer sizes for one ingest job from the probe's latest RSS sample.
+    Above SHRINK_AT of the budget all knobs halve (at most once per sample
+    interval); below GROW_BELOW they grow back additively towards their defaults.
+    Without a budget the defaults are returned unchanged.
+    """
+
+    def __init__(self, probe: MemoryProbe, batch_size: int, embed_batch_size: int = EMBED_BATCH_SIZE,
+                 flush_every: int = SEGMENT_FLUSH_EVERY, budget_mb: float = INGEST_MEMORY_BUDGET_MB,
+                 labels: Optional[Dict[str, str]] = None):
+        self.probe = probe
+        self.budget = budget_mb * _MB
+        self.max_batch_size = self.batch_size = batch_size
+        self.max_embed_batch_size = self.embed_batch_size = embed_batch_size
+        self.max_flush_every = self.flush_every = flush_every
+        self.labels = labels or {}
+        self.shrinks = 0
+        self._last_change = 0.0
+        if self.budget:
+            self._publish()
+
+    def update(self):
+        """Called once per sampled frame; adjusts the knobs at most once per probe interval."""
+        if not self.budget:
+            return
+        now = time.monotonic()
+        if now - self._last_change < self.probe.interval:
+            return
+        pressure = self.probe.rss / self.budget
+        if pressure > SHRINK_AT and (self.batch_size > MIN_BATCH_SIZE or self.embed_batch_size > MIN_BATCH_SIZE
+                                     or self.flush_every > MIN_FLUSH_EVERY):
+            self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+            self.embed_batch_size = max(MIN_BATCH_SIZE, self.embed_batch_size // 2)
+            self.flush_every = max(MIN_FLUSH_EVERY, self.flush_every // 2)
+            self.shrinks += 1
+            logger.warning(f"[Memory] {self.probe.label}: {pressure:.0%} of budget, batch_size={self.batch_size} "
+                           f"embed_batch_size={self.embed_batch_size} flush_every={self.flush_every}")
+        elif pressure < GROW_BELOW and (self.batch_size < self.max_batch_size
+                                        or self.embed_batch_size < self.max_embed_batch_size
+                                        or self.flush_every < self.max_flush_every):
+            self.batch_size = min(self.max_batch_size, self.batch_size + 1)
+            self.embed_batch_size = min(self.max_embed_batch_size, self.embed_batch_size + 1)
+            self.flush_every = min(self.max_flush_every, self.flush_every + MIN_FLUSH_EVERY)
+        else:
+            return
+        self._last_change = now
+        self._publish()
+
+    def _publish(self):
+        BUDGET_KNOBS.set(self.batch_size, knob="batch_size", **self.labels)
+        BUDGET_KNOBS.set(self.embed_batch_size, knob="embed_batch_size", **self.labels)
+        BUDGET_KNOBS.set(self.flush_every, knob="flush_every", **self.labels)
+
+    def close(self):
+        for knob in ("batch_size", "embed_batch_size", "flush_every"):
+            BUDGET_KNOBS.remove(knob=knob, **self.labels)
@@ -0,0 +1,232 @@
+"""
+Metrics
+Process-local counters, gauges and histograms rendered in the Prometheus text
+exposition format on /api/metrics. Kept dependency-free and cheap enough to
+record per sampled frame; each uvicorn worker reports its own numbers.
+"""
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; covers per-frame model calls up to whole DB writes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+
+
+def _labels_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[Tuple, object] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _copy_values(self) -> Dict[Tuple, object]:
+        """Copy of the values; the caller holds _lock, so writers cannot resize the dict mid-read."""
+        return dict(self.values)
+
+    def render(self) -> List[str]:
+        with _lock:
+            values = self._copy_values()
+        return self._format(values)
+
+    def _format(self, values: Dict[Tuple, object]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def _format(self, values: Dict[Tuple, object]) -> List[str]:
+        return self.header() + [f"{self.name}_total{_format_labels(k)} {v}" for k, v in values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self.values[_labels_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels):
+        with _lock:
+            self.values.pop(_labels_key(labels), None)
+
+    def _format(self, values: Dict[Tuple, object]) -> List[str]:
+        return self.header() + [f"{self.name}{_format_labels(k)} {v}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Optional[Dict]:
+        with _lock:
+            state = self.values.get(_labels_key(labels))
+            return None if state is None else {"sum": state["sum"], "count": state["count"]}
+
+    def _copy_values(self) -> Dict[Tuple, object]:
+        # observe() mutates the per-label state in place, so copy it too
+        return {key: {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]}
+                for key, state in self.values.items()}
+
+    def _format(self, values: Dict[Tuple, object]) -> List[str]:
+        lines = self.header()
+        for key, state in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+
+_registry: Dict[str, _Metric] = {}
+
+
+def _get_or_create(cls, name: str, help_text: str, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help_text, **kwargs)
+    return metric
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _get_or_create(Counter, name, help_text)
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _get_or_create(Gauge, name, help_text)
+
+
+def histogram(name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help_text, buckets=buckets)
+
+
+def render() -> str:
+    """All metrics in Prometheus text format (version 0.0.4)."""
+    # One consistent copy under the lock; formatting happens outside it
+    with _lock:
+        snapshots = [(metric, metric._copy_values()) for metric in _registry.values()]
+    lines = []
+    for metric, values in snapshots:
+        lines.extend(metric._format(values))
+    return "\n".join(lines) + "\n"
+
+
+# --- Ingest metrics ---
+INGEST_STAGE_SECONDS = histogram("tacsearch_ingest_stage_seconds", "Time spent per ingest stage call")
+INGEST_FRAMES = counter("tacsearch_ingest_frames", "Frames decoded (or read from the frame cache) by ingest")
+INGEST_SAMPLES = counter("tacsearch_ingest_samples", "Sampled frames analysed by ingest, by outcome")
+INGEST_SEGMENTS = counter("tacsearch_ingest_segments", "Segments written by ingest, by embedding source")
+INGEST_VIDEOS = counter("tacsearch_ingest_videos", "Finished ingest jobs by status")
+INGEST_FPS = gauge("tacsearch_ingest_frames_per_second", "Decode-to-index throughput of running ingest jobs")
+INGEST_REALTIME = gauge("tacsearch_ingest_realtime_factor", "Seconds of video processed per wall-clock second")
+INGEST_ACTIVE = gauge("tacsearch_ingest_active_jobs", "Ingest jobs currently running")
+INGEST_QUEUE = gauge("tacsearch_ingest_queue_depth", "Items waiting inside running ingest jobs")
+
+# --- Search metrics ---
+SEARCH_STAGE_SECONDS = histogram("tacsearch_search_stage_seconds", "Time per search stage (summed over videos)")
+SEARCH_SECONDS = histogram("tacsearch_search_seconds", "End-to-end search latency")
+
+
+def stage(name: str):
+    """`with stage("clip"):` records one call of an ingest stage."""
+    return INGEST_STAGE_SECONDS.time(stage=name)
+
+
+class RateLimitedLogger:
+    """
+    Leveled logging for hot loops: each key logs at most once per `interval` seconds,
+    and the next emitted line says how many were suppressed. Extra fields are
+    appended as key=value pairs so lines stay greppable.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 5.0):
+        self.logger = logger
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def log(self, level: int, key: str, message: str, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now - self._last.get(key, float("-inf")) < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            fields["suppressed"] = suppressed
+        if fields:
+            message += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        self.logger.log(level, message)
+
+    def debug(self, key: str, message: str, **fields):
+        self.log(logging.DEBUG, key, message, **fields)
+
+    def info(self, key: str, message: str, **fields):
+        self.log(logging.INFO, key, message, **fields)
+
+    def warning(self, key: str, message: str, **fields):
+        self.log(logging.WARNING, key, message, **fields)
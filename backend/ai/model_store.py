@@ -0,0 +1,152 @@
+"""
+Local Model Store
+Keeps every model the backend uses in a local directory so workers start without
+touching the Hugging Face hub. Transformers models are stored as safetensors and,
+on CPU, their parameters are re-pointed at a memory map of the file: the weights
+are then file-backed pages that the page cache shares between all worker processes
+instead of a private copy per worker.
+"""
+import os
+import json
+import mmap
+import shutil
+import struct
+import logging
+from glob import glob
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+MODEL_STORE_DIR = os.environ.get("TACSEARCH_MODEL_STORE", "data/models")
+MODEL_STORE_OFFLINE = os.environ.get("TACSEARCH_OFFLINE", "0") == "1"  # Never download, store only
+MODEL_STORE_MMAP = os.environ.get("TACSEARCH_MODEL_MMAP", "1") == "1"  # Map CPU weights from the file
+
+# safetensors dtype codes -> torch dtype names
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def store_path(model_id: str) -> str:
+    """Directory of a Hugging Face model, or file path of a YOLO checkpoint."""
+    return os.path.join(MODEL_STORE_DIR, model_id.replace("/", "--"))
+
+
+def _missing(model_id: str):
+    return FileNotFoundError(
+        f"Model '{model_id}' is not in the local store ({MODEL_STORE_DIR}) and TACSEARCH_OFFLINE=1. "
+        f"Run `python backend/prepare_models.py` on a machine with network access first."
+    )
+
+
+def fetch_pretrained(model_id: str, model_cls, processor_cls) -> str:
+    """Downloads a Hugging Face model once and saves it (safetensors) into the store."""
+    path = store_path(model_id)
+    if os.path.isdir(path):
+        return path
+    if MODEL_STORE_OFFLINE:
+        raise _missing(model_id)
+    logger.info(f"[ModelStore] Fetching {model_id} into {path}...")
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    model_cls.from_pretrained(model_id).save_pretrained(tmp_path, safe_serialization=True)
+    processor_cls.from_pretrained(model_id).save_pretrained(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_pretrained(model_id: str, model_cls, processor_cls, device: str = "cpu"):
+    """
+    Returns (model, processor) from the local store, fetching first if allowed.
+    The model is in eval mode on `device`; on CPU its weights are memory-mapped.
+    """
+    path = fetch_pretrained(model_id, model_cls, processor_cls)
+    model = model_cls.from_pretrained(path, local_files_only=True, use_safetensors=True, low_cpu_mem_usage=True)
+    processor = processor_cls.from_pretrained(path, local_files_only=True)
+    model.eval()
+    if device == "cpu":
+        if MODEL_STORE_MMAP:
+            mapped = map_weights(model, path)
+            logger.info(f"[ModelStore] {model_id}: {mapped / 2**20:.0f} MB of weights memory-mapped")
+    else:
+        model.to(device)
+    return model, processor
+
+
+def read_safetensors(path: str):
+    """
+    Tensors of a .safetensors file as views into a private (copy-on-write) memory map.
+    Pages are only read from disk when touched and stay shared until written to.
+    Returns (tensors, mmap) - the map must outlive the tensors.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    base = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        if end == start:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        flat = torch.frombuffer(mapped, dtype=dtype, count=(end - start) // dtype.itemsize, offset=base + start)
+        tensors[name] = flat.reshape(info["shape"])
+    return tensors, mapped
+
+
+def map_weights(model, directory: str) -> int:
+    """
+    Re-points the model's parameters and persistent buffers at the safetensors files in
+    `directory`, releasing the copies from_pretrained made. Returns the bytes mapped.
+    """
+    import torch
+
+    targets: Dict[str, torch.Tensor] = dict(model.named_parameters())
+    targets.update(model.named_buffers())
+    maps: List[mmap.mmap] = []
+    mapped_bytes = 0
+    with torch.no_grad():
+        for path in sorted(glob(os.path.join(directory, "*.safetensors"))):
+            tensors, mapped = read_safetensors(path)
+            maps.append(mapped)
+            for name, tensor in tensors.items():
+                target = targets.get(name)
+                if target is None or target.shape != tensor.shape or target.dtype != tensor.dtype:
+                    continue
+                target.data = tensor
+                mapped_bytes += tensor.numel() * tensor.element_size()
+    model._weight_maps = maps  # Keep the maps alive as long as the model
+    return mapped_bytes
+
+
+def resolve_yolo(model_name: str) -> str:
+    """
+    Path of a YOLO checkpoint inside the store, copying it there on first use.
+    The checkpoint stays in Ultralytics' own format - it carries the architecture,
+    and at a few MB there is nothing to gain from mapping it.
+    """
+    if os.path.exists(model_name) and os.path.dirname(os.path.abspath(model_name)) == os.path.abspath(MODEL_STORE_DIR):
+        return model_name
+    path = store_path(os.path.basename(model_name))
+    if os.path.exists(path):
+        return path
+    if MODEL_STORE_OFFLINE:
+        raise _missing(model_name)
+    from ultralytics import YOLO
+
+    source = model_name
+    if not os.path.exists(source):
+        # Ultralytics downloads known checkpoints on construction
+        source = getattr(YOLO(model_name), "ckpt_path", None) or model_name
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    shutil.copyfile(source, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
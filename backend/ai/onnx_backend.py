@@ -0,0 +1,214 @@
+"""
+ONNX Runtime Backend
+Exports CLIP, VideoMAE and YOLO to ONNX once, caches the artifacts locally and
+runs them through ONNX Runtime on CPU, optionally with dynamic int8 quantization.
+Every exported graph is checked against the torch outputs before it is used.
+"""
+import os
+import logging
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+INFERENCE_BACKEND = os.environ.get("TACSEARCH_INFERENCE_BACKEND", "torch")  # "torch" or "onnx"
+ONNX_QUANTIZE = os.environ.get("TACSEARCH_ONNX_INT8", "0") == "1"  # Dynamic int8 weights
+ONNX_CACHE_DIR = os.environ.get("TACSEARCH_ONNX_DIR", "data/onnx")
+ONNX_THREADS = int(os.environ.get("TACSEARCH_ONNX_THREADS", "0"))  # 0 = ONNX Runtime default
+ONNX_OPSET = 17
+
+# Minimum cosine similarity between torch and ONNX outputs on the parity input
+PARITY_MIN_COSINE = 0.999
+PARITY_MIN_COSINE_INT8 = 0.98
+
+
+def use_onnx(backend: Optional[str], device: str) -> bool:
+    """ONNX Runtime is used for CPU inference only; CUDA keeps eager torch."""
+    return (backend or INFERENCE_BACKEND) == "onnx" and device == "cpu"
+
+
+def artifact_path(model_id: str, part: str, quantized: bool = False) -> str:
+    name = model_id.replace("/", "--") + f"-{part}" + ("-int8" if quantized else "") + ".onnx"
+    return os.path.join(ONNX_CACHE_DIR, name)
+
+
+class OnnxModel:
+    """Thin wrapper around an onnxruntime.InferenceSession returning named numpy outputs."""
+
+    def __init__(self, path: str, threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def run(self, **inputs) -> Dict[str, np.ndarray]:
+        feed = {name: np.ascontiguousarray(inputs[name]) for name in self.input_names}
+        outputs = self.session.run(self.output_names, feed)
+        return dict(zip(self.output_names, outputs))
+
+
+def export_module(module, example_inputs: tuple, input_names, output_names, dynamic_axes, path: str):
+    """torch.onnx.export into a temporary file, renamed when complete."""
+    import torch
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    module.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            module, example_inputs, tmp_path,
+            input_names=input_names, output_names=output_names, dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET, do_constant_folding=True,
+        )
+    os.replace(tmp_path, path)
+
+
+def quantize(path: str, quantized_path: str):
+    """Dynamic int8 quantization of the weights (activations stay float)."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    tmp_path = quantized_path + ".tmp"
+    quantize_dynamic(path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+
+
+def load_or_export(model_id: str, part: str, export_fn: Callable[[str], None],
+                   quantized: Optional[bool] = None) -> OnnxModel:
+    """
+    Returns a session for `part` of `model_id`, exporting (and quantizing) on first use.
+    `export_fn(path)` writes the fp32 graph.
+    """
+    quantized = ONNX_QUANTIZE if quantized is None else quantized
+    path = artifact_path(model_id, part)
+    if not os.path.exists(path):
+        logger.info(f"Exporting {model_id} {part} to ONNX...")
+        export_fn(path)
+    if quantized:
+        quantized_path = artifact_path(model_id, part, quantized=True)
+        if not os.path.exists(quantized_path):
+            logger.info(f"Quantizing {model_id} {part} to int8...")
+            quantize(path, quantized_path)
+        path = quantized_path
+    return OnnxModel(path)
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = np.asarray(a, dtype=np.float64).ravel(), np.asarray(b, dtype=np.float64).ravel()
+    denom = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(np.dot(a, b) / denom) if denom else 0.0
+
+
+def check_parity(name: str, torch_output: np.ndarray, onnx_output: np.ndarray,
+                 quantized: Optional[bool] = None) -> bool:
+    """Compares torch and ONNX outputs on the same input; logs and returns whether they agree."""
+    quantized = ONNX_QUANTIZE if quantized is None else quantized
+    similarity = cosine(torch_output, onnx_output)
+    max_diff = float(np.max(np.abs(np.asarray(torch_output) - np.asarray(onnx_output))))
+    required = PARITY_MIN_COSINE_INT8 if quantized else PARITY_MIN_COSINE
+    ok = similarity >= required
+    level = logging.INFO if ok else logging.WARNING
+    logger.log(level, f"[Parity] {name}: cosine={similarity:.5f} (min {required}), max|diff|={max_diff:.4g} -> {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+# --- Export wrappers (return plain tensors so the graphs have fixed outputs) ---
+
+def _features(outputs):
+    """Same output handling as CLIPSearchEngine: tensor, *_embeds or pooler_output."""
+    if hasattr(outputs, "text_embeds"):
+        return outputs.text_embeds
+    if hasattr(outputs, "image_embeds"):
+        return outputs.image_embeds
+    if hasattr(outputs, "pooler_output"):
+        return outputs.pooler_output
+    return outputs
+
+
+def clip_text_exporter(model) -> Callable[[str], None]:
+    import torch
+
+    class TextEncoder(torch.nn.Module):
+        def __init__(self, clip_model):
+            super().__init__()
+            self.clip_model = clip_model
+
+        def forward(self, input_ids, attention_mask):
+            return _features(self.clip_model.get_text_features(input_ids=input_ids, attention_mask=attention_mask))
+
+    def export(path: str):
+        input_ids = torch.ones((1, 8), dtype=torch.long)
+        attention_mask = torch.ones((1, 8), dtype=torch.long)
+        export_module(TextEncoder(model), (input_ids, attention_mask), ["input_ids", "attention_mask"],
+                      ["text_embeds"], {"input_ids": {0: "batch", 1: "sequence"},
+                                        "attention_mask": {0: "batch", 1: "sequence"},
+                                        "text_embeds": {0: "batch"}}, path)
+    return export
+
+
+def clip_image_exporter(model) -> Callable[[str], None]:
+    import torch
+
+    class ImageEncoder(torch.nn.Module):
+        def __init__(self, clip_model):
+            super().__init__()
+            self.clip_model = clip_model
+
+        def forward(self, pixel_values):
+            return _features(self.clip_model.get_image_features(pixel_values=pixel_values))
+
+    def export(path: str):
+        pixel_values = torch.zeros((1, 3, 224, 224), dtype=torch.float32)
+        export_module(ImageEncoder(model), (pixel_values,), ["pixel_values"], ["image_embeds"],
+                      {"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}}, path)
+    return export
+
+
+def videomae_exporter(model, num_frames: int = 16, image_size: int = 224) -> Callable[[str], None]:
+    import torch
+
+    class ActionModel(torch.nn.Module):
+        """Returns (logits, CLS embedding of the last hidden state) like FootballActionModel uses them."""
+
+        def __init__(self, videomae):
+            super().__init__()
+            self.videomae = videomae
+
+        def forward(self, pixel_values):
+            outputs = self.videomae(pixel_values, output_hidden_states=True)
+            return outputs.logits, outputs.hidden_states[-1][:, 0, :]
+
+    def export(path: str):
+        pixel_values = torch.zeros((1, num_frames, 3, image_size, image_size), dtype=torch.float32)
+        export_module(ActionModel(model), (pixel_values,), ["pixel_values"], ["logits", "embedding"],
+                      {"pixel_values": {0: "batch"}, "logits": {0: "batch"}, "embedding": {0: "batch"}}, path)
+    return export
+
+
+def export_yolo(model_name: str, quantized: Optional[bool] = None) -> str:
+    """
+    Exports a YOLO checkpoint with Ultralytics' exporter (dynamic batch) into the cache
+    and returns the .onnx path; Ultralytics runs it through ONNX Runtime when loaded.
+    """
+    from ultralytics import YOLO
+
+    quantized = ONNX_QUANTIZE if quantized is None else quantized
+    model_id = os.path.splitext(os.path.basename(model_name))[0]
+    path = artifact_path(model_id, "detect")
+    if not os.path.exists(path):
+        os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+        exported = YOLO(model_name).export(format="onnx", dynamic=True, imgsz=640, opset=ONNX_OPSET)
+        os.replace(exported, path)
+    if quantized:
+        quantized_path = artifact_path(model_id, "detect", quantized=True)
+        if not os.path.exists(quantized_path):
+            quantize(path, quantized_path)
+        path = quantized_path
+    return path
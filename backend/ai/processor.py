@@ -1,52 +1,156 @@
 from sqlmodel import Session, select
 from ..database import engine
 from ..models import Video, VideoSegment
-from .yolo_tracker import YOLOTracker
-from .clip_search import CLIPSearchEngine
-from .football_model import get_football_model
+from .yolo_tracker import YOLO_BATCH_SIZE
+from .registry import registry
+from .frame_cache import FrameCache, FrameCacheWriter, FRAME_CACHE_ENABLED
+from .proxy import create_proxy
+from .decoders import open_frame_source
+from .quick_index import (QUICK_INDEX_ENABLED, TIER_STAGING, build_quick_index, replace_preliminary_segments,
+                          discard_staged_segments)
+from .audio import AUDIO_ENABLED, AudioActivity, analyze_audio
+from .detections import DETECTIONS_AT_INGEST, DetectionTableBuilder, flush_detections
+from .track_index import build_track_index
+from .scheduler import scheduler
+from .memory import MemoryProbe, MemoryGovernor
+from .metrics import (INGEST_STAGE_SECONDS, INGEST_FRAMES, INGEST_SAMPLES, INGEST_SEGMENTS, INGEST_VIDEOS,
+                      INGEST_FPS, INGEST_REALTIME, INGEST_ACTIVE, INGEST_QUEUE, RateLimitedLogger, stage)
 import logging
+from collections import deque
 
-# Lazy Loading Singleton
-_yolo_tracker = None
-_clip_engine = None
-_football_model = None
+logger = logging.getLogger(__name__)
 
+# Models live in the shared registry (per-model locks, load once, idle unloading)
 def get_yolo_tracker():
-    global _yolo_tracker
-    if _yolo_tracker is None:
-        try:
-            _yolo_tracker = YOLOTracker()
-        except Exception as e:
-            logging.error(f"Failed to load YOLO: {e}")
-    return _yolo_tracker
+    return registry.get("yolo")
 
 def get_clip_engine():
-    global _clip_engine
-    if _clip_engine is None:
+    return registry.get("clip")
+
+def get_football_action_model():
+    return registry.get("videomae")
+
+def create_proxy_task(video_id: int):
+    """
+    Upload-time step: transcodes the low-resolution analysis proxy and records it on the video.
+    """
+    with Session(engine) as session:
+        video = session.get(Video, video_id)
+        if not video or video.proxy_path:
+            return
+        import os
+        if not os.path.exists(video.filepath):
+            return
+
+        logger.info(f"Creating analysis proxy for video: {video.title}")
+        proxy_path = create_proxy(video.filepath)
+        if proxy_path:
+            video.proxy_path = proxy_path
+            session.add(video)
+            session.commit()
+            logger.info(f"Proxy ready: {proxy_path}")
+
+def analyze_audio_task(video_id: int):
+    """
+    Ingest step: computes the soundtrack activity track used to focus the heavy models.
+    """
+    with Session(engine) as session:
+        video = session.get(Video, video_id)
+        if not video:
+            return
+        track = analyze_audio(video.id, video.filepath)
+        if track is None:
+            logger.warning(f"No audio track for video: {video.title}")
+        else:
+            logger.info(f"Audio activity track: {len(track.peaks)} peaks")
+
+def ingest_video_task(video_id: int, decoder: str = None):
+    """
+    Full ingest pipeline run after an upload:
+    keyframe quick index (searchable right away) -> analysis proxy -> full pass.
+
+    Args:
+        video_id: Video to ingest
+        decoder: Frame source backend for this job ("opencv", "pyav", "auto"), None for the default
+    """
+    if QUICK_INDEX_ENABLED:
+        try:
+            build_quick_index(video_id)
+        except Exception as e:
+            logger.error(f"Quick index failed for video {video_id}: {e}")
+    if AUDIO_ENABLED:
         try:
-            _clip_engine = CLIPSearchEngine()
+            analyze_audio_task(video_id)
         except Exception as e:
-            logging.error(f"Failed to load CLIP: {e}")
-    return _clip_engine
+            logger.error(f"Audio analysis failed for video {video_id}: {e}")
+    try:
+        create_proxy_task(video_id)
+    except Exception as e:
+        logger.error(f"Proxy creation failed for video {video_id}: {e}")
+    process_video_task(video_id, decoder=decoder)
 
-def get_football_action_model():
-    global _football_model
-    if _football_model is None:
+ACTION_CLIP_FRAMES = 16  # Frames per VideoMAE clip
+
+
+def _action_clip(frame_buffer: deque) -> list:
+    """The buffered frames as a 16-frame clip, repeating frames when the buffer is shorter (frame cache)."""
+    frames = list(frame_buffer)
+    if len(frames) == ACTION_CLIP_FRAMES:
+        return frames
+    import numpy as np
+    return [frames[i] for i in np.linspace(0, len(frames) - 1, ACTION_CLIP_FRAMES).round().astype(int)]
+
+def _embed_samples(samples: list, football_model, log: RateLimitedLogger) -> list:
+    """
+    (time, embedding, action_class) per pending (time, frame, action_clip) sample: one batched
+    VideoMAE pass over the action clips, then one batched CLIP pass over the frames left
+    without an embedding (no clip, or the football model failed). Embedding is None when
+    neither model produced one.
+    """
+    embedded = {}
+    clip_indices = [i for i, (_, _, action_clip) in enumerate(samples) if action_clip is not None]
+    if clip_indices:
         try:
-            _football_model = get_football_model()
+            # Action embedding and classification (for metadata) from one forward pass
+            with scheduler.batch():
+                analyzed = football_model.analyze_actions([samples[i][2] for i in clip_indices])
+            for i, (embedding, action_scores) in zip(clip_indices, analyzed):
+                if not embedding:
+                    continue
+                action_class = max(action_scores, key=action_scores.get) if action_scores else "unknown"
+                embedded[i] = (embedding, action_class)
+                if action_scores:
+                    log.debug("action", "Action detected", t=f"{samples[i][0]:.1f}",
+                              action=action_class, score=f"{action_scores[action_class]:.2f}")
         except Exception as e:
-            logging.error(f"Failed to load Football Model: {e}")
-    return _football_model
+            log.warning("action_error", f"Football model error, falling back to CLIP: {e}")
+
+    # Fallback to CLIP if football model failed or unavailable
+    fallback = [i for i in range(len(samples)) if i not in embedded]
+    if fallback:
+        clip = get_clip_engine()
+        if clip:
+            with scheduler.batch(), stage("clip"):
+                embeddings = clip.embed_frames([samples[i][1] for i in fallback], batch_size=len(fallback))
+            for i, embedding in zip(fallback, embeddings):
+                embedded[i] = (embedding, "clip_fallback")
+        else:
+            log.warning("no_clip", "CLIP not available!")
+    return [(sample_time, *embedded.get(i, (None, "unknown"))) for i, (sample_time, _, _) in enumerate(samples)]
 
 # Flag to check if models are loaded (simplified for now)
 MODELS_LOADED = True # We assume they will load on demand, errors handled in getters
 
-def process_video_task(video_id: int):
+def process_video_task(video_id: int, decoder: str = None):
     """
     Background task to process a video with Hybrid Gatekeeper Architecture.
+    `decoder` selects the frame source backend for this job (see decoders.open_frame_source).
+    Per-stage timings, throughput and queue depths are recorded in .metrics (GET /api/metrics).
+    Peak memory is sampled by a .memory probe and stored in the video's metadata; with
+    TACSEARCH_INGEST_MEMORY_BUDGET_MB set, batch size and segment flushing adapt to stay under it.
     """
     if not MODELS_LOADED:
-        logging.error("AI Models not loaded, skipping processing")
+        logger.error("AI Models not loaded, skipping processing")
         return
 
     with Session(engine) as session:
@@ -54,18 +158,27 @@ def process_video_task(video_id: int):
         if not video:
             return
 
-        print(f"Starting HYBRID processing for video: {video.title}")
+        logger.info(f"Starting HYBRID processing for video: {video.title}")
         import os
-        import cv2
+        import time
         import numpy as np
         
         if not os.path.exists(video.filepath):
-            print(f"ERROR: Video file not found at {video.filepath}")
+            logger.error(f"Video file not found at {video.filepath}")
             video.processing_progress = -1.0
             session.add(video)
             session.commit()
+            INGEST_VIDEOS.inc(status="missing")
             return
         
+        log = RateLimitedLogger(logger)
+        labels = {"video": str(video.id)}
+        cache_writer = None
+        source = None
+        held_models = []
+        probe = MemoryProbe(f"video {video.id}").start()
+        governor = MemoryGovernor(probe, batch_size=YOLO_BATCH_SIZE, labels=labels)
+        INGEST_ACTIVE.inc()
         try:
             # Update progress: Started
             video.processing_progress = 0.0
@@ -73,186 +186,251 @@ def process_video_task(video_id: int):
             session.commit()
 
             # STEP 1: LOAD AI MODELS
-            print("\n" + "="*60)
-            print("Loading AI models...")
-            print("="*60)
-            
-            football_model = get_football_model()
+            # Pinned for the whole job so idle unloading cannot drop them mid-video
+            football_model = registry.acquire("videomae")
+            if football_model:
+                held_models.append("videomae")
             if football_model and football_model.is_loaded():
-                print("[OK] Football Action Model loaded")
+                logger.info("Football Action Model loaded")
             else:
-                print("[WARN] Football model not available, will use CLIP only")
+                logger.warning("Football model not available, will use CLIP only")
                 football_model = None
             
-            clip = get_clip_engine()
+            clip = registry.acquire("clip")
             if clip:
-                print("[OK] CLIP Model loaded")
+                held_models.append("clip")
+                logger.info("CLIP Model loaded")
             else:
-                print("[ERROR] CLIP not loaded!")
+                logger.error("CLIP not loaded!")
             
-            yolo = get_yolo_tracker()
-            if yolo:
-                print("[OK] YOLO Tracker loaded")
-            else:
-                print("[WARN] YOLO not loaded")
-            
-            print("="*60 + "\n")
+            # Re-analysis passes read the downscaled frame cache instead of decoding again
+            frame_cache = FrameCache(video.id)
+            from_cache = frame_cache.exists()
 
+            # YOLO only runs at ingest when configured; otherwise detections are computed on request.
+            # Not from the cache: its square center crops cut off the sidelines, so the detections
+            # of the first pass (or the on-request ones, decoded from the source) are kept.
+            yolo = registry.acquire("yolo") if DETECTIONS_AT_INGEST and not from_cache else None
+            if yolo:
+                held_models.append("yolo")
+                logger.info("YOLO Tracker loaded")
+            elif DETECTIONS_AT_INGEST and from_cache:
+                logger.info("Reading from the frame cache, keeping the existing detections")
+            elif DETECTIONS_AT_INGEST:
+                logger.warning("YOLO not loaded")
 
-            cap = cv2.VideoCapture(video.filepath)
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps
+            if from_cache:
+                logger.info(f"Reading frames from cache ({frame_cache.size}px @ {frame_cache.fps:.1f}fps)")
+                fps = frame_cache.fps
+                source_fps = frame_cache.source_fps
+                total_frames = len(frame_cache)
+                frame_source = (frame for _, frame in frame_cache.iter_frames())
+            else:
+                # Decode the low-resolution proxy when one exists; playback keeps the original
+                analysis_path = video.proxy_path if video.proxy_path and os.path.exists(video.proxy_path) else video.filepath
+                source = open_frame_source(analysis_path, backend=decoder)
+                logger.info(f"Decoding with {source.backend} backend")
+                fps = source_fps = source.fps
+                total_frames = source.frame_count
+                frame_source = (decoded.image for decoded in source.frames())
+                if FRAME_CACHE_ENABLED:
+                    cache_writer = FrameCacheWriter(video.id, fps)
+            duration = total_frames / fps  # 0 when the source cannot tell its length: no progress percentage
             
             # Process 1 frame every 0.5 seconds (increased sampling)
-            step_frames = int(fps / 2)  # Half-second intervals
+            step_frames = max(1, int(fps / 2))  # Half-second intervals
             current_frame = 0
+            next_sample_frame = 0
+            
+            # Audio activity: sample densely around crowd/whistle peaks, sparsely when quiet
+            audio_track = AudioActivity.load(video.id)
+            if audio_track:
+                logger.info(f"Using audio activity track ({len(audio_track.peaks)} peaks)")
             
+            # Segments are written as "staging" every governor.flush_every and promoted at the end
             segments_to_save = []
-            frame_buffer = []  # Buffer to collect 16 frames for football model
+            segment_count = 0
+            # The football model sees ACTION_CLIP_FRAMES consecutive source frames. The cache keeps fewer
+            # frames per second, so the buffer covers the same time span and is stretched to 16 frames
+            clip_span_frames = max(1, round(ACTION_CLIP_FRAMES * fps / source_fps))
+            frame_buffer = deque(maxlen=clip_span_frames)  # Decoders yield fresh arrays, no copy needed
+            detection_builder = DetectionTableBuilder() if yolo else None
+            yolo_frames, yolo_times = [], []  # Sampled frames waiting for a batched YOLO pass
+            pending_samples = []  # (time, frame, action clip or None) waiting for a batched embedding pass
+
+            def flush_samples():
+                """Embeds the pending samples, queues their segments and writes staged ones every flush_every."""
+                nonlocal segment_count
+                if not pending_samples:
+                    return
+                indexed_before = segment_count
+                for sample_time, embedding, action_class in _embed_samples(pending_samples, football_model, log):
+                    if embedding:
+                        # Create 15-second segment centered on this frame
+                        # Larger context window for better event capture
+                        segments_to_save.append(VideoSegment(
+                            video_id=video.id,
+                            start_time=max(0.0, sample_time - 7.5),
+                            end_time=sample_time + 7.5,
+                            embedding=embedding,
+                            text_description=action_class,  # Store action class for debugging
+                            tier=TIER_STAGING
+                        ))
+                        segment_count += 1
+                        INGEST_SAMPLES.inc(outcome="indexed")
+                        INGEST_SEGMENTS.inc(source="clip" if action_class == "clip_fallback" else "videomae")
+                    else:
+                        INGEST_SAMPLES.inc(outcome="no_embedding")
+                        log.warning("no_embedding", "Skipped sample (no embedding generated)", t=f"{sample_time:.1f}")
+                pending_samples.clear()
+                INGEST_QUEUE.set(0, queue="embed", **labels)
+                INGEST_QUEUE.set(len(segments_to_save), queue="segments", **labels)
+
+                # Write held segments (staged, not searchable yet) so they don't pile up for the whole video
+                if len(segments_to_save) >= governor.flush_every:
+                    with stage("db_write"):
+                        session.add_all(segments_to_save)
+                        session.commit()
+                    segments_to_save.clear()
+                    INGEST_QUEUE.set(0, queue="segments", **labels)
+
+                # Update progress in DB periodically (every 5 segments)
+                if segment_count // 5 > indexed_before // 5:
+                    progress = min(100.0, sample_time / duration * 100.0) if duration > 0 else None
+                    if progress is not None:
+                        video.processing_progress = progress / 100.0
+                        with stage("db_write"):
+                            session.add(video)
+                            session.commit()
+                    elapsed = max(time.perf_counter() - job_start, 1e-9)
+                    INGEST_FPS.set((current_frame + 1) / elapsed, **labels)
+                    INGEST_REALTIME.set(sample_time / elapsed, **labels)
+                    log.info("progress", f"Processing '{video.title}'",
+                             progress=f"{progress:.1f}%" if progress is not None else "unknown", segments=segment_count, fps=f"{(current_frame + 1) / elapsed:.1f}",
+                             rss_mb=round(probe.rss / 2**20))
             
+            job_start = time.perf_counter()
+            frames = iter(frame_source)
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                decode_start = time.perf_counter()
+                frame = next(frames, None)
+                if frame is None:
                     break
+                INGEST_STAGE_SECONDS.observe(time.perf_counter() - decode_start, stage="decode")
+                INGEST_FRAMES.inc()
+
+                if cache_writer:
+                    with stage("resize"):
+                        cache_writer.add(current_frame, frame)
                 
                 # Always add frame to buffer for football model
-                frame_buffer.append(frame.copy())
-                # Keep only last 16 frames
-                if len(frame_buffer) > 16:
-                    frame_buffer.pop(0)
+                frame_buffer.append(frame)
                 
-                # Check interval (every 0.5 seconds)
-                if current_frame % step_frames == 0:
+                # Check interval (every 0.5 seconds, or audio-driven)
+                if current_frame >= next_sample_frame:
                     current_time = current_frame / fps
-                    
-                    # LOGGING
-                    print(f"Processed {int(current_time)}s... ({(current_time/duration)*100:.1f}%)")
+                    governor.update()
+                    if audio_track:
+                        next_sample_frame = current_frame + max(1, int(round(fps * audio_track.sample_interval(current_time))))
+                    else:
+                        next_sample_frame = current_frame + step_frames
                     
                     # VALIDATION: Skip empty or black frames
-                    if frame is None or frame.size == 0:
-                        print(f"  -> Skipped (Empty frame at {current_time}s)")
-                        current_frame += 1
-                        continue
-                        
-                    if np.mean(frame) < 5:  # Stricter black frame detection
-                        print(f"  -> Skipped (Black frame at {current_time}s)")
+                    if frame.size == 0 or np.mean(frame) < 5:  # Stricter black frame detection
+                        INGEST_SAMPLES.inc(outcome="blank")
+                        log.debug("blank", "Skipped blank frame", t=f"{current_time:.1f}")
                         current_frame += 1
                         continue
 
                     # STEP A: YOLO DETECTION (for metadata, not gatekeeper)
-                    # Downscale for YOLO speed
-                    small_frame = cv2.resize(frame, (640, 640))
-                    yolo = get_yolo_tracker()
-                    if not yolo:
-                        player_count = 0
-                    else:
-                        player_count = yolo.count_players(small_frame)
+                    # Batched and letterboxed; boxes go to the per-video detection table
+                    if detection_builder is not None:
+                        yolo_frames.append(frame)
+                        yolo_times.append(current_time)
+                        if len(yolo_frames) >= governor.batch_size:
+                            flush_detections(yolo, detection_builder, yolo_frames, yolo_times)
+                        INGEST_QUEUE.set(len(yolo_frames), queue="yolo", **labels)
                     
                     # STEP B: HYBRID EMBEDDINGS (Football Model + CLIP)
-                    # Process ALL frames, don't skip based on YOLO
-                    embedding = None
-                    action_class = "unknown"
-                    
-                    print(f"[DEBUG] Frame {current_frame} at {current_time:.1f}s - Buffer size: {len(frame_buffer)}")
-                    
-                    # Try football model first (if available and we have enough frames)
-                    if football_model and len(frame_buffer) >= 16:
-                        print(f"[DEBUG] Trying football model...")
-                        try:
-                            # Get action embedding from 16-frame clip
-                            embedding = football_model.get_action_embedding(frame_buffer[-16:])
-                            print(f"[DEBUG] Football model returned: {type(embedding)}, length: {len(embedding) if embedding else 'None'}")
-                            
-                            # Also classify the action for metadata
-                            action_scores = football_model.classify_action(frame_buffer[-16:])
-                            if action_scores:
-                                action_class = max(action_scores, key=action_scores.get)
-                                print(f"  -> Action detected: {action_class} ({action_scores[action_class]:.2f})")
-                        except Exception as e:
-                            print(f"  -> Football model error: {e}, falling back to CLIP")
-                            import traceback
-                            traceback.print_exc()
-                            embedding = None
-                    else:
-                        if not football_model:
-                            print(f"[DEBUG] Football model not available")
-                        else:
-                            print(f"[DEBUG] Not enough frames in buffer ({len(frame_buffer)} < 16)")
-                    
-                    # Fallback to CLIP if football model failed or unavailable
-                    if embedding is None:
-                        print(f"[DEBUG] Trying CLIP fallback...")
-                        clip = get_clip_engine()
-                        if clip:
-                            embedding = clip.embed_frame(frame)
-                            print(f"[DEBUG] CLIP returned: {type(embedding)}, length: {len(embedding) if embedding else 'None'}")
-                            action_class = "clip_fallback"
-                        else:
-                            print(f"[DEBUG] CLIP not available!")
-                    
-                    if embedding:
-                        # Create 15-second segment centered on this frame
-                        # Larger context window for better event capture
-                        segment_start = max(0.0, current_time - 7.5)
-                        segment_end = current_time + 7.5
-                        
-                        print(f"[DEBUG] Creating segment: {segment_start:.1f}s-{segment_end:.1f}s")
-                        segments_to_save.append(VideoSegment(
-                            video_id=video.id,
-                            start_time=segment_start,
-                            end_time=segment_end,
-                            embedding=embedding,
-                            text_description=action_class  # Store action class for debugging
-                        ))
-                        print(f"  -> Indexed (Players: {player_count}, Action: {action_class}) - Total segments: {len(segments_to_save)}")
-                    else:
-                        print(f"  -> Skipped (No embedding generated)")
-                        
-                    # Update progress in DB periodically
-                    if len(segments_to_save) % 5 == 0 and len(segments_to_save) > 0:
-                        progress = (current_time / duration) * 100.0
-                        video.processing_progress = progress / 100.0
-                        session.add(video)
-                        session.commit()
-                        print(f"[DEBUG] Progress updated: {progress:.1f}%")
+                    # Process ALL frames, don't skip based on YOLO. Samples are embedded in batches of
+                    # governor.embed_batch_size, so the memory budget bounds the clips held for VideoMAE.
+                    # Quiet stretches (per audio track) go straight to CLIP
+                    heavy_allowed = audio_track is None or audio_track.use_heavy_model(current_time)
+                    action_clip = None
+                    if football_model and heavy_allowed and len(frame_buffer) == frame_buffer.maxlen:
+                        action_clip = _action_clip(frame_buffer)
+                    pending_samples.append((current_time, frame, action_clip))
+                    INGEST_QUEUE.set(len(pending_samples), queue="embed", **labels)
+                    if len(pending_samples) >= governor.embed_batch_size:
+                        flush_samples()
 
                 current_frame += 1
                 
-            cap.release()
+            flush_samples()
+            if source is not None:
+                source.close()
+            if detection_builder is not None:
+                flush_detections(yolo, detection_builder, yolo_frames, yolo_times)
+                table = detection_builder.build()
+                table.save(video.id)
+                build_track_index(video.id, table)
+                logger.info(f"Detection table and track index written ({table.num_detections} boxes in {len(table)} frames)")
+            if cache_writer:
+                cache_writer.close()
+                logger.info(f"Frame cache written ({len(cache_writer.timestamps)} frames)")
 
             # Batch save segments
-            print(f"Saving {len(segments_to_save)} segments to DB...")
-            if len(segments_to_save) == 0:
-                print("WARNING: No segments were created during processing!")
+            if segment_count == 0:
+                logger.warning("No segments were created during processing!")
             
             try:
-                for i, seg in enumerate(segments_to_save):
-                    session.add(seg)
-                    if i < 3:  # Log first 3 segments for debugging
-                        print(f"  Segment {i}: {seg.start_time:.1f}s-{seg.end_time:.1f}s, action: {seg.text_description}")
-                
-                session.commit()
-                print(f"Successfully saved {len(segments_to_save)} segments")
+                with stage("db_write"):
+                    session.add_all(segments_to_save)
+                    segments_to_save.clear()
+                    
+                    # Full index replaces the keyframe quick index atomically
+                    replace_preliminary_segments(session, video)
+                    session.commit()
+                logger.info(f"Saved {segment_count} segments")
             except Exception as save_error:
-                print(f"ERROR saving segments: {save_error}")
-                import traceback
-                traceback.print_exc()
+                logger.exception(f"Saving segments failed: {save_error}")
                 raise
             
             # Finished
             video.processed = True
             video.processing_progress = 1.0  # Fixed: should be 1.0 not 100.0
+            # Reassigned (not mutated) so the JSON column is marked dirty
+            video.metadata_info = {**(video.metadata_info or {}), "ingest_memory": probe.stop()}
             session.add(video)
             session.commit()
-            print(f"Finished processing video: {video.title}")
+            elapsed = max(time.perf_counter() - job_start, 1e-9)
+            INGEST_VIDEOS.inc(status="done")
+            logger.info(f"Finished processing video: {video.title} "
+                        f"frames={current_frame} seconds={elapsed:.1f} fps={current_frame / elapsed:.1f} "
+                        f"realtime_factor={current_frame / fps / elapsed:.2f}")
             
-        except Exception as e:
-            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-            print(f"ERROR PROCESSING VIDEO {video_id}")
-            import traceback
-            traceback.print_exc()
-            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-            video.processing_progress = -1.0 # Error state
-            session.add(video)
+        except Exception:
+            logger.exception(f"Error processing video {video_id}")
+            INGEST_VIDEOS.inc(status="failed")
+            if cache_writer:
+                cache_writer.abort()
+            if source is not None:
+                source.close()
+            session.rollback()
+            # By id: the video may have been deleted mid-ingest, leaving `video` unloadable
+            discard_staged_segments(session, video_id)
+            video = session.get(Video, video_id)
+            if video is not None:
+                video.processing_progress = -1.0 # Error state
+                session.add(video)
             session.commit()
+        finally:
+            probe.stop()
+            governor.close()
+            for name in held_models:
+                registry.release(name)
+            INGEST_ACTIVE.dec()
+            for gauge in (INGEST_FPS, INGEST_REALTIME):
+                gauge.remove(**labels)
+            for queue in ("yolo", "embed", "segments"):
+                INGEST_QUEUE.remove(queue=queue, **labels)
@@ -0,0 +1,91 @@
+"""
+Analysis Proxy
+Transcodes uploads to a low-resolution, short-GOP rendition stored next to the
+original. Every analysis stage decodes the proxy; playback keeps the original.
+"""
+import os
+import shutil
+import subprocess
+import logging
+from typing import Optional
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+PROXY_ENABLED = os.environ.get("TACSEARCH_PROXY", "1") == "1"
+PROXY_HEIGHT = int(os.environ.get("TACSEARCH_PROXY_HEIGHT", "360"))
+PROXY_GOP = int(os.environ.get("TACSEARCH_PROXY_GOP", "12"))  # Short GOP keeps seeks cheap
+PROXY_MIN_SOURCE_HEIGHT = 540  # Sources at or below this are analysed directly
+PROXY_SUFFIX = ".proxy.mp4"
+FFMPEG_BIN = os.environ.get("TACSEARCH_FFMPEG", "ffmpeg")
+
+
+def proxy_path_for(video_path: str) -> str:
+    """Location of the proxy for an uploaded file (same directory, same stem)."""
+    return os.path.splitext(video_path)[0] + PROXY_SUFFIX
+
+
+def resolve_analysis_path(video_path: str) -> str:
+    """Returns the proxy for `video_path` if one was generated, else the original."""
+    if video_path.endswith(PROXY_SUFFIX):
+        return video_path
+    proxy = proxy_path_for(video_path)
+    return proxy if os.path.exists(proxy) else video_path
+
+
+def _source_height(video_path: str) -> int:
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+
+
+def create_proxy(video_path: str, height: int = PROXY_HEIGHT, gop: int = PROXY_GOP) -> Optional[str]:
+    """
+    Transcodes `video_path` to an analysis proxy with ffmpeg.
+    The frame rate is kept so frame indices and timestamps match the original.
+
+    Returns:
+        Path of the proxy, or None when no proxy is needed or ffmpeg is unavailable
+    """
+    if not PROXY_ENABLED:
+        return None
+    if shutil.which(FFMPEG_BIN) is None:
+        logger.warning("ffmpeg not found, analysing original video")
+        return None
+
+    source_height = _source_height(video_path)
+    if source_height and source_height <= PROXY_MIN_SOURCE_HEIGHT:
+        return None
+
+    output = proxy_path_for(video_path)
+    tmp_output = output + ".part.mp4"
+    cmd = [
+        FFMPEG_BIN, "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "26",
+        "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        "-pix_fmt", "yuv420p",
+        "-an",
+        tmp_output,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Proxy transcode failed: {e.stderr.decode(errors='ignore')[-500:]}")
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        return None
+
+    os.replace(tmp_output, output)
+    return output
+
+
+def remove_proxy(video_path: str):
+    proxy = proxy_path_for(video_path)
+    if os.path.exists(proxy):
+        os.remove(proxy)
@@ -0,0 +1,131 @@
+"""
+Quick Index
+First ingest pass: decodes only keyframes, embeds them with CLIP in batches and
+publishes a coarse "preliminary" index so a new upload is searchable within
+seconds. The full VideoMAE pass in process_video_task replaces it.
+"""
+import os
+import logging
+from typing import List
+
+from sqlmodel import Session
+from sqlalchemy import delete, update
+
+from ..database import engine
+from ..models import Video, VideoSegment
+from .decoders import open_frame_source
+from .frame_cache import downscale_frame
+from .scheduler import scheduler
+from .index_state import bump_index_version
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+QUICK_INDEX_ENABLED = os.environ.get("TACSEARCH_QUICK_INDEX", "1") == "1"
+QUICK_INDEX_BATCH = 32        # Keyframes per CLIP batch (and per publish)
+QUICK_INDEX_MIN_GAP = 1.0     # Seconds; thins out all-intra or very short GOP sources
+SEGMENT_HALF_WINDOW = 7.5     # Same 15-second segments as the full pass
+
+TIER_NONE = "none"
+TIER_PRELIMINARY = "preliminary"
+TIER_FULL = "full"
+TIER_STAGING = "staging"  # Full-pass segments written during ingest, not searchable yet
+
+
+def _publish(session: Session, video: Video, timestamps: List[float], embeddings: List[List[float]]):
+    for t, embedding in zip(timestamps, embeddings):
+        session.add(VideoSegment(
+            video_id=video.id,
+            start_time=max(0.0, t - SEGMENT_HALF_WINDOW),
+            end_time=t + SEGMENT_HALF_WINDOW,
+            embedding=embedding,
+            text_description="keyframe",
+            tier=TIER_PRELIMINARY,
+        ))
+    if video.index_tier == TIER_NONE:
+        video.index_tier = TIER_PRELIMINARY
+        session.add(video)
+    bump_index_version(session, video.id)
+    session.commit()
+
+
+def build_quick_index(video_id: int, decoder: str = "auto") -> int:
+    """
+    Builds and publishes the preliminary keyframe index for a video.
+
+    Returns:
+        Number of preliminary segments published
+    """
+    from .processor import get_clip_engine
+
+    with Session(engine) as session:
+        video = session.get(Video, video_id)
+        if not video or video.index_tier == TIER_FULL or not os.path.exists(video.filepath):
+            return 0
+
+        clip = get_clip_engine()
+        if not clip:
+            logger.warning("CLIP not available, skipping quick index")
+            return 0
+
+        # Start clean if a previous quick pass was interrupted
+        session.execute(delete(VideoSegment).where(
+            VideoSegment.video_id == video_id, VideoSegment.tier == TIER_PRELIMINARY
+        ))
+        bump_index_version(session, video_id)
+        session.commit()
+
+        published = 0
+        batch_frames, batch_times = [], []
+        last_time = -QUICK_INDEX_MIN_GAP
+
+        with open_frame_source(video.filepath, backend=decoder, keyframes_only=True) as source:
+            if source.backend == "opencv":
+                # No keyframe skipping in OpenCV: sample every 2 seconds instead
+                source.stride = max(source.stride, int(round(source.fps * 2)))
+            for decoded in source.frames():
+                if decoded.timestamp - last_time < QUICK_INDEX_MIN_GAP:
+                    continue
+                last_time = decoded.timestamp
+                batch_frames.append(downscale_frame(decoded.image, 224))
+                batch_times.append(decoded.timestamp)
+
+                if len(batch_frames) >= QUICK_INDEX_BATCH:
+                    with scheduler.batch():
+                        embeddings = clip.embed_frames(batch_frames)
+                    _publish(session, video, batch_times, embeddings)
+                    published += len(batch_frames)
+                    batch_frames, batch_times = [], []
+
+        if batch_frames:
+            with scheduler.batch():
+                embeddings = clip.embed_frames(batch_frames)
+            _publish(session, video, batch_times, embeddings)
+            published += len(batch_frames)
+
+        logger.info(f"Quick index published for '{video.title}': {published} keyframes")
+        return published
+
+
+def replace_preliminary_segments(session: Session, video: Video):
+    """
+    Drops the preliminary segments of a video - and the full ones of an earlier
+    pass when it is re-analysed - promotes the staged full-pass segments and
+    marks the full index live, all in one transaction.
+    """
+    session.execute(delete(VideoSegment).where(
+        VideoSegment.video_id == video.id, VideoSegment.tier.in_((TIER_PRELIMINARY, TIER_FULL))
+    ))
+    session.execute(update(VideoSegment).where(
+        VideoSegment.video_id == video.id, VideoSegment.tier == TIER_STAGING
+    ).values(tier=TIER_FULL))
+    video.index_tier = TIER_FULL
+    session.add(video)
+    bump_index_version(session, video.id)
+
+
+def discard_staged_segments(session: Session, video_id: int):
+    """Removes the staged segments of a full pass that did not finish."""
+    session.execute(delete(VideoSegment).where(
+        VideoSegment.video_id == video_id, VideoSegment.tier == TIER_STAGING
+    ))
@@ -0,0 +1,291 @@
+"""
+Model Registry
+Single place where CLIP, VideoMAE and YOLO are loaded. Each model has its own
+lock so concurrent jobs load it exactly once, resident memory is tracked per
+model, and models nobody has used for a while are unloaded (least recently used first).
+"""
+import gc
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+MODEL_IDLE_SECONDS = float(os.environ.get("TACSEARCH_MODEL_IDLE_SECONDS", "1800"))  # 0 = never unload
+MODEL_MEMORY_LIMIT_MB = float(os.environ.get("TACSEARCH_MODEL_MEMORY_LIMIT_MB", "0"))  # 0 = no limit
+JANITOR_INTERVAL = 60.0
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (psutil if installed, else /proc)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _parameter_bytes(instance) -> int:
+    """Bytes held by torch parameters/buffers reachable from the wrapper's attributes."""
+    total = 0
+    seen = set()
+    for value in vars(instance).values():
+        modules = [value]
+        inner = getattr(value, "model", None)  # Ultralytics YOLO wraps the nn.Module
+        if inner is not None:
+            modules.append(inner)
+        for module in modules:
+            if id(module) in seen or not hasattr(module, "parameters") or not hasattr(module, "buffers"):
+                continue
+            seen.add(id(module))
+            try:
+                for tensor in list(module.parameters()) + list(module.buffers()):
+                    total += tensor.numel() * tensor.element_size()
+            except Exception:
+                continue
+    return total
+
+
+class ModelEntry:
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.instance = None
+        self.loaded_at: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.load_seconds = 0.0
+        self.rss_delta_bytes = 0
+        self.parameter_bytes = 0
+        self.in_use = 0
+        self.loads = 0
+        self.failures = 0
+
+    def stats(self) -> Dict:
+        now = time.time()
+        return {
+            "name": self.name,
+            "loaded": self.instance is not None,
+            "in_use": self.in_use,
+            "loads": self.loads,
+            "failures": self.failures,
+            "load_seconds": round(self.load_seconds, 2),
+            "rss_delta_mb": round(self.rss_delta_bytes / 2**20, 1),
+            "parameter_mb": round(self.parameter_bytes / 2**20, 1),
+            "idle_seconds": round(now - self.last_used, 1) if self.last_used else None,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, idle_seconds: float = MODEL_IDLE_SECONDS, memory_limit_mb: float = MODEL_MEMORY_LIMIT_MB):
+        self.idle_seconds = idle_seconds
+        self.memory_limit_bytes = memory_limit_mb * 2**20
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()  # Guards the entry table, never held while loading
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """`loader()` returns the model instance, or None / raises if it cannot be loaded."""
+        with self._lock:
+            self._entries[name] = ModelEntry(name, loader)
+
+    def _entry(self, name: str) -> ModelEntry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown model '{name}'")
+
+    def get(self, name: str):
+        """Returns the loaded model, loading it once under its own lock. None if loading fails."""
+        entry = self._entry(name)
+        instance = entry.instance
+        if instance is None:
+            loaded = False
+            with entry.lock:
+                if entry.instance is None:
+                    loaded = self._load(entry)
+                instance = entry.instance
+            if loaded:
+                # Outside the entry lock: unloading others takes their locks
+                self._enforce_memory_limit(keep=name)
+        entry.last_used = time.time()
+        return instance
+
+    def _load(self, entry: ModelEntry) -> bool:
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            instance = entry.loader()
+        except Exception as e:
+            logger.error(f"Failed to load {entry.name}: {e}")
+            instance = None
+        if instance is None:
+            entry.failures += 1
+            return False
+        entry.load_seconds = time.perf_counter() - start
+        entry.rss_delta_bytes = max(0, current_rss_bytes() - rss_before)
+        entry.parameter_bytes = _parameter_bytes(instance)
+        entry.instance = instance
+        entry.loaded_at = time.time()
+        entry.loads += 1
+        logger.info(f"[Registry] Loaded {entry.name} in {entry.load_seconds:.1f}s "
+                    f"(+{entry.rss_delta_bytes / 2**20:.0f} MB RSS)")
+        return True
+
+    def acquire(self, name: str):
+        """Like get(), but pins the model so it is not unloaded until release()."""
+        entry = self._entry(name)
+        with self._lock:
+            entry.in_use += 1
+        instance = self.get(name)
+        if instance is None:
+            self.release(name)
+        return instance
+
+    def release(self, name: str):
+        entry = self._entry(name)
+        with self._lock:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = time.time()
+
+    @contextmanager
+    def hold(self, name: str):
+        instance = self.acquire(name)
+        try:
+            yield instance
+        finally:
+            if instance is not None:
+                self.release(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entry(name).instance is not None
+
+    def unload(self, name: str) -> bool:
+        """Drops a model unless it is pinned. Returns whether it was unloaded."""
+        entry = self._entry(name)
+        with entry.lock:
+            with self._lock:
+                if entry.instance is None or entry.in_use:
+                    return False
+                entry.instance = None
+                entry.loaded_at = None
+        gc.collect()
+        try:
+            import sys
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        logger.info(f"[Registry] Unloaded {name}")
+        return True
+
+    def _unpinned_lru(self, exclude: Optional[str] = None):
+        with self._lock:
+            candidates = [e for e in self._entries.values()
+                          if e.instance is not None and not e.in_use and e.name != exclude]
+        return sorted(candidates, key=lambda e: e.last_used or 0.0)
+
+    def unload_idle(self, max_idle: Optional[float] = None) -> int:
+        """Unloads models idle for longer than `max_idle` seconds, least recently used first."""
+        max_idle = self.idle_seconds if max_idle is None else max_idle
+        if max_idle <= 0:
+            return 0
+        now = time.time()
+        unloaded = 0
+        for entry in self._unpinned_lru():
+            if entry.last_used is not None and now - entry.last_used >= max_idle:
+                unloaded += self.unload(entry.name)
+        return unloaded
+
+    def resident_bytes(self) -> int:
+        return sum(e.rss_delta_bytes for e in self._entries.values() if e.instance is not None)
+
+    def _enforce_memory_limit(self, keep: str):
+        if not self.memory_limit_bytes:
+            return
+        for entry in self._unpinned_lru(exclude=keep):
+            if self.resident_bytes() <= self.memory_limit_bytes:
+                break
+            self.unload(entry.name)
+
+    def start_janitor(self, interval: float = JANITOR_INTERVAL):
+        """Background thread that periodically unloads idle models."""
+        if self._janitor is not None or self.idle_seconds <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.unload_idle()
+                except Exception as e:
+                    logger.error(f"[Registry] Idle unload failed: {e}")
+
+        self._janitor = threading.Thread(target=run, name="model-janitor", daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = [e.stats() for e in self._entries.values()]
+        return {
+            "process_rss_mb": round(current_rss_bytes() / 2**20, 1),
+            "models_resident_mb": round(self.resident_bytes() / 2**20, 1),
+            "idle_unload_seconds": self.idle_seconds,
+            "memory_limit_mb": self.memory_limit_bytes / 2**20 or None,
+            "models": entries,
+        }
+
+
+# --- Loaders (imports stay inside so importing the registry is cheap) ---
+
+def _remote(name: str):
+    """Client for the shared inference server when one is configured, else None."""
+    from .inference_client import remote_model
+    return remote_model(name)
+
+
+def _load_clip():
+    remote = _remote("clip")
+    if remote is not None:
+        return remote
+    from .clip_search import CLIPSearchEngine
+    return CLIPSearchEngine()
+
+
+def _load_videomae():
+    remote = _remote("videomae")
+    if remote is not None:
+        return remote
+    from .football_model import FootballActionModel
+    model = FootballActionModel()
+    if not model.is_loaded():
+        logger.warning("FootballActionModel failed to load, returning None")
+        return None
+    return model
+
+
+def _load_yolo():
+    remote = _remote("yolo")
+    if remote is not None:
+        return remote
+    from .yolo_tracker import YOLOTracker
+    return YOLOTracker()
+
+
+registry = ModelRegistry()
+registry.register("clip", _load_clip)
+registry.register("videomae", _load_videomae)
+registry.register("yolo", _load_yolo)
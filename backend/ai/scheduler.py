@@ -0,0 +1,119 @@
+"""
+Compute Scheduler
+Splits the CPU between interactive work (search query encoding) and batch work
+(ingest, detections). Each kind runs with its own torch thread budget and,
+optionally, its own set of cores. Batch jobs call `batch()` around every model
+call; while a search is encoding they wait at that boundary, so queries never
+queue behind a full ingest batch.
+
+torch.set_num_threads and sched_setaffinity act on the calling thread (and the
+OpenMP team it starts), which is why both are applied per thread on entry.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _available_cpus() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # Not Linux
+        return list(range(os.cpu_count() or 1))
+
+
+_CPUS = _available_cpus()
+
+# --- CONFIGURATION ---
+INTERACTIVE_THREADS = int(os.environ.get("TACSEARCH_INTERACTIVE_THREADS", str(max(1, len(_CPUS) // 4))))
+BATCH_THREADS = int(os.environ.get("TACSEARCH_BATCH_THREADS", str(max(1, len(_CPUS) - INTERACTIVE_THREADS))))
+CPU_AFFINITY = os.environ.get("TACSEARCH_CPU_AFFINITY", "0") == "1"  # Pin each kind to its own cores
+MAX_PREEMPT_WAIT = float(os.environ.get("TACSEARCH_MAX_PREEMPT_WAIT", "2.0"))  # Batch never waits longer per boundary
+
+INTERACTIVE, BATCH = "interactive", "batch"
+
+
+class ComputeScheduler:
+    def __init__(self, interactive_threads: int = INTERACTIVE_THREADS, batch_threads: int = BATCH_THREADS,
+                 affinity: bool = CPU_AFFINITY, max_preempt_wait: float = MAX_PREEMPT_WAIT):
+        self.threads = {INTERACTIVE: interactive_threads, BATCH: batch_threads}
+        # Interactive work gets the first cores, batch the rest (all cores if nothing is left)
+        self.cpus: Dict[str, Optional[List[int]]] = {INTERACTIVE: None, BATCH: None}
+        if affinity and len(_CPUS) > 1:
+            split = min(interactive_threads, len(_CPUS) - 1)
+            self.cpus = {INTERACTIVE: _CPUS[:split], BATCH: _CPUS[split:]}
+        self.max_preempt_wait = max_preempt_wait
+        self._cond = threading.Condition()
+        self._interactive_active = 0
+        self._local = threading.local()
+        self.preemptions = 0
+        self.preempted_seconds = 0.0
+        self.interactive_calls = 0
+        self.batch_calls = 0
+
+    def _apply(self, kind: str):
+        """Sets the calling thread's torch threads/affinity for `kind` if it changed."""
+        if getattr(self._local, "kind", None) == kind:
+            return
+        self._local.kind = kind
+        torch = sys.modules.get("torch")  # Only touch torch once a model has imported it
+        if torch is not None:
+            torch.set_num_threads(self.threads[kind])
+        if self.cpus[kind]:
+            try:
+                os.sched_setaffinity(0, self.cpus[kind])
+            except (AttributeError, OSError) as e:
+                logger.warning(f"[Scheduler] Could not set CPU affinity: {e}")
+
+    @contextmanager
+    def interactive(self):
+        """Query-side inference. Batch work pauses at its next boundary until this exits."""
+        with self._cond:
+            self._interactive_active += 1
+            self.interactive_calls += 1
+        try:
+            self._apply(INTERACTIVE)
+            yield
+        finally:
+            with self._cond:
+                self._interactive_active -= 1
+                if not self._interactive_active:
+                    self._cond.notify_all()
+
+    def checkpoint(self):
+        """Batch boundary: waits while interactive work is running (at most max_preempt_wait)."""
+        with self._cond:
+            if not self._interactive_active:
+                return
+            start = time.perf_counter()
+            self._cond.wait_for(lambda: not self._interactive_active, timeout=self.max_preempt_wait)
+            self.preemptions += 1
+            self.preempted_seconds += time.perf_counter() - start
+
+    @contextmanager
+    def batch(self):
+        """One unit of background inference (a batch of frames, one clip)."""
+        self.checkpoint()
+        self._apply(BATCH)
+        with self._cond:
+            self.batch_calls += 1
+        yield
+
+    def stats(self) -> Dict:
+        return {
+            "threads": self.threads,
+            "cpus": self.cpus,
+            "interactive_active": self._interactive_active,
+            "interactive_calls": self.interactive_calls,
+            "batch_calls": self.batch_calls,
+            "preemptions": self.preemptions,
+            "preempted_seconds": round(self.preempted_seconds, 3),
+        }
+
+
+scheduler = ComputeScheduler()
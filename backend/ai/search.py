@@ -1,8 +1,13 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, NamedTuple, Optional, Tuple
+import os
+import base64
 import math
 import json
 import logging
 import random
+import time
+import threading
+from contextlib import contextmanager
 from sqlmodel import Session, select
 import numpy as np
 
@@ -10,11 +15,27 @@ from ..database import engine
 from ..models import VideoSegment, Video
 from .processor import get_clip_engine
 from .smart_clipper import isolate_peaks
+from .audio import AudioActivity
+from .quick_index import TIER_STAGING
+from .warmup import wait_until_ready, ModelNotReadyError, FAILED
+from .scheduler import scheduler
+from .cache import LRUCache
+from .index_state import index_version
+from .metrics import SEARCH_STAGE_SECONDS, SEARCH_SECONDS
 
 # --- CONFIGURATION ---
-DEMO_MODE = True  # SAFETY NET: If True, returns mock data when search fails
+DEMO_MODE = True  # SAFETY NET: If True, returns mock data when the index has no matches
 ADAPTIVE_THRESHOLD = True  # SAFETY NET: Returns top 3 matches even if score is low
 LOG_VERBOSE = True  # DEBUG: Prints raw scores to terminal
+AUDIO_RERANK_WEIGHT = 0.03  # Boost for segments with crowd/whistle activity (0 disables)
+RESULT_CACHE_SIZE = int(os.environ.get("TACSEARCH_RESULT_CACHE_SIZE", "512"))  # 0 disables
+PARTITION_CACHE_SIZE = int(os.environ.get("TACSEARCH_PARTITION_CACHE_SIZE", "256"))  # Videos kept decoded
+SEARCH_MAX_RESULTS = 500  # Deduplicated results ranked (and pageable) per query
+
+_prompt_cache = LRUCache("prompt_embedding", maxsize=1024)  # (model, prompt) -> text embedding
+# (normalized query, threshold, use_audio, filters, index version) -> Ranked; a new version makes old keys unreachable
+_result_cache = LRUCache("search_result", maxsize=RESULT_CACHE_SIZE)
+_partition_cache = LRUCache("video_partition", maxsize=PARTITION_CACHE_SIZE)  # (video_id, segments_version) -> VideoPartition
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -134,253 +155,738 @@ def _cosine_similarity(a: List[float], b: List[float]) -> float:
         return 0.0
 
 
-def _smooth_scores(scores: List[float], window_size: int = 5) -> List[float]:
-    """Applies moving average smoothing with larger window for better temporal context."""
-    if not scores: return []
-    
-    smoothed = []
+def _smooth_scores(scores: np.ndarray, window_size: int = 5) -> np.ndarray:
+    """
+    Moving average over the last axis with a larger window for better temporal context;
+    windows are truncated (not zero-padded) at the ends.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = scores.shape[-1]
+    if n == 0:
+        return scores
     pad = window_size // 2
-    
-    for i in range(len(scores)):
-        start = max(0, i - pad)
-        end = min(len(scores), i + pad + 1)
-        window = scores[start:end]
-        if not window:
-            smoothed.append(0.0)
-        else:
-            smoothed.append(sum(window) / len(window))
-            
-    return smoothed
+    cumsum = np.concatenate([np.zeros(scores.shape[:-1] + (1,)), np.cumsum(scores, axis=-1)], axis=-1)
+    hi = np.minimum(np.arange(n) + pad + 1, n)
+    lo = np.maximum(np.arange(n) - pad, 0)
+    return (cumsum[..., hi] - cumsum[..., lo]) / (hi - lo)
 
 
-def search_video(query_text: str, threshold: float = 0.22):
+class SearchTrace:
     """
-    Advanced Semantic Search with Contrastive Learning.
-    Uses negative prompts to distinguish similar events (goal vs shot).
+    Per-request timings (summed per stage), candidate counts, threshold decisions and
+    cache hits. Always fed into the search latency histograms; returned to the client
+    with `explain=true`.
     """
-    clip_engine = get_clip_engine()
-    
-    if not clip_engine and DEMO_MODE:
-        print("[WARNING] CLIP Engine not loaded! Falling back to DEMO MOCK DATA.")
-        return _get_mock_results(query_text)
-    
-    if not clip_engine:
-        print("[ERROR] CLIP Engine failed to load.")
-        return []
 
-    print(f"\n[INFO] --- Searching for: '{query_text}' ---")
-    
-    # Query-specific thresholds (optimized for recall)
-    QUERY_THRESHOLDS = {
-        "goal": 0.24,      # Lowered for better recall
-        "shot": 0.23,      # Medium threshold
-        "offside": 0.28,   # High: offside is rare
-        "pass": 0.19,      # Lower: passes are common
-        "foul": 0.25,      # Medium-high
-        "save": 0.24,      # Medium
-        "corner": 0.22,    # Medium-low
-        "tackle": 0.23,    # Medium
-    }
-    
-    # Negative prompts to SUBTRACT from similarity (reduced set for better recall)
-    NEGATIVE_PROMPTS = {
-        "goal": [
-            "goalkeeper saving ball",
-            "ball missing goal",
-            "shot blocked",
-        ],
-        "shot": [
-            "ball in net",
-            "goal celebration",
-        ],
-        "save": [
-            "ball in net",
-            "goal scored",
-        ],
-    }
-    
-    # Adjust threshold based on query
-    normalized_q = query_text.lower().strip()
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.decisions: Dict[str, object] = {}
+        self.cache: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int):
+        self.counts[name] = int(value)
+
+    def finish(self) -> Dict:
+        total = time.perf_counter() - self.started
+        for name, seconds in self.stages.items():
+            SEARCH_STAGE_SECONDS.observe(seconds, stage=name)
+        SEARCH_SECONDS.observe(total)
+        return {
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "candidates": self.counts,
+            "threshold": self.decisions,
+            "cache": self.cache,
+        }
+
+
+# Query-specific thresholds (optimized for recall)
+QUERY_THRESHOLDS = {
+    "goal": 0.24,      # Lowered for better recall
+    "shot": 0.23,      # Medium threshold
+    "offside": 0.28,   # High: offside is rare
+    "pass": 0.19,      # Lower: passes are common
+    "foul": 0.25,      # Medium-high
+    "save": 0.24,      # Medium
+    "corner": 0.22,    # Medium-low
+    "tackle": 0.23,    # Medium
+}
+
+# Negative prompts to SUBTRACT from similarity (reduced set for better recall)
+NEGATIVE_PROMPTS = {
+    "goal": [
+        "goalkeeper saving ball",
+        "ball missing goal",
+        "shot blocked",
+    ],
+    "shot": [
+        "ball in net",
+        "goal celebration",
+    ],
+    "save": [
+        "ball in net",
+        "goal scored",
+    ],
+}
+NEGATIVE_WEIGHT = 0.4  # Contrastive formula: reduced penalty for better recall
+MIN_EVENT_DIST = 10.0  # Seconds between results from the same video
+
+
+class SearchFilters(NamedTuple):
+    """Restricts a search before anything is scored; part of the result cache key."""
+    video_ids: Optional[Tuple[int, ...]] = None
+    match_id: Optional[str] = None
+    start: Optional[float] = None  # Seconds into each video
+    end: Optional[float] = None
+
+    def restricts_videos(self) -> bool:
+        return self.video_ids is not None or self.match_id is not None
+
+
+NO_FILTERS = SearchFilters()
+
+
+class CursorError(ValueError):
+    """The pagination cursor is malformed."""
+
+
+class StaleCursorError(CursorError):
+    """The cursor belongs to an index version whose results are no longer cached."""
+
+
+class VideoPartition:
+    """
+    One video's searchable segments as arrays ordered by start time, with the JSON
+    embeddings decoded and L2-normalized once per index version, so searching a
+    video is a matrix product. Embeddings are grouped by dimension: rows that cannot
+    be compared with a CLIP text query (VideoMAE, 768-d) score 0.
+    """
+
+    def __init__(self, video_id: int, rows: List[Tuple]):
+        self.video_id = video_id
+        self.undecodable = 0
+        kept, embeddings = [], []
+        for row in rows:
+            embedding = row[4]
+            if isinstance(embedding, str):
+                try:
+                    embedding = json.loads(embedding)
+                except ValueError:
+                    self.undecodable += 1
+                    continue
+            kept.append(row)
+            embeddings.append(embedding or [])
+        self.ids = np.array([r[0] for r in kept], dtype=np.int64)
+        self.starts = np.array([r[1] for r in kept], dtype=np.float64)
+        self.ends = np.array([r[2] for r in kept], dtype=np.float64)
+        self.preliminary = np.array([r[3] == "preliminary" for r in kept], dtype=bool)
+
+        by_dim: Dict[int, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding:
+                by_dim.setdefault(len(embedding), []).append(i)
+        self.groups: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.spheres: Dict[int, Tuple[np.ndarray, float]] = {}  # dim -> (centroid, radius) of the rows
+        for dim, rows_of_dim in by_dim.items():
+            matrix = _normalize_rows(np.array([embeddings[i] for i in rows_of_dim], dtype=np.float32))
+            self.groups[dim] = (np.array(rows_of_dim, dtype=np.int64), matrix)
+            centroid = matrix.mean(axis=0)
+            self.spheres[dim] = (centroid, float(np.linalg.norm(matrix - centroid, axis=1).max()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def window(self, start: Optional[float], end: Optional[float]) -> Optional[np.ndarray]:
+        """Row indices overlapping [start, end] seconds, None for all rows."""
+        if start is None and end is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.ends >= start
+        if end is not None:
+            mask &= self.starts <= end
+        return np.flatnonzero(mask)
+
+    def similarities(self, vectors: np.ndarray) -> np.ndarray:
+        """(queries, rows) cosine similarities for normalized query rows."""
+        out = np.zeros((len(vectors), len(self)), dtype=np.float32)
+        group = self.groups.get(vectors.shape[1])
+        if group is not None:
+            rows, matrix = group
+            out[:, rows] = vectors @ matrix.T
+        return out
+
+
+    def upper_bound(self, query: np.ndarray, negative: Optional[np.ndarray] = None) -> float:
+        """
+        Cheap bound on any row's contrastive similarity to a normalized query: with the
+        rows inside a sphere (centroid c, radius r), q.x <= q.c + r and n.x >= n.c - r.
+        Smoothing (an average) cannot exceed it.
+        """
+        sphere = self.spheres.get(len(query))
+        if sphere is None:
+            return 0.0  # Nothing comparable: every row scores 0
+        centroid, radius = sphere
+        bound = float(query @ centroid) + radius
+        if negative is not None:
+            bound -= NEGATIVE_WEIGHT * (float(negative @ centroid) - radius)
+        return max(bound, 0.0)
+
+
+class Ranked(NamedTuple):
+    """A query's full deduplicated ranking; pages are slices of it."""
+    matches: List[Tuple]  # (score, video_id, segment_id, start, end, preliminary), best first
+    low_confidence: bool
+    mock: Optional[List[Dict]] = None  # DEMO_MODE results when nothing is indexed
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def normalize_query(query_text: str) -> str:
+    """Case- and whitespace-insensitive form of a query; the result cache is keyed by it."""
+    return " ".join(query_text.lower().split())
+
+
+def _query_threshold(normalized_q: str, threshold: float, trace: SearchTrace) -> float:
+    """Adjust threshold based on query."""
+    trace.decisions["requested"] = threshold
     for key, val in QUERY_THRESHOLDS.items():
         if key in normalized_q:
             threshold = val
-            print(f"[INFO] Using stricter threshold: {threshold} for '{key}'")
+            trace.decisions["query_specific"] = {"key": key, "value": val}
+            logger.info(f"Using stricter threshold: {threshold} for '{key}'")
             break
+    trace.decisions["applied"] = threshold
+    return threshold
 
-    # 1. Query Expansion & Embedding
-    expanded_queries = _expand_query(query_text)
-    print(f"[INFO] Expanded Query: {expanded_queries}")
-
-    # Build positive prompts
-    prompts = []
-    for q in expanded_queries:
-        prompts.append(f"a photo of a football match showing {q}")
-        prompts.append(f"{q}")
-    
-    query_vectors = []
-    for p in prompts:
-        try:
-            vec = clip_engine.get_text_embedding(p)
-            query_vectors.append(vec)
-        except Exception as e:
-            logger.error(f"Failed to embed prompt '{p}': {e}")
-            
-    if not query_vectors:
-        if DEMO_MODE: return _get_mock_results(query_text)
-        return []
-        
-    query_embed = _average_embeddings(query_vectors)
-    
-    # 2. Build NEGATIVE embedding (contrastive)
-    negative_embed = None
-    if normalized_q in NEGATIVE_PROMPTS:
-        neg_prompts = NEGATIVE_PROMPTS[normalized_q]
-        print(f"[INFO] Using negative prompts: {neg_prompts}")
-        
-        neg_vectors = []
-        for neg_p in neg_prompts:
+
+def _encode_prompts(clip_engine, prompts: List[str], trace: SearchTrace) -> Dict[str, List[float]]:
+    """
+    Text embeddings of the prompts that could be encoded. The expanded prompts repeat
+    across searches, so they are cached; the misses go through one batched forward pass.
+    """
+    model = getattr(clip_engine, "model_id", type(clip_engine).__name__)
+    vectors, missing = {}, []
+    for prompt in dict.fromkeys(prompts):
+        vec = _prompt_cache.get((model, prompt), stats=trace.cache)
+        if vec is None:
+            missing.append(prompt)
+        else:
+            vectors[prompt] = vec
+    if not missing:
+        return vectors
+    try:
+        encoded = list(zip(missing, clip_engine.get_text_embeddings(missing)))
+    except Exception as e:
+        logger.error(f"Batched prompt encoding failed, encoding one by one: {e}")
+        encoded = []
+        for p in missing:
             try:
-                vec = clip_engine.get_text_embedding(neg_p)
-                neg_vectors.append(vec)
-            except:
-                pass
-        
+                encoded.append((p, clip_engine.get_text_embedding(p)))
+            except Exception as e:
+                logger.error(f"Failed to embed prompt '{p}': {e}")
+    for prompt, vec in encoded:
+        _prompt_cache.put((model, prompt), vec)
+        vectors[prompt] = vec
+    return vectors
+
+
+def _encode_queries(clip_engine, query_texts: List[str], trace: SearchTrace) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Normalized positive (expanded prompts) and negative (contrastive) query matrices,
+    one row per query; the prompts of all queries are encoded together. Queries
+    without negative prompts get a zero negative row (None when no query has any).
+    """
+    # 1. Query Expansion & Embedding
+    with trace.stage("prompt_expansion"):
+        positives, negatives = [], []
+        for query_text in query_texts:
+            expanded_queries = _expand_query(query_text)
+            logger.info(f"Expanded Query: {expanded_queries}")
+            # Build positive prompts
+            prompts = []
+            for q in expanded_queries:
+                prompts.append(f"a photo of a football match showing {q}")
+                prompts.append(f"{q}")
+            positives.append(prompts)
+            negatives.append(NEGATIVE_PROMPTS.get(query_text.lower().strip(), []))
+    trace.count("prompts", sum(len(prompts) for prompts in positives))
+
+    # Query encoding is interactive: background ingest pauses at its next batch boundary
+    with scheduler.interactive(), trace.stage("text_encoding"):
+        vectors = _encode_prompts(clip_engine, [p for prompts in positives + negatives for p in prompts], trace)
+
+    query_rows, negative_rows, negative_count = [], [], 0
+    for prompts, neg_prompts in zip(positives, negatives):
+        query_vectors = [vectors[p] for p in prompts if p in vectors]
+        if not query_vectors:
+            raise ModelNotReadyError("clip", FAILED, retry_after=30.0)
+        query_rows.append(np.mean(np.asarray(query_vectors, dtype=np.float32), axis=0))
+        # 2. Build NEGATIVE embedding (contrastive)
+        neg_vectors = [vectors[p] for p in neg_prompts if p in vectors]
+        negative_count += len(neg_vectors)
         if neg_vectors:
-            negative_embed = _average_embeddings(neg_vectors)
+            logger.info(f"Using negative prompts: {neg_prompts}")
+            negative_rows.append(np.mean(np.asarray(neg_vectors, dtype=np.float32), axis=0))
+        else:
+            negative_rows.append(None)
+    if negative_count:
+        trace.count("negative_prompts", negative_count)
 
-    # 3. Fetch & Score Segments
-    with Session(engine) as session:
-        segments = session.exec(select(VideoSegment)).all()
-        print(f"[INFO] Scanning {len(segments)} segments...")
-
-        if not segments:
-             if DEMO_MODE: return _get_mock_results(query_text)
-             return []
-
-        # Process by Video ID
-        segments_by_video: Dict[int, List[Dict]] = {}
-        for seg in segments:
-            # Deserialize
-            embedding = []
-            if isinstance(seg.embedding, str):
-                try:
-                    embedding = json.loads(seg.embedding)
-                except: continue
-            else:
-                embedding = seg.embedding
-            
-            segments_by_video.setdefault(seg.video_id, []).append({
-                "segment": seg,
-                "embedding": embedding,
-                "start_time": seg.start_time
-            })
+    queries = _normalize_rows(np.stack(query_rows))
+    if all(row is None for row in negative_rows):
+        return queries, None
+    negative = np.zeros_like(queries)
+    for i, row in enumerate(negative_rows):
+        if row is not None and len(row) == queries.shape[1]:
+            negative[i] = row
+    return queries, _normalize_rows(negative)
 
-        all_matches = []
 
-        for video_id, video_data in segments_by_video.items():
-            video_data.sort(key=lambda x: x["start_time"])
-            
-            embeddings = [x["embedding"] for x in video_data]
-            raw_scores = []
-            
-            # Calculate Similarity with CONTRASTIVE LOGIC
-            for emb in embeddings:
-                pos_score = _cosine_similarity(query_embed, emb)
-                
-                # Subtract negative similarity
-                if negative_embed:
-                    neg_score = _cosine_similarity(negative_embed, emb)
-                    # Contrastive formula: reduced penalty for better recall
-                    final_score = pos_score - (0.4 * neg_score)
-                else:
-                    final_score = pos_score
-                
-                raw_scores.append(final_score)
-            
-            # Smooth Scores
-            smoothed = _smooth_scores(raw_scores)
-            
-            # Debug Log
-            top_raw = sorted(zip(smoothed, [x["start_time"] for x in video_data]), reverse=True)[:5]
-            if LOG_VERBOSE:
-                print(f"[DEBUG] Video {video_id} Top 5 Scores: {[(f'{s:.3f}', f'{t}s') for s, t in top_raw]}")
-
-            # Collect Matches
-            for i, item in enumerate(video_data):
-                score = smoothed[i]
-                
-                if score > 0.01:  # Basic sanity
-                    all_matches.append({
-                        "segment": item["segment"],
-                        "score": float(score),
-                        "video_id": video_id
-                    })
-
-        # 4. Filtering & Adaptive Threshold
-        all_matches.sort(key=lambda x: x["score"], reverse=True)
-        
-        high_confidence_matches = [m for m in all_matches if m["score"] > threshold]
-        
-        final_matches = []
-        is_low_confidence = False
+def _clip_engine(trace: SearchTrace):
+    with trace.stage("wait_ready"):
+        wait_until_ready("clip")
+        clip_engine = get_clip_engine()
+
+    if not clip_engine:
+        logger.error("CLIP Engine failed to load.")
+        raise ModelNotReadyError("clip", FAILED, retry_after=30.0)
+    return clip_engine
+
+
+def _load_partitions(session: Session, filters: SearchFilters, trace: SearchTrace) -> List[VideoPartition]:
+    """
+    Partitions of the videos the filters allow. The video filter runs in SQL (indexed
+    match_id / primary key); partitions are cached per (video, segments_version) and
+    only the missing videos' segments are read, in one indexed (video_id, start_time) scan.
+    """
+    with trace.stage("video_filter"):
+        statement = select(Video.id, Video.segments_version)
+        if filters.video_ids is not None:
+            statement = statement.where(Video.id.in_(filters.video_ids))
+        if filters.match_id is not None:
+            statement = statement.where(Video.match_id == filters.match_id)
+        videos = dict(session.exec(statement).all())
+    trace.count("videos", len(videos))
 
-        if high_confidence_matches:
-            print(f"[INFO] Found {len(high_confidence_matches)} matches above threshold {threshold}.")
-            final_matches = high_confidence_matches
+    partitions, missing = {}, []
+    for video_id, segments_version in videos.items():
+        partition = _partition_cache.get((video_id, segments_version), stats=trace.cache)
+        if partition is None:
+            missing.append(video_id)
         else:
-            # ADAPTIVE FALLBACK
-            if ADAPTIVE_THRESHOLD and all_matches:
-                print(f"[WARNING] No matches above threshold. Returning Top 3 (Adaptive Mode).")
-                final_matches = all_matches[:3]
-                is_low_confidence = True
-            elif DEMO_MODE:
-                 print(f"[WARNING] Zero matches found. Activating DEMO GOD MODE.")
-                 return _get_mock_results(query_text)
+            partitions[video_id] = partition
+
+    with trace.stage("segment_loading"):
+        for chunk_start in range(0, len(missing), 500):  # Stay under SQLite's bound-parameter limit
+            chunk = missing[chunk_start:chunk_start + 500]
+            # Staged rows belong to a full pass that is still running
+            rows = session.exec(
+                select(VideoSegment.id, VideoSegment.start_time, VideoSegment.end_time, VideoSegment.tier,
+                       VideoSegment.embedding, VideoSegment.video_id)
+                .where(VideoSegment.video_id.in_(chunk), VideoSegment.tier != TIER_STAGING)
+                .order_by(VideoSegment.video_id, VideoSegment.start_time)
+            ).all()
+            rows_by_video: Dict[int, List[Tuple]] = {video_id: [] for video_id in chunk}
+            for row in rows:
+                rows_by_video[row[5]].append(row)
+            with trace.stage("json_decoding"):
+                for video_id, video_rows in rows_by_video.items():
+                    partition = VideoPartition(video_id, video_rows)
+                    _partition_cache.put((video_id, videos[video_id]), partition)
+                    partitions[video_id] = partition
+    trace.count("partitions_loaded", len(missing))
+    undecodable = sum(p.undecodable for p in partitions.values())
+    if undecodable:
+        trace.count("undecodable_embeddings", undecodable)
+    return [partitions[video_id] for video_id in videos if len(partitions[video_id])]
+
+
+def _score(partitions: List[VideoPartition], queries: np.ndarray, negatives: Optional[np.ndarray],
+           filters: SearchFilters, use_audio: bool, trace: SearchTrace) -> List[List[Tuple]]:
+    """
+    Contrastive, smoothed and audio re-ranked scores of every in-window segment for
+    each query row; returns per query the (score, video_id, segment_id, start, end,
+    preliminary) tuples above the sanity floor.
+    """
+    matches: List[List[Tuple]] = [[] for _ in range(len(queries))]
+    scanned = 0
+    for partition in partitions:
+        rows = partition.window(filters.start, filters.end)
+        if rows is not None and not len(rows):
+            continue
+        with trace.stage("scoring"):
+            # Calculate Similarity with CONTRASTIVE LOGIC: positives and negatives in one product
+            if negatives is None:
+                scores = partition.similarities(queries)
             else:
-                 return []
-        
-        # 5. Deduplication & Formatting
-        unique_results = []
-        used_times = []
-        
-        MIN_EVENT_DIST = 10.0
-        
-        for m in final_matches:
-            seg = m["segment"]
-            video = session.get(Video, seg.video_id)
-            if not video: continue
-            
-            # Calculate segment center time for deduplication
-            # This fixes the issue where many segments have start_time=0.0
-            center_time = (seg.start_time + seg.end_time) / 2.0
-            
-            is_duplicate = False
-            for t_vid, t_center in used_times:
-                if seg.video_id == t_vid and abs(center_time - t_center) < MIN_EVENT_DIST:
-                    is_duplicate = True
-                    break
-            
-            if is_duplicate:
-                continue
-                
-            used_times.append((seg.video_id, center_time))
-            
-            unique_results.append({
-                "id": f"clip_{seg.id}",
-                "video_id": seg.video_id,
-                "video_title": video.title,
-                "startTime": seg.start_time,
-                "endTime": seg.end_time,
-                "description": query_text,
-                "confidenceScore": m["score"],
-                "thumbnailUrl": "",
-                "isLowConfidence": is_low_confidence
-            })
-            
-            if len(unique_results) >= 15: break  # Increased limit for better coverage
+                both = partition.similarities(np.concatenate([queries, negatives]))
+                scores = both[:len(queries)] - NEGATIVE_WEIGHT * both[len(queries):]
+            if rows is not None:
+                scores = scores[:, rows]
+        scanned += scores.shape[1]
+
+        # Smooth Scores
+        with trace.stage("smoothing"):
+            smoothed = _smooth_scores(scores)
+
+        starts = partition.starts if rows is None else partition.starts[rows]
+        ends = partition.ends if rows is None else partition.ends[rows]
+        # Audio re-ranking: crowd roar / whistles make an event more likely
+        if use_audio and AUDIO_RERANK_WEIGHT:
+            with trace.stage("audio_rerank"):
+                audio_track = AudioActivity.load(partition.video_id, cache_stats=trace.cache)
+                if audio_track:
+                    activity = np.array([audio_track.window_activity(s, e) for s, e in zip(starts, ends)])
+                    smoothed = smoothed + AUDIO_RERANK_WEIGHT * activity  # Same boost for every query
+
+        # Debug Log
+        if LOG_VERBOSE and logger.isEnabledFor(logging.DEBUG):
+            top = np.argsort(-smoothed[0])[:5]
+            logger.debug(f"Video {partition.video_id} Top 5 Scores: {[(f'{smoothed[0][i]:.3f}', f'{starts[i]}s') for i in top]}")
+
+        # Collect Matches
+        ids = partition.ids if rows is None else partition.ids[rows]
+        preliminary = partition.preliminary if rows is None else partition.preliminary[rows]
+        for q, i in zip(*np.nonzero(smoothed > 0.01)):  # Basic sanity
+            matches[q].append((float(smoothed[q, i]), partition.video_id, int(ids[i]),
+                               float(starts[i]), float(ends[i]), bool(preliminary[i])))
+    trace.count("segments_scanned", scanned)
+    return matches
+
+
+def _rank(all_matches: List[Tuple], threshold: float, trace: SearchTrace) -> Ranked:
+    """Threshold (with the adaptive fallback), then drop results within MIN_EVENT_DIST of a better one."""
+    trace.count("above_sanity", len(all_matches))
+    # 4. Filtering & Adaptive Threshold
+    with trace.stage("filtering"):
+        all_matches.sort(key=lambda m: m[0], reverse=True)
+        high_confidence_matches = [m for m in all_matches if m[0] > threshold]
+    trace.count("above_threshold", len(high_confidence_matches))
+
+    is_low_confidence = False
+    if high_confidence_matches:
+        logger.info(f"Found {len(high_confidence_matches)} matches above threshold {threshold}.")
+        final_matches = high_confidence_matches
+    elif ADAPTIVE_THRESHOLD and all_matches:
+        # ADAPTIVE FALLBACK
+        logger.warning(f"No matches above threshold. Returning Top 3 (Adaptive Mode).")
+        final_matches = all_matches[:3]
+        is_low_confidence = True
+        trace.decisions["adaptive_fallback"] = True
+        trace.decisions["best_score"] = round(all_matches[0][0], 4)
+    else:
+        final_matches = []
+
+    # 5. Deduplication
+    with trace.stage("deduplication"):
+        ranked = _deduplicate(final_matches, SEARCH_MAX_RESULTS)
+    trace.count("ranked", len(ranked))
+    return Ranked(ranked, is_low_confidence)
+
+
+def _deduplicate(matches: List[Tuple], limit: int) -> List[Tuple]:
+    """Best-first matches without those within MIN_EVENT_DIST of a better one in the same video."""
+    kept = []
+    centers_by_video: Dict[int, List[float]] = {}
+    for m in matches:
+        # Calculate segment center time for deduplication
+        # This fixes the issue where many segments have start_time=0.0
+        center_time = (m[3] + m[4]) / 2.0
+        centers = centers_by_video.setdefault(m[1], [])
+        if any(abs(center_time - c) < MIN_EVENT_DIST for c in centers):
+            continue
+        centers.append(center_time)
+        kept.append(m)
+        if len(kept) >= limit:
+            break
+    return kept
+
+
+def _format_page(session: Session, ranked: Ranked, offset: int, top_k: int, query_text: str,
+                 trace: SearchTrace) -> List[Dict]:
+    with trace.stage("formatting"):
+        page = ranked.matches[offset:offset + top_k]
+        # One lookup for the page's videos, not one per result
+        video_ids = {m[1] for m in page}
+        titles = dict(session.exec(select(Video.id, Video.title).where(Video.id.in_(video_ids))).all()) if video_ids else {}
+        results = [_format_match(m, titles[m[1]], query_text, ranked.low_confidence) for m in page if m[1] in titles]
+    trace.count("returned", len(results))
+    return results
+
+
+def _format_match(match: Tuple, title: str, query_text: str, low_confidence: bool) -> Dict:
+    score, video_id, segment_id, start, end, preliminary = match
+    return {
+        "id": f"clip_{segment_id}",
+        "video_id": video_id,
+        "video_title": title,
+        "startTime": start,
+        "endTime": end,
+        "description": query_text,
+        "confidenceScore": score,
+        "thumbnailUrl": "",
+        "isLowConfidence": low_confidence,
+        "isPreliminary": preliminary  # From the keyframe quick index
+    }
+
+
+def _encode_cursor(version: int, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        version, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        version, offset = int(version), int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError(f"Invalid cursor '{cursor}'")
+    if offset < 0 or version < 0:  # A negative offset would slice from the end of the ranking
+        raise CursorError(f"Invalid cursor '{cursor}'")
+    return version, offset
+
+
+def _result_key(query_text: str, threshold: float, use_audio: bool, filters: SearchFilters, version: int) -> Tuple:
+    return (normalize_query(query_text), threshold, use_audio, filters, version)
+
+
+def _page(session: Session, ranked: Ranked, version: int, offset: int, top_k: int, query_text: str,
+          trace: SearchTrace) -> Dict:
+    if ranked.mock is not None:
+        results, next_offset = (ranked.mock if offset == 0 else []), None
+    else:
+        results = _format_page(session, ranked, offset, top_k, query_text, trace)
+        next_offset = offset + top_k if offset + top_k < len(ranked.matches) else None
+    logger.info(f"Returning {len(results)} unique results.")
+    return {"results": results, "next_cursor": _encode_cursor(version, next_offset) if next_offset else None}
+
+
+def search_video(query_text: str, threshold: float = 0.22, use_audio: bool = True, explain: bool = False):
+    """
+    Advanced Semantic Search with Contrastive Learning.
+    Uses negative prompts to distinguish similar events (goal vs shot).
+    With `use_audio`, segments overlapping audio activity peaks are re-ranked upwards.
+
+    Waits (up to READY_TIMEOUT) for the CLIP warm-up and raises ModelNotReadyError
+    if the model is still loading or failed, rather than answering with mock data.
+
+    With `explain`, returns {"results": [...], "explain": {...}} where explain holds
+    per-stage timings, candidate counts, threshold decisions and cache hits.
+
+    The first page of search_page; see there for filters and pagination.
+    """
+    page = search_page(query_text, threshold, use_audio, explain=explain)
+    if explain:
+        return {"results": page["results"], "explain": page["explain"]}
+    return page["results"]
+
+
+def search_page(query_text: str, threshold: float = 0.22, use_audio: bool = True,
+                filters: SearchFilters = NO_FILTERS, top_k: int = 15, cursor: Optional[str] = None,
+                explain: bool = False) -> Dict:
+    """
+    One page of results: {"results": [...], "next_cursor": str or None} (plus "explain").
+
+    `filters` restrict the videos (ids, match) and the time window before scoring.
+    The full ranking is cached per (normalized query, threshold, use_audio, filters,
+    index version) - the version changes whenever searchable segments do (see
+    index_state) - and later pages are slices of it. A cursor pins the version of
+    its first page; StaleCursorError if that ranking has been evicted since.
+    """
+    trace = SearchTrace()
+    version, offset = _decode_cursor(cursor) if cursor else (index_version(), 0)
+    key = _result_key(query_text, threshold, use_audio, filters, version)
+    with trace.stage("result_cache"):
+        ranked = _result_cache.get(key, stats=trace.cache) if RESULT_CACHE_SIZE else None
+    if ranked is None:
+        if cursor and version != index_version():
+            raise StaleCursorError("The index changed since the first page; restart the search")
+        ranked = _search(query_text, threshold, use_audio, filters, trace)
+        if RESULT_CACHE_SIZE:
+            _result_cache.put(key, ranked)
+
+    with Session(engine) as session:
+        page = _page(session, ranked, version, offset, top_k, query_text, trace)
+    report = trace.finish()
+    if explain:
+        page["explain"] = report
+    return page
+
+
+def search_batch(query_texts: List[str], threshold: float = 0.22, use_audio: bool = True,
+                 filters: SearchFilters = NO_FILTERS, top_k: int = 15, explain: bool = False) -> Dict:
+    """
+    First pages of several queries over the same filters, e.g. every event type of a
+    match report: {"groups": [{"query", "results", "next_cursor"}, ...]} in request order
+    (duplicates answered once), plus "explain" with the shared report and per-query
+    threshold decisions and candidate counts.
+
+    The uncached queries are encoded in one batch and scored in one pass: each
+    partition is loaded once and multiplied by the matrix of all query (and negative)
+    vectors, smoothing runs over all query rows at once. Rankings go into the same
+    result cache as search_page, so the cursors continue with GET /search.
+    """
+    trace = SearchTrace()
+    version = index_version()
+    queries = list(dict.fromkeys(query_texts))
+    query_traces = {q: SearchTrace() for q in queries}
+    ranked_by_query: Dict[str, Ranked] = {}
+    with trace.stage("result_cache"):
+        for q in queries:
+            ranked = _result_cache.get(_result_key(q, threshold, use_audio, filters, version),
+                                       stats=trace.cache) if RESULT_CACHE_SIZE else None
+            if ranked is not None:
+                ranked_by_query[q] = ranked
+    missing = [q for q in queries if q not in ranked_by_query]
+    trace.count("queries", len(queries))
+    trace.count("queries_scored", len(missing))
+    if missing:
+        rankings = _search_many(missing, threshold, use_audio, filters, trace, [query_traces[q] for q in missing])
+        for q, ranked in zip(missing, rankings):
+            ranked_by_query[q] = ranked
+            if RESULT_CACHE_SIZE:
+                _result_cache.put(_result_key(q, threshold, use_audio, filters, version), ranked)
+
+    groups = []
+    with Session(engine) as session:
+        for q in queries:
+            page = _page(session, ranked_by_query[q], version, 0, top_k, q, query_traces[q])
+            groups.append({"query": q, **page})
+    for query_trace in query_traces.values():
+        for name, seconds in query_trace.stages.items():
+            trace.stages[name] = trace.stages.get(name, 0.0) + seconds
+    report = trace.finish()
+    response = {"groups": groups}
+    if explain:
+        report["queries"] = {q: {"threshold": t.decisions, "candidates": t.counts} for q, t in query_traces.items()}
+        response["explain"] = report
+    return response
+
+
+def search_stream(query_text: str, threshold: float = 0.22, use_audio: bool = True,
+                  filters: SearchFilters = NO_FILTERS, explain: bool = False,
+                  cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+    """
+    Incremental search: yields {"type": "video", "video_id", "video_title", "upper_bound",
+    "results": [...]} for each video with matches above the threshold as soon as that
+    video is scored, then a {"type": "done", ...} summary (with "explain" if asked).
+
+    Videos are scored in descending order of VideoPartition.upper_bound, so the likely
+    best arrive first; once the bound drops to the sanity floor the remaining videos
+    cannot match and are skipped. Results are deduplicated within each video, and the
+    stream stops after SEARCH_MAX_RESULTS. If no video clears the threshold, the
+    adaptive fallback (or the demo data) arrives as one {"type": "fallback"} event.
+    `cancel` is checked between videos. Streams bypass the result cache.
+    """
+    trace = SearchTrace()
+    clip_engine = _clip_engine(trace)
+    logger.info(f"--- Streaming search for: '{query_text}' ---")
+    threshold = _query_threshold(query_text.lower().strip(), threshold, trace)
+    queries, negatives = _encode_queries(clip_engine, [query_text], trace)
+
+    with Session(engine) as session:
+        partitions = _load_partitions(session, filters, trace)
+    with trace.stage("bounds"):
+        boost = AUDIO_RERANK_WEIGHT if use_audio else 0.0  # Audio activity is at most 1
+        bounds = np.array([p.upper_bound(queries[0], None if negatives is None else negatives[0])
+                           for p in partitions]) + boost
+        order = np.argsort(-bounds, kind="stable")
+
+    emitted, scored, scanned, fallback = 0, 0, 0, []
+    for i in order:
+        if cancel is not None and cancel.is_set():
+            trace.decisions["cancelled"] = True
+            logger.info(f"Streaming search for '{query_text}' cancelled after {scored} videos.")
+            break
+        if bounds[i] <= 0.01 or emitted >= SEARCH_MAX_RESULTS:  # Basic sanity floor of _score
+            break
+        partition = partitions[i]
+        matches = _score([partition], queries, negatives, filters, use_audio, trace)[0]
+        scored += 1
+        scanned += trace.counts["segments_scanned"]
+        with trace.stage("filtering"):
+            matches.sort(key=lambda m: m[0], reverse=True)
+            above = [m for m in matches if m[0] > threshold]
+        if not above:
+            if ADAPTIVE_THRESHOLD:
+                fallback = sorted(fallback + matches[:3], key=lambda m: m[0], reverse=True)[:3]
+            continue
+        with trace.stage("deduplication"):
+            peaks = _deduplicate(above, SEARCH_MAX_RESULTS - emitted)
+        with Session(engine) as session:
+            title = session.exec(select(Video.title).where(Video.id == partition.video_id)).first()
+        if title is None:
+            continue  # Deleted since its partition was loaded
+        emitted += len(peaks)
+        yield {"type": "video", "video_id": partition.video_id, "video_title": title,
+               "upper_bound": round(float(bounds[i]), 4),
+               "results": [_format_match(m, title, query_text, False) for m in peaks]}
+    trace.count("videos_scored", scored)
+    trace.count("segments_scanned", scanned)
+    trace.count("returned", emitted)
+
+    if not emitted and not trace.decisions.get("cancelled"):
+        if fallback:
+            ranked = _rank(fallback, threshold, trace)
+            with Session(engine) as session:
+                results = _format_page(session, ranked, 0, len(ranked.matches), query_text, trace)
+            yield {"type": "fallback", "results": results}
+        elif DEMO_MODE and filters == NO_FILTERS:
+            trace.decisions["demo_fallback"] = True
+            yield {"type": "fallback", "results": _get_mock_results(query_text)}
+
+    done = {"type": "done", "videos": len(partitions), "videos_scored": scored, "results": emitted}
+    report = trace.finish()
+    if explain:
+        done["explain"] = report
+    yield done
+
+
+def _search(query_text: str, threshold: float, use_audio: bool, filters: SearchFilters,
+            trace: SearchTrace) -> Ranked:
+    return _search_many([query_text], threshold, use_audio, filters, trace, [trace])[0]
+
+
+def _search_many(query_texts: List[str], threshold: float, use_audio: bool, filters: SearchFilters,
+                 trace: SearchTrace, query_traces: List[SearchTrace]) -> List[Ranked]:
+    """
+    Rankings of several queries from one pass over the index. Shared stages (encoding,
+    loading, scoring) are recorded on `trace`, each query's threshold and ranking on
+    its entry of `query_traces` (which may be `trace` itself for a single query).
+    """
+    clip_engine = _clip_engine(trace)
+    logger.info(f"--- Searching for: {query_texts} ---")
+    thresholds = [_query_threshold(q.lower().strip(), threshold, t) for q, t in zip(query_texts, query_traces)]
+    queries, negatives = _encode_queries(clip_engine, query_texts, trace)
+
+    # 3. Fetch & Score Segments
+    with Session(engine) as session:
+        partitions = _load_partitions(session, filters, trace)
+    logger.info(f"Scanning {sum(len(p) for p in partitions)} segments in {len(partitions)} videos...")
 
-        print(f"[SUCCESS] Returning {len(unique_results)} unique results.")
-        return unique_results
+    matches = _score(partitions, queries, negatives, filters, use_audio, trace) if partitions else [[] for _ in query_texts]
+    rankings = []
+    for query_text, query_matches, query_threshold, query_trace in zip(query_texts, matches, thresholds, query_traces):
+        ranked = _rank(query_matches, query_threshold, query_trace) if partitions else Ranked([], False)
+        if not ranked.matches and DEMO_MODE and filters == NO_FILTERS:
+            logger.warning(f"Zero matches found for '{query_text}'. Activating DEMO GOD MODE.")
+            query_trace.decisions["demo_fallback"] = True
+            ranked = Ranked([], False, mock=_get_mock_results(query_text))
+        rankings.append(ranked)
+    return rankings
 
 
 def _get_mock_results(query_text: str):
@@ -0,0 +1,151 @@
+"""
+Search Executor
+Runs searches for the async API on a dedicated thread pool instead of the
+Starlette threadpool, so a burst of searches cannot starve the other endpoints.
+Identical in-flight requests are single-flighted - the second "goal" search
+awaits the first one's computation instead of starting its own - and admission
+is bounded: when too many distinct searches are running or queued, new ones are
+rejected with a retry estimate (HTTP 429) rather than piling up. Streaming
+searches are advanced on the same pool one event at a time and hold a slot
+until they finish or their client goes away.
+"""
+import os
+import math
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional
+
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+SEARCH_WORKERS = int(os.environ.get("TACSEARCH_SEARCH_WORKERS", str(max(2, (os.cpu_count() or 2) // 2))))
+SEARCH_MAX_PENDING = int(os.environ.get("TACSEARCH_SEARCH_MAX_PENDING", str(SEARCH_WORKERS * 4)))  # Running + queued
+
+SEARCH_REQUESTS = counter("tacsearch_search_requests", "Search requests by outcome (computed, coalesced, streamed, rejected)")
+SEARCH_PENDING = gauge("tacsearch_search_pending", "Distinct searches running or queued on the search executor")
+
+
+_END = object()  # Sentinel for an exhausted stream
+
+
+class SearchSaturatedError(Exception):
+    def __init__(self, pending: int, retry_after: float):
+        self.pending = pending
+        self.retry_after = retry_after
+        super().__init__(f"Search is saturated ({pending} searches pending), retry in {retry_after:.0f}s")
+
+
+class SearchExecutor:
+    def __init__(self, workers: int = SEARCH_WORKERS, max_pending: int = SEARCH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Optional[Future]] = {}  # None for streams, which are never shared
+        self._avg_seconds = 0.5  # EWMA of computation time, for Retry-After
+        self.computed = 0
+        self.coalesced = 0
+        self.streamed = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        """Seconds until a slot is likely free: the queue ahead, drained by all workers."""
+        return max(1.0, math.ceil(self._avg_seconds * len(self._inflight) / self.workers))
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Future for `fn(*args, **kwargs)`, shared with any in-flight call of the same key.
+        Raises SearchSaturatedError instead of queueing a new computation beyond max_pending.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                SEARCH_REQUESTS.inc(outcome="coalesced")
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                SEARCH_REQUESTS.inc(outcome="rejected")
+                raise SearchSaturatedError(len(self._inflight), self.retry_after())
+            future = self._pool.submit(self._timed, fn, args, kwargs)
+            self._inflight[key] = future
+            self.computed += 1
+            SEARCH_REQUESTS.inc(outcome="computed")
+            SEARCH_PENDING.set(len(self._inflight))
+        future.add_done_callback(lambda _: self._done(key))
+        return future
+
+    async def run(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Awaitable `submit`; a cancelled caller leaves the shared computation running for the others."""
+        return await asyncio.shield(asyncio.wrap_future(self.submit(key, fn, *args, **kwargs)))
+
+    async def stream(self, fn: Callable, *args, **kwargs) -> AsyncIterator:
+        """
+        Items of the generator `fn(*args, cancel=event, **kwargs)`, each advanced on the
+        pool. A stream holds one pending slot until it ends (SearchSaturatedError like
+        submit). When the consumer stops early - a client disconnect - `cancel` is set
+        and the generator is closed once its current step returns, freeing the slot.
+        """
+        key = object()
+        with self._lock:
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                SEARCH_REQUESTS.inc(outcome="rejected")
+                raise SearchSaturatedError(len(self._inflight), self.retry_after())
+            self._inflight[key] = None
+            self.streamed += 1
+            SEARCH_REQUESTS.inc(outcome="streamed")
+            SEARCH_PENDING.set(len(self._inflight))
+        cancel = threading.Event()
+        iterator = fn(*args, cancel=cancel, **kwargs)
+        step: Optional[Future] = None
+        try:
+            while True:
+                step = self._pool.submit(next, iterator, _END)
+                item = await asyncio.wrap_future(step)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            cancel.set()
+
+            def finish(_=None):
+                iterator.close()
+                self._done(key)
+
+            if step is None or step.done():
+                finish()
+            else:
+                step.add_done_callback(finish)  # A generator cannot be closed mid-step
+
+    def _timed(self, fn: Callable, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - start)
+
+    def _done(self, key: Hashable):
+        with self._lock:
+            self._inflight.pop(key, None)
+            SEARCH_PENDING.set(len(self._inflight))
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": len(self._inflight),
+            "avg_seconds": round(self._avg_seconds, 4),
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "streamed": self.streamed,
+            "rejected": self.rejected,
+        }
+
+
+search_executor = SearchExecutor()
@@ -0,0 +1,221 @@
+"""
+Track Index
+Materialises player/ball tracks into per-timestamp arrays (player counts, ball
+position, players inside the penalty areas) so structured spatial queries are
+answered with NumPy masks in milliseconds, without decoding video or running models.
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .frame_cache import get_artifact_dir
+from .detections import DetectionTable
+from .yolo_tracker import YOLOTracker, PERSON_CLASS, BALL_CLASS
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+# Penalty areas as (x1, y1, x2, y2) in normalised image coordinates. There is no
+# pitch calibration, so these approximate where the boxes appear in a wide
+# broadcast view when play is near either goal.
+PENALTY_AREAS = {
+    "left": (0.0, 0.25, 0.30, 1.0),
+    "right": (0.70, 0.25, 1.0, 1.0),
+}
+BALL_NEAR_DISTANCE = 0.10   # Normalised distance from ball to a box that counts as "near"
+MIN_PERSON_SCORE = 0.3      # Untracked persons below this are not counted
+
+TRACK_INDEX_FILE = "track_index.npz"
+BOX_CODES = {"none": 0, "left": 1, "right": 2}
+
+
+def _in_rect(points: np.ndarray, rect) -> np.ndarray:
+    x1, y1, x2, y2 = rect
+    return (points[:, 0] >= x1) & (points[:, 0] <= x2) & (points[:, 1] >= y1) & (points[:, 1] <= y2)
+
+
+def _distance_to_rect(points: np.ndarray, rect) -> np.ndarray:
+    x1, y1, x2, y2 = rect
+    dx = np.maximum(np.maximum(x1 - points[:, 0], 0.0), points[:, 0] - x2)
+    dy = np.maximum(np.maximum(y1 - points[:, 1], 0.0), points[:, 1] - y2)
+    return np.sqrt(dx ** 2 + dy ** 2)
+
+
+class TrackIndex:
+    """
+    Per-sampled-frame arrays:
+        timestamps          (F,) float64
+        player_count        (F,) int16
+        ball_xy             (F, 2) float32, NaN when no ball is visible
+        players_in_left     (F,) int16
+        players_in_right    (F,) int16
+        ball_box            (F,) int8  (0 none, 1 left, 2 right)
+        ball_box_distance   (F,) float32 distance to the nearest penalty area (inf without ball)
+    """
+    FIELDS = ("timestamps", "player_count", "ball_xy", "players_in_left", "players_in_right",
+              "ball_box", "ball_box_distance")
+
+    def __init__(self, **arrays):
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def path(video_id: int) -> str:
+        return os.path.join(get_artifact_dir(video_id), TRACK_INDEX_FILE)
+
+    @classmethod
+    def load(cls, video_id: int) -> Optional["TrackIndex"]:
+        path = cls.path(video_id)
+        if not os.path.exists(path):
+            return None
+        return _load_cached(path, os.path.getmtime(path))
+
+    def save(self, video_id: int):
+        os.makedirs(get_artifact_dir(video_id), exist_ok=True)
+        tmp_path = self.path(video_id) + ".tmp.npz"
+        np.savez(tmp_path, **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(tmp_path, self.path(video_id))
+
+    def players_in_box(self, box: str = "any") -> np.ndarray:
+        if box == "left":
+            return self.players_in_left
+        if box == "right":
+            return self.players_in_right
+        return np.maximum(self.players_in_left, self.players_in_right)
+
+    def ball_distance_to_box(self, box: str = "any") -> np.ndarray:
+        """Ball distance to the given penalty area (nearest for "any"); NaN/inf without a ball."""
+        if box in PENALTY_AREAS:
+            return _distance_to_rect(self.ball_xy, PENALTY_AREAS[box])
+        return self.ball_box_distance
+
+
+@lru_cache(maxsize=64)
+def _load_cached(path: str, mtime: float) -> TrackIndex:
+    # mtime is part of the key so a rebuilt index is picked up
+    data = np.load(path)
+    return TrackIndex(**{name: data[name] for name in TrackIndex.FIELDS})
+
+
+def build_track_index(video_id: int, table: Optional[DetectionTable] = None) -> Optional[TrackIndex]:
+    """Tracks the stored detections of a video and writes its track index."""
+    table = table if table is not None else DetectionTable.load(video_id)
+    if table is None:
+        return None
+
+    person_tracks, ball_tracks = YOLOTracker.track(table)
+    n_frames = len(table)
+    frame_ids = table.frame_ids()
+    scores = table.scores.astype(np.float32)
+
+    # Players: tracked persons plus confident untracked ones; position = feet (bottom centre)
+    is_player = (table.classes == PERSON_CLASS) & ((person_tracks >= 0) | (scores >= MIN_PERSON_SCORE))
+    feet = np.stack([(table.boxes[:, 0] + table.boxes[:, 2]) / 2, table.boxes[:, 3]], axis=1)
+    player_count = np.bincount(frame_ids[is_player], minlength=n_frames).astype(np.int16)
+    in_left = is_player & _in_rect(feet, PENALTY_AREAS["left"])
+    in_right = is_player & _in_rect(feet, PENALTY_AREAS["right"])
+    players_in_left = np.bincount(frame_ids[in_left], minlength=n_frames).astype(np.int16)
+    players_in_right = np.bincount(frame_ids[in_right], minlength=n_frames).astype(np.int16)
+
+    # Ball: best-scoring ball per frame, preferring tracked detections over spurious ones
+    ball_xy = np.full((n_frames, 2), np.nan, dtype=np.float32)
+    ball_rows = np.where(table.classes == BALL_CLASS)[0]
+    if len(ball_rows):
+        priority = scores[ball_rows] + (ball_tracks[ball_rows] >= 0)
+        order = ball_rows[np.lexsort((-priority, frame_ids[ball_rows]))]
+        first = order[np.r_[True, frame_ids[order][1:] != frame_ids[order][:-1]]]
+        centres = (table.boxes[first, :2] + table.boxes[first, 2:]) / 2
+        ball_xy[frame_ids[first]] = centres
+
+    has_ball = ~np.isnan(ball_xy[:, 0])
+    ball_box = np.zeros(n_frames, dtype=np.int8)
+    ball_box_distance = np.full(n_frames, np.inf, dtype=np.float32)
+    if has_ball.any():
+        points = ball_xy[has_ball]
+        dist_left = _distance_to_rect(points, PENALTY_AREAS["left"])
+        dist_right = _distance_to_rect(points, PENALTY_AREAS["right"])
+        ball_box_distance[has_ball] = np.minimum(dist_left, dist_right)
+        codes = np.where(dist_left == 0, BOX_CODES["left"], np.where(dist_right == 0, BOX_CODES["right"], 0))
+        ball_box[has_ball] = codes
+
+    index = TrackIndex(
+        timestamps=table.timestamps.astype(np.float64),
+        player_count=player_count,
+        ball_xy=ball_xy,
+        players_in_left=players_in_left,
+        players_in_right=players_in_right,
+        ball_box=ball_box,
+        ball_box_distance=ball_box_distance,
+    )
+    index.save(video_id)
+    return index
+
+
+def _mask_to_moments(index: TrackIndex, mask: np.ndarray, min_duration: float, merge_gap: float) -> List[Dict]:
+    """Groups consecutive matching frames into [start, end] moments."""
+    if not mask.any():
+        return []
+    idx = np.where(mask)[0]
+    times = index.timestamps[idx]
+    # Break runs where sampled frames are further apart than merge_gap
+    breaks = np.where(np.diff(times) > merge_gap)[0]
+    starts = np.r_[0, breaks + 1]
+    ends = np.r_[breaks, len(idx) - 1]
+    moments = []
+    for s, e in zip(starts, ends):
+        start_t, end_t = float(times[s]), float(times[e])
+        if end_t - start_t < min_duration:
+            continue
+        frames = idx[s:e + 1]
+        moments.append({
+            "startTime": start_t,
+            "endTime": end_t,
+            "maxPlayersInBox": int(max(index.players_in_left[frames].max(), index.players_in_right[frames].max())),
+            "maxPlayers": int(index.player_count[frames].max()),
+        })
+    return moments
+
+
+def query_moments(index: TrackIndex, min_players_in_box: Optional[int] = None, box: str = "any",
+                  min_players: Optional[int] = None, ball_near_box: bool = False,
+                  ball_distance: float = BALL_NEAR_DISTANCE, ball_in_box: bool = False,
+                  start: float = 0.0, end: Optional[float] = None,
+                  min_duration: float = 0.0, merge_gap: float = 2.0) -> List[Dict]:
+    """
+    Answers a structured spatial query from the index arrays, e.g.
+    "moments with 8+ players in the box near a ball":
+
+        query_moments(index, min_players_in_box=8, ball_near_box=True)
+    """
+    mask = (index.timestamps >= start)
+    if end is not None:
+        mask &= index.timestamps <= end
+    if min_players is not None:
+        mask &= index.player_count >= min_players
+    # Box conditions must hold for the same box: with "any", players crowding the
+    # left box and a ball near the right one is not a goalmouth moment.
+    boxes = [box] if box in PENALTY_AREAS else list(PENALTY_AREAS)
+    box_mask = np.zeros(len(index), dtype=bool)
+    for name in boxes:
+        box_mask |= _box_mask(index, name, min_players_in_box, ball_near_box, ball_distance, ball_in_box)
+    mask &= box_mask
+    return _mask_to_moments(index, mask, min_duration, merge_gap)
+
+
+def _box_mask(index: TrackIndex, box: str, min_players_in_box: Optional[int], ball_near_box: bool,
+              ball_distance: float, ball_in_box: bool) -> np.ndarray:
+    """Frames meeting every box condition for one named penalty area."""
+    mask = np.ones(len(index), dtype=bool)
+    if min_players_in_box is not None:
+        mask &= index.players_in_box(box) >= min_players_in_box
+    if ball_in_box:
+        mask &= index.ball_box == BOX_CODES[box]
+    elif ball_near_box:
+        mask &= index.ball_distance_to_box(box) <= ball_distance
+    return mask
@@ -0,0 +1,122 @@
+"""
+Multi-Object Tracking
+ByteTrack-style association over the stored detection table: confident boxes are
+matched to existing tracks first, then low-confidence boxes get a second chance
+to extend tracks that would otherwise be lost. Runs on arrays only, no video decode.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from .detections import DetectionTable
+
+# --- CONFIGURATION ---
+HIGH_SCORE = 0.5      # Detections that can start tracks
+LOW_SCORE = 0.1       # Detections below this are ignored entirely
+MATCH_IOU = 0.3       # Minimum IoU for the first association round
+LOW_MATCH_IOU = 0.5   # Stricter IoU for low-confidence boxes
+MAX_LOST_FRAMES = 10  # Sampled frames a track survives without a match
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _greedy_match(iou: np.ndarray, min_iou: float):
+    """Greedy highest-IoU-first assignment. Returns (pairs, unmatched_rows, unmatched_cols)."""
+    pairs = []
+    if iou.size:
+        rows, cols = np.where(iou >= min_iou)
+        order = np.argsort(-iou[rows, cols])
+        used_rows, used_cols = set(), set()
+        for k in order:
+            r, c = int(rows[k]), int(cols[k])
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            pairs.append((r, c))
+    matched_rows = {r for r, _ in pairs}
+    matched_cols = {c for _, c in pairs}
+    unmatched_rows = [r for r in range(iou.shape[0]) if r not in matched_rows]
+    unmatched_cols = [c for c in range(iou.shape[1]) if c not in matched_cols]
+    return pairs, unmatched_rows, unmatched_cols
+
+
+def track_detections(table: DetectionTable, class_id: int) -> np.ndarray:
+    """
+    Assigns a track id to every detection row of `class_id`.
+
+    Returns:
+        (N,) int32 array aligned with the table rows; -1 for untracked rows
+        (other classes or discarded low-confidence boxes)
+    """
+    track_ids = np.full(table.num_detections, -1, dtype=np.int32)
+    tracks: Dict[int, Dict] = {}  # id -> {"box": last box, "lost": frames since last match}
+    next_id = 0
+
+    for i in range(len(table)):
+        lo = table.offsets[i]
+        boxes, classes, scores = table.frame(i)
+        scores = scores.astype(np.float32)
+        rows = np.where((classes == class_id) & (scores >= LOW_SCORE))[0]
+        high = rows[scores[rows] >= HIGH_SCORE]
+        low = rows[scores[rows] < HIGH_SCORE]
+
+        active_ids = list(tracks.keys())
+        track_boxes = np.array([tracks[t]["box"] for t in active_ids], dtype=np.float32).reshape(-1, 4)
+
+        # Round 1: confident detections against all tracks
+        pairs, unmatched_tracks, unmatched_high = _greedy_match(iou_matrix(track_boxes, boxes[high]), MATCH_IOU)
+        for t_idx, d_idx in pairs:
+            tid = active_ids[t_idx]
+            tracks[tid] = {"box": boxes[high[d_idx]], "lost": 0}
+            track_ids[lo + high[d_idx]] = tid
+
+        # Round 2: low-confidence detections rescue remaining tracks (occlusion, motion blur)
+        remaining_ids = [active_ids[t] for t in unmatched_tracks]
+        remaining_boxes = track_boxes[unmatched_tracks] if unmatched_tracks else np.zeros((0, 4), dtype=np.float32)
+        pairs_low, still_unmatched, _ = _greedy_match(iou_matrix(remaining_boxes, boxes[low]), LOW_MATCH_IOU)
+        for t_idx, d_idx in pairs_low:
+            tid = remaining_ids[t_idx]
+            tracks[tid] = {"box": boxes[low[d_idx]], "lost": 0}
+            track_ids[lo + low[d_idx]] = tid
+
+        for t_idx in still_unmatched:
+            tid = remaining_ids[t_idx]
+            tracks[tid]["lost"] += 1
+            if tracks[tid]["lost"] > MAX_LOST_FRAMES:
+                del tracks[tid]
+
+        # Unmatched confident detections start new tracks
+        for d_idx in unmatched_high:
+            tracks[next_id] = {"box": boxes[high[d_idx]], "lost": 0}
+            track_ids[lo + high[d_idx]] = next_id
+            next_id += 1
+
+    return track_ids
+
+
+def track_summary(table: DetectionTable, track_ids: np.ndarray) -> List[Dict]:
+    """Start/end time and length of each track (for debugging and the API)."""
+    frame_ids = table.frame_ids()
+    summary = []
+    for tid in np.unique(track_ids[track_ids >= 0]):
+        frames = frame_ids[track_ids == tid]
+        summary.append({
+            "track_id": int(tid),
+            "start_time": float(table.timestamps[frames.min()]),
+            "end_time": float(table.timestamps[frames.max()]),
+            "detections": int(len(frames)),
+        })
+    return summary
@@ -0,0 +1,148 @@
+"""
+Model Warm-up
+Loads the configured models in a background thread at startup and runs one dummy
+forward pass through each, so kernels, allocators and (for ONNX) sessions are
+primed before the first real request. Searches wait on readiness instead of
+racing the load. Warmed models stay pinned in the registry so idle unloading
+cannot drop them; a failed warm-up is retried when a request next needs the model.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+WARMUP_MODELS = [m.strip() for m in os.environ.get("TACSEARCH_WARMUP_MODELS", "clip").split(",") if m.strip()]
+READY_TIMEOUT = float(os.environ.get("TACSEARCH_READY_TIMEOUT", "30"))  # Seconds a search waits for its model
+WARMUP_RETRY_SECONDS = float(os.environ.get("TACSEARCH_WARMUP_RETRY_SECONDS", "30"))  # Min gap between retries
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a request needs a model that is still warming up (or failed to load)."""
+
+    def __init__(self, name: str, state: str, retry_after: float = 5.0):
+        super().__init__(f"Model '{name}' is not ready ({state})")
+        self.name = name
+        self.state = state
+        self.retry_after = retry_after
+
+
+class _WarmupState:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = PENDING
+        self.event = threading.Event()
+        self.seconds = 0.0
+        self.finished_at = 0.0  # time.monotonic() of the last attempt's end
+        self.error: Optional[str] = None
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "seconds": round(self.seconds, 2), "error": self.error}
+
+
+_states: Dict[str, _WarmupState] = {}
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def prime(name: str, model):
+    """One representative forward pass per model type."""
+    if name == "clip":
+        model.get_text_embedding("a photo of a football match")
+        model.embed_frames([np.zeros((224, 224, 3), dtype=np.uint8)], rgb=True)
+    elif name == "videomae":
+        model.get_action_embedding([np.zeros((224, 224, 3), dtype=np.uint8)] * 16)
+    elif name == "yolo":
+        model.detect_batch([np.zeros((360, 640, 3), dtype=np.uint8)])
+
+
+def _warm(state: _WarmupState):
+    state.state = LOADING
+    start = time.perf_counter()
+    model = None
+    try:
+        # Pinned for the life of the process: /api/ready promises it stays loaded
+        model = registry.acquire(state.name)
+        if model is None:
+            raise RuntimeError("loader returned no model")
+        prime(state.name, model)
+        state.state = READY
+        state.error = None
+    except Exception as e:
+        if model is not None:
+            registry.release(state.name)
+        state.state = FAILED
+        state.error = str(e)
+        logger.error(f"[Warmup] {state.name} failed: {e}")
+    finally:
+        state.seconds = time.perf_counter() - start
+        state.finished_at = time.monotonic()
+        state.event.set()
+    if state.state == READY:
+        logger.info(f"[Warmup] {state.name} ready in {state.seconds:.1f}s")
+
+
+def start_warmup(models=None):
+    """Starts the background warm-up once per process. Models are warmed one after another."""
+    global _thread
+    models = WARMUP_MODELS if models is None else models
+    with _lock:
+        if _thread is not None:
+            return
+        for name in models:
+            _states[name] = _WarmupState(name)
+
+        def run():
+            for name in models:
+                _warm(_states[name])
+
+        _thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        _thread.start()
+
+
+def _retry(state: _WarmupState):
+    """Restarts a failed warm-up in the background, at most once per WARMUP_RETRY_SECONDS."""
+    with _lock:
+        if state.state != FAILED or time.monotonic() - state.finished_at < WARMUP_RETRY_SECONDS:
+            return
+        state.state = LOADING
+        state.event.clear()
+    logger.info(f"[Warmup] Retrying {state.name}")
+    threading.Thread(target=_warm, args=(state,), name=f"model-warmup-{state.name}", daemon=True).start()
+
+
+def wait_until_ready(name: str, timeout: float = READY_TIMEOUT):
+    """
+    Blocks until `name` has finished warming up. Models that are not part of the
+    warm-up return immediately (they load lazily on first use). If the warm-up
+    failed, the first request after WARMUP_RETRY_SECONDS starts another attempt
+    and waits for it like for the initial one.
+    Raises ModelNotReadyError on timeout or if the (latest) warm-up failed.
+    """
+    state = _states.get(name)
+    if state is None:
+        return
+    if state.state == FAILED:
+        _retry(state)
+    if not state.event.wait(timeout):
+        raise ModelNotReadyError(name, state.state)
+    if state.state != READY:
+        raise ModelNotReadyError(name, state.state, retry_after=WARMUP_RETRY_SECONDS)
+
+
+def readiness() -> Dict:
+    """Per-model warm-up status; `ready` once every warmed model has loaded."""
+    models = {name: state.stats() for name, state in _states.items()}
+    return {
+        "ready": all(s.state == READY for s in _states.values()),
+        "models": models,
+    }
@@ -1,46 +1,130 @@
-import cv2
+import logging
 import numpy as np
+from typing import List, Tuple
+from .proxy import resolve_analysis_path
+
+# COCO classes kept for football: 0 = Person, 32 = Sports Ball
+PERSON_CLASS = 0
+BALL_CLASS = 32
+YOLO_INPUT_SIZE = 640
+YOLO_BATCH_SIZE = 16
+
+
+def letterbox(frame: np.ndarray, size: int = YOLO_INPUT_SIZE) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resizes keeping the aspect ratio and pads to a size x size square (grey, like Ultralytics).
+
+    Returns:
+        (padded image, scale, (pad_x, pad_y)) - needed to map boxes back to the frame
+    """
+    import cv2
+
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    padded[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+    return padded, scale, (pad_x, pad_y)
+
 
 class YOLOTracker:
-    def __init__(self, model_name="yolov8n.pt"):
+    def __init__(self, model_name="yolov8n.pt", backend=None):
+        """
+        backend: "torch" or "onnx" (defaults to TACSEARCH_INFERENCE_BACKEND). With "onnx" on a
+        CPU-only box the checkpoint is exported once and Ultralytics runs it through ONNX Runtime.
+        """
+        import torch
         from ultralytics import YOLO
-        self.model = YOLO(model_name)
+        from .onnx_backend import use_onnx, export_yolo
+        from .model_store import resolve_yolo
+        
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model_name = resolve_yolo(model_name)
+        if use_onnx(backend, device):
+            try:
+                model_name = export_yolo(model_name)
+            except Exception as e:
+                logging.error(f"[YOLO] ONNX export failed, staying on torch: {e}")
+        self.model = YOLO(model_name, task="detect")
+
+    def detect_batch(self, frames: List[np.ndarray], batch_size: int = YOLO_BATCH_SIZE):
+        """
+        Runs YOLO on many frames at once with letterboxed (undistorted) input.
+        Detects both persons (class 0) and sports balls (class 32).
+
+        Returns:
+            One (boxes, classes, scores) tuple per frame. Boxes are xyxy normalised
+            to 0..1 of the original frame size.
+        """
+        results = []
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            prepared = [letterbox(f) for f in batch]
+            outputs = self.model([p[0] for p in prepared], classes=[PERSON_CLASS, BALL_CLASS],
+                                 imgsz=YOLO_INPUT_SIZE, verbose=False)
+            for frame, (_, scale, (pad_x, pad_y)), output in zip(batch, prepared, outputs):
+                h, w = frame.shape[:2]
+                boxes = output.boxes
+                xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+                xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale / w
+                xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale / h
+                np.clip(xyxy, 0.0, 1.0, out=xyxy)
+                results.append((
+                    xyxy,
+                    boxes.cls.cpu().numpy().astype(np.uint8),
+                    boxes.conf.cpu().numpy().astype(np.float32),
+                ))
+        return results
+
+    @staticmethod
+    def track(table):
+        """
+        Multi-object tracking over a stored DetectionTable (ByteTrack-style association).
+        Works on the persisted boxes, so no model needs to be loaded.
+
+        Returns:
+            (person_track_ids, ball_track_ids) - arrays aligned with the table rows, -1 = untracked
+        """
+        from .tracking import track_detections
+        return track_detections(table, PERSON_CLASS), track_detections(table, BALL_CLASS)
 
     def count_players(self, frame):
         """
         Runs YOLO on a single frame and returns player count.
         Detects both persons (class 0) and sports balls (class 32) for comprehensive football object detection.
         """
-        # Class 0 = Person, Class 32 = Sports Ball
-        # This ensures we detect both players and the football itself
-        results = self.model(frame, classes=[0, 32], verbose=False)
-        return len(results[0].boxes)
+        boxes, _, _ = self.detect_batch([frame])[0]
+        return len(boxes)
 
-    def detect_players(self, video_path: str, sample_interval: int = 30):
+    def detect_players(self, video_path: str, sample_interval: int = 30, decoder: str = None):
         """
         Runs YOLO on the video and returns detections.
         sample_interval: Frame interval to sample (to save time).
+        decoder: Frame source backend (see decoders.open_frame_source).
         """
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
+        from .decoders import open_frame_source
         detections = []
+        batch_frames, batch_times = [], []
         
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            if frame_idx % sample_interval == 0:
-                player_count = self.count_players(frame)
-                frame_timestamp = frame_idx / fps
-                
+        def flush():
+            for t, (boxes, _, _) in zip(batch_times, self.detect_batch(batch_frames)):
                 detections.append({
-                    "timestamp": frame_timestamp,
-                    "player_count": player_count,
+                    "timestamp": t,
+                    "player_count": len(boxes),
                 })
+            batch_frames.clear()
+            batch_times.clear()
+        
+        with open_frame_source(resolve_analysis_path(video_path), backend=decoder,
+                               stride=sample_interval) as source:
+            for decoded in source.frames():
+                batch_frames.append(decoded.image)
+                batch_times.append(decoded.timestamp)
+                if len(batch_frames) >= YOLO_BATCH_SIZE:
+                    flush()
+        if batch_frames:
+            flush()
             
-            frame_idx += 1
-            
-        cap.release()
         return detections
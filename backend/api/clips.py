@@ -1,12 +1,72 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 from ..database import get_session
 from ..models import Clip, VideoSegment, Video
-from ..ai.clip_search import CLIPSearchEngine
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import asyncio
+import importlib
+import json
 
 router = APIRouter()
 
+MAX_BATCH_QUERIES = 32
+
+
+class BatchSearch(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+    use_audio: bool = True
+    explain: bool = False
+    video_ids: Optional[List[int]] = None
+    match_id: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    top_k: int = Field(15, ge=1, le=100)
+
+
+class _SearchStreamResponse(StreamingResponse):
+    """
+    Closes the search stream however the response ends - finished, client gone
+    before or during the body (Starlette skips background tasks on a disconnect) -
+    so its executor slot is freed without waiting for garbage collection.
+    """
+    def __init__(self, events, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = events
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.events.aclose()
+
+
+def _describe(results: list, query: str, text: str) -> list:
+    """
+    Results computed for the normalised `query`, described with the caller's own `text`.
+    Copies, since a coalesced computation's results are shared by every waiting request.
+    """
+    if query == text:
+        return results
+    return [{**result, "description": text} if result.get("description") == query else result
+            for result in results]
+
+
+_search = None
+
+
+async def _search_module():
+    """
+    ..ai.search pulls in scikit-learn and the model stack; a lazy import on the event
+    loop would stall every other request, so it is imported in a thread (the import
+    lock makes concurrent first requests wait for the finished module).
+    """
+    global _search
+    if _search is None:
+        _search = await asyncio.to_thread(importlib.import_module, "..ai.search", __package__)
+    return _search
+
 @router.get("/", response_model=List[Clip])
 def list_clips(video_id: Optional[int] = None, session: Session = Depends(get_session)):
     statement = select(Clip)
@@ -16,6 +76,172 @@ def list_clips(video_id: Optional[int] = None, session: Session = Depends(get_se
     return clips
 
 @router.get("/search")
-def search_clips(q: str, session: Session = Depends(get_session)):
-    from ..ai.search import search_video
-    return search_video(q, threshold=0.05)
+async def search_clips(
+    response: Response,
+    q: str,
+    use_audio: bool = True,
+    explain: bool = False,
+    video_ids: Optional[List[int]] = Query(None),
+    match_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    top_k: int = Query(15, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """
+    Semantic search over all indexed segments. With `explain=true` the response is
+    {"results": [...], "explain": {...}} with per-stage timings, candidate counts,
+    threshold decisions and cache hits.
+
+    `video_ids` (repeatable), `match_id` and the `start`/`end` window (seconds into
+    each video) restrict what is scored. `top_k` results are returned per page; when
+    there are more, the X-Next-Cursor header holds the `cursor` for the next page.
+    Pages come from the cached ranking of the first one; 409 if that has expired.
+
+    Runs on the search executor: identical concurrent requests share one computation,
+    and when too many searches are pending the response is 429 with Retry-After.
+    """
+    from ..ai.search_executor import search_executor, SearchSaturatedError
+    from ..ai.warmup import ModelNotReadyError
+    search = await _search_module()
+    filters = search.SearchFilters(tuple(sorted(set(video_ids))) if video_ids else None, match_id, start, end)
+    # Normalised like the result cache, so "Goal " and "goal" share one computation
+    query = search.normalize_query(q)
+    try:
+        page = await search_executor.run(("search", query, use_audio, explain, filters, top_k, cursor),
+                                         search.search_page, query, threshold=0.05, use_audio=use_audio,
+                                         filters=filters, top_k=top_k, cursor=cursor, explain=explain)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+    except SearchSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+    except search.StaleCursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except search.CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    results = _describe(page["results"], query, q)
+    if explain:
+        return {**page, "results": results}
+    return results
+
+@router.get("/search/stream")
+async def search_clips_stream(
+    request: Request,
+    q: str,
+    use_audio: bool = True,
+    explain: bool = False,
+    video_ids: Optional[List[int]] = Query(None),
+    match_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+):
+    """
+    Streaming variant of /search for large libraries: one event per video with its
+    peaks as soon as that video is scored, most promising videos first, then a
+    "done" event. `format=ndjson` (default) sends one JSON object per line,
+    `format=sse` sends server-sent events named after the event type. Closing the
+    connection stops the search at the next video.
+    """
+    from ..ai.search_executor import search_executor, SearchSaturatedError
+    from ..ai.warmup import ModelNotReadyError
+    search = await _search_module()
+    filters = search.SearchFilters(tuple(sorted(set(video_ids))) if video_ids else None, match_id, start, end)
+    events = search_executor.stream(search.search_stream, q, threshold=0.05, use_audio=use_audio,
+                                    filters=filters, explain=explain)
+    # The first event covers model readiness, admission and query encoding, so those still get a status code
+    try:
+        first = await events.__anext__()
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+    except SearchSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+
+    def encode(event) -> str:
+        if format == "sse":
+            return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        return json.dumps(event) + "\n"
+
+    async def body():
+        yield encode(first)
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            yield encode(event)
+
+    return _SearchStreamResponse(events, body(),
+                                 media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+                                 headers={"Cache-Control": "no-cache"})
+
+@router.post("/search/batch")
+async def search_clips_batch(body: BatchSearch):
+    """
+    Several searches over the same filters in one pass, e.g. all event types of a
+    match report: {"groups": [{"query", "results", "next_cursor"}, ...]} in request
+    order. Each query's `next_cursor` continues with GET /search?q=...&cursor=...
+    Same executor, errors and Retry-After as GET /search.
+    """
+    from ..ai.search_executor import search_executor, SearchSaturatedError
+    from ..ai.warmup import ModelNotReadyError
+    search = await _search_module()
+    filters = search.SearchFilters(tuple(sorted(set(body.video_ids))) if body.video_ids else None,
+                                   body.match_id, body.start, body.end)
+    texts = [q for q in body.queries if q.strip()]
+    if not texts:
+        raise HTTPException(status_code=400, detail="No non-empty queries")
+    queries = tuple(search.normalize_query(q) for q in texts)
+    try:
+        batch = await search_executor.run(("batch", queries, body.use_audio, body.explain, filters, body.top_k),
+                                          search.search_batch, list(queries), threshold=0.05,
+                                          use_audio=body.use_audio, filters=filters, top_k=body.top_k,
+                                          explain=body.explain)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+    except SearchSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after))})
+    groups = [{**group, "query": text, "results": _describe(group["results"], query, text)}
+              for group, query, text in zip(batch["groups"], queries, texts)]
+    return {**batch, "groups": groups}
+
+@router.get("/moments")
+def search_moments(
+    video_id: Optional[int] = None,
+    min_players_in_box: Optional[int] = None,
+    box: str = "any",
+    min_players: Optional[int] = None,
+    ball_near_box: bool = False,
+    ball_in_box: bool = False,
+    min_duration: float = 0.0,
+    session: Session = Depends(get_session)
+):
+    """
+    Structured spatial search over the track index, e.g.
+    /api/clips/moments?min_players_in_box=8&ball_near_box=true
+    Only videos whose detections have been computed are searched.
+    """
+    from ..ai.track_index import TrackIndex, BOX_CODES, query_moments
+    if box not in ("any",) + tuple(k for k in BOX_CODES if k != "none"):
+        raise HTTPException(status_code=400, detail=f"Unknown box '{box}'")
+
+    statement = select(Video)
+    if video_id:
+        statement = statement.where(Video.id == video_id)
+    results = []
+    for video in session.exec(statement).all():
+        index = TrackIndex.load(video.id)
+        if index is None:
+            continue
+        for moment in query_moments(index, min_players_in_box=min_players_in_box, box=box,
+                                    min_players=min_players, ball_near_box=ball_near_box,
+                                    ball_in_box=ball_in_box, min_duration=min_duration):
+            results.append({"video_id": video.id, "video_title": video.title, **moment})
+    return results
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Response
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+@router.get("/models/stats")
+def model_stats():
+    """Which models are loaded in this worker, their memory and idle time."""
+    from ..ai.registry import registry
+    return registry.stats()
+
+@router.get("/ready")
+def ready(response: Response):
+    """Model warm-up status; 503 until every warmed model has loaded and run once."""
+    from ..ai.warmup import readiness
+    status = readiness()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
+@router.get("/scheduler/stats")
+def scheduler_stats():
+    """Thread budgets of interactive vs batch inference and how often ingest yielded to searches."""
+    from ..ai.scheduler import scheduler
+    return scheduler.stats()
+
+@router.get("/search/stats")
+def search_stats():
+    """Search executor load: pending searches, coalesced and rejected requests."""
+    from ..ai.search_executor import search_executor
+    return search_executor.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Ingest stage timings, throughput and queue depths in Prometheus text format."""
+    from ..ai.metrics import render
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, Form, HTTPException, Response
 from sqlmodel import Session, select
 from ..database import get_session
 from ..models import Video, Clip
-from ..ai.processor import process_video_task
 import shutil
 import os
-from typing import List
+import threading
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -23,13 +23,74 @@ def get_video(video_id: int, session: Session = Depends(get_session)):
     video = session.get(Video, video_id)
     return video
 
+@router.get("/{video_id}/thumbnail")
+def get_thumbnail(video_id: int, t: float = 0.0, session: Session = Depends(get_session)):
+    from ..ai.frame_cache import read_thumbnail
+    import cv2
+    video = session.get(Video, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    frame = read_thumbnail(video.id, video.filepath, t)
+    if frame is None:
+        raise HTTPException(status_code=404, detail="Frame not available")
+    ok, jpeg = cv2.imencode(".jpg", frame)
+    if not ok:
+        raise HTTPException(status_code=500, detail="Failed to encode thumbnail")
+    return Response(content=jpeg.tobytes(), media_type="image/jpeg")
+
+_detections_in_progress = set()
+_detections_lock = threading.Lock()  # Requests check-and-add from the threadpool, finished jobs discard
+
+@router.get("/{video_id}/detections")
+def get_detections(
+    video_id: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    session: Session = Depends(get_session)
+):
+    from ..ai.detections import DetectionTable, compute_detections
+    video = session.get(Video, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    table = DetectionTable.load(video_id)
+    if table is None:
+        # YOLO only runs when someone actually asks for detections
+        with _detections_lock:
+            start_job = video_id not in _detections_in_progress
+            _detections_in_progress.add(video_id)
+        if start_job:
+            def run(vid_id, path):
+                try:
+                    compute_detections(vid_id, path)
+                finally:
+                    with _detections_lock:
+                        _detections_in_progress.discard(vid_id)
+
+            background_tasks.add_task(run, video_id, video.filepath)
+        response.status_code = 202
+        return {"status": "processing"}
+
+    return {
+        "status": "ready",
+        "frames": table.slice_time(start, end if end is not None else float("inf")),
+    }
+
 @router.post("")
 def create_video(
     background_tasks: BackgroundTasks,
     title: str = Form(...), 
     file: UploadFile = File(...), 
+    decoder: Optional[str] = Form(None),
     session: Session = Depends(get_session)
 ):
+    from ..ai.decoders import BACKENDS
+    if decoder and decoder not in BACKENDS + ("auto",):
+        raise HTTPException(status_code=400, detail=f"Unknown decoder '{decoder}'")
+
     # Generate unique filename
     file_uuid = str(uuid.uuid4())
     # Keep extension
@@ -50,7 +111,8 @@ def create_video(
     session.commit()
     session.refresh(video)
     
-    # Trigger background processing
+    # Trigger background processing (imported here so the API boots without the AI stack)
+    from ..ai.processor import ingest_video_task
     # Use loop.run_in_executor to avoid blocking main thread with sync CPU work
     import asyncio
     from concurrent.futures import ThreadPoolExecutor
@@ -59,7 +121,7 @@ def create_video(
     async def run_processing_async(vid_id):
         loop = asyncio.get_running_loop()
         # Run in default executor (thread pool)
-        await loop.run_in_executor(None, process_video_task, vid_id)
+        await loop.run_in_executor(None, ingest_video_task, vid_id, decoder)
 
     background_tasks.add_task(run_processing_async, video.id)
     
@@ -89,7 +151,16 @@ def delete_video(video_id: int, session: Session = Depends(get_session)):
             os.remove(video.filepath)
         except Exception as e:
             print(f"Error deleting file: {e}")
+
+    from ..ai.frame_cache import remove_artifacts
+    from ..ai.proxy import remove_proxy
+    remove_artifacts(video_id)
+    remove_proxy(video.filepath)
             
+    from ..ai.index_state import bump_index_version
     session.delete(video)
+    # Cached search results may contain this video. Its cached partition stays keyed by
+    # (id, segments_version); a new video reusing the id gets a newer version on its first bump
+    bump_index_version(session)
     session.commit()
     return {"status": "deleted"}
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks. Run modules directly, e.g. `python -m backend.benchmarks.decode video.mp4`.
+"""
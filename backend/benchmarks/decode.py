@@ -0,0 +1,95 @@
+"""
+Decode Throughput Benchmark
+Measures frames/s of every decoder configuration on the given files, so the
+fastest backend can be picked per container and codec.
+
+Usage:
+    python -m backend.benchmarks.decode static/uploads/match.mp4 [--seconds 30] [--json out.json]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+from ..ai.decoders import open_frame_source, pyav_available
+
+# (label, backend, options)
+CONFIGURATIONS = [
+    ("opencv", "opencv", {}),
+    ("opencv-224", "opencv", {"size": (224, 224)}),
+    ("opencv-keyframes", "opencv", {"keyframes_only": True}),
+    ("pyav-1thread", "pyav", {"threads": 1}),
+    ("pyav-threaded", "pyav", {"threads": 0}),
+    ("pyav-threaded-224-rgb", "pyav", {"threads": 0, "size": (224, 224), "pix_fmt": "rgb24"}),
+    ("pyav-keyframes", "pyav", {"threads": 0, "keyframes_only": True}),
+]
+
+
+def probe(video_path: str) -> Dict:
+    """Container, codec and resolution of a file (PyAV gives the most detail)."""
+    with open_frame_source(video_path, backend="auto") as source:
+        info = {
+            "width": source.width,
+            "height": source.height,
+            "fps": round(source.fps, 3),
+            "container": getattr(source, "container_format", os.path.splitext(video_path)[1].lstrip(".")),
+            "codec": getattr(source, "codec", "unknown"),
+        }
+    return info
+
+
+def measure(video_path: str, backend: str, options: Dict, max_seconds: float) -> Dict:
+    """Decodes up to `max_seconds` of video and returns throughput figures."""
+    frames = 0
+    last_timestamp = 0.0
+    start = time.perf_counter()
+    with open_frame_source(video_path, backend=backend, **options) as source:
+        actual_backend = source.backend
+        for decoded in source.frames():
+            frames += 1
+            last_timestamp = decoded.timestamp
+            if decoded.timestamp >= max_seconds:
+                break
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": actual_backend,
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "frames_per_second": round(frames / elapsed, 1) if elapsed else 0.0,
+        "realtime_factor": round(last_timestamp / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run(video_paths: List[str], max_seconds: float = 30.0) -> List[Dict]:
+    results = []
+    for path in video_paths:
+        info = probe(path)
+        print(f"\n{path}  [{info['container']}/{info['codec']} {info['width']}x{info['height']} @ {info['fps']}fps]")
+        for label, backend, options in CONFIGURATIONS:
+            if backend == "pyav" and not pyav_available():
+                print(f"  {label:<24} skipped (PyAV not installed)")
+                continue
+            stats = measure(path, backend, options, max_seconds)
+            print(f"  {label:<24} {stats['frames_per_second']:>8.1f} frames/s  "
+                  f"{stats['realtime_factor']:>6.2f}x realtime  ({stats['frames']} frames)")
+            results.append({"file": path, "config": label, **info, **stats})
+
+        fastest = max((r for r in results if r["file"] == path and not r["config"].endswith("keyframes")),
+                      key=lambda r: r["frames_per_second"], default=None)
+        if fastest:
+            print(f"  -> Fastest full decode: {fastest['config']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark video decoder backends")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Seconds of video to decode per run")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.videos, args.seconds)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,109 @@
+"""
+Worker Memory Benchmark
+Starts N worker processes that each hold a model and run one forward pass, once
+with every worker loading its own copy and once preloaded in the parent and
+forked (backend.launcher). Reports RSS, PSS and USS per worker: RSS counts
+shared pages in every process, PSS splits them between sharers and USS is what
+a worker costs on its own.
+
+Usage:
+    python -m backend.benchmarks.fork_memory [--model clip] [--workers 4] [--json out.json]
+"""
+import os
+import gc
+import json
+import time
+import argparse
+import multiprocessing as mp
+from typing import Dict, List
+
+from ..ai.registry import registry, current_rss_bytes
+from ..launcher import preload_models, freeze_for_inference, configure_worker_threads
+
+
+def memory_usage(pid: int = None) -> Dict[str, float]:
+    """RSS/PSS/USS in MB from /proc/<pid>/smaps_rollup (Linux)."""
+    pid = pid or os.getpid()
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return {"rss_mb": round(current_rss_bytes() / 2**20, 1), "pss_mb": None, "uss_mb": None}
+    uss = fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    return {"rss_mb": round(fields.get("Rss", 0.0), 1), "pss_mb": round(fields.get("Pss", 0.0), 1),
+            "uss_mb": round(uss, 1)}
+
+
+def _worker(name: str, ready, release):
+    from ..ai.warmup import prime
+
+    configure_worker_threads(1)
+    model = registry.get(name)  # Inherited when preloaded, loaded here otherwise
+    if model is not None:
+        prime(name, model)  # One forward pass, so the pages a real request touches are counted
+    gc.collect()
+    ready.put(os.getpid())
+    release.wait()
+
+
+def run(name: str, workers: int, preloaded: bool) -> Dict:
+    ctx = mp.get_context("fork")
+    if preloaded:
+        freeze_for_inference(preload_models([name]))
+    ready, release = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(name, ready, release)) for _ in range(workers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    pids = [ready.get() for _ in procs]
+    startup = time.perf_counter() - start
+    per_worker = [memory_usage(pid) for pid in pids]
+    release.set()
+    for p in procs:
+        p.join()
+    if preloaded:
+        gc.unfreeze()
+        registry.unload(name)
+
+    def total(key):
+        values = [w[key] for w in per_worker if w[key] is not None]
+        return round(sum(values), 1) if values else None
+
+    return {
+        "mode": "preload-fork" if preloaded else "independent",
+        "workers": workers,
+        "startup_seconds": round(startup, 2),
+        "per_worker": per_worker,
+        "total_rss_mb": total("rss_mb"),
+        "total_pss_mb": total("pss_mb"),
+        "total_uss_mb": total("uss_mb"),
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Per-worker memory with and without preload-then-fork")
+    parser.add_argument("--model", default="clip", choices=["clip", "videomae", "yolo"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    parent = memory_usage()
+    print(f"Parent before loading: {parent['rss_mb']} MB RSS")
+    results = [run(args.model, args.workers, preloaded=False), run(args.model, args.workers, preloaded=True)]
+    for r in results:
+        print(f"\n{r['mode']}: {r['workers']} workers ready in {r['startup_seconds']}s")
+        for i, w in enumerate(r["per_worker"]):
+            print(f"  worker {i}: RSS {w['rss_mb']:>8} MB  PSS {w['pss_mb']} MB  USS {w['uss_mb']} MB")
+        print(f"  total: RSS {r['total_rss_mb']} MB  PSS {r['total_pss_mb']} MB  USS {r['total_uss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
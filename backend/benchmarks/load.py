@@ -0,0 +1,373 @@
+"""
+API Load Test
+Drives backend.main:app in-process with a mixed workload - concurrent searches,
+video listing, progress polling, uploads and deletes - against stub models and a
+throwaway SQLite database, and reports throughput, tail latency and error rates
+per operation.
+
+Search is async: search_clips hands query encoding and scoring to the search
+executor's own pool (ai/search_executor.py). There, identical in-flight searches
+are coalesced and excess ones are shed with 429 + Retry-After. The search numbers
+therefore measure executor latency, and the report counts 429/503 as rejected
+rather than errors. The remaining sync endpoints (list_videos, uploads, ...) run
+on the AnyIO threadpool (--threadpool). Either way a slow request should queue,
+not block the event loop - unless something does CPU or disk work directly on
+the loop. A loop monitor in the server's loop measures scheduling lag. When the
+loop stalls for longer than --block-threshold, it captures the stack that was
+running, so the culprit is named.
+
+Usage:
+    python -m backend.benchmarks.load [--concurrency 32] [--duration 30]
+        [--mix search=60,list=15,progress=15,upload=5,delete=5]
+        [--transport uvicorn|asgi] [--threadpool 40] [--json load.json] [--baseline old.json]
+
+--transport uvicorn (default) serves the app on a loopback socket from a thread,
+so requests go through HTTP parsing and background tasks run after the response
+like in production. --transport asgi uses httpx's ASGI transport without a
+socket; there the upload latency includes the ingest it starts, because the
+transport waits for background tasks to finish.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import traceback
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .suite import SEARCH_QUERIES, Results, compare, _insert_segments, _percentile
+
+OPERATIONS = ("search", "list", "progress", "upload", "delete")
+DEFAULT_MIX = "search=60,list=15,progress=15,upload=5,delete=5"
+
+
+class LoopMonitor:
+    """
+    Heartbeat on an event loop: a coroutine wakes every `interval` and records how
+    late it was, and a watchdog thread snapshots the loop thread's stack whenever
+    the heartbeat is more than `threshold` overdue.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: List[float] = []
+        self.stalls: Counter = Counter()  # Innermost app frame -> times seen blocking
+        self._beat = time.monotonic()
+        self._thread_id: Optional[int] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Must be called from inside the loop to monitor."""
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _heartbeat(self):
+        while not self._stopped.is_set():
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.lags.append(max(0.0, self._beat - start - self.interval))
+
+    def _watchdog(self):
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._beat
+            if beat == reported_beat or time.monotonic() - beat < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stalls[_blocking_site(frame)] += 1
+                reported_beat = beat  # One sample per stall
+
+    def stats(self) -> Dict:
+        lags = self.lags or [0.0]
+        return {
+            "lag_p50_ms": _percentile(lags, 50) * 1000,
+            "lag_p99_ms": _percentile(lags, 99) * 1000,
+            "lag_max_ms": max(lags) * 1000,
+            "stalls": sum(self.stalls.values()),
+            "blocking_sites": self.stalls.most_common(5),
+        }
+
+
+def _blocking_site(frame) -> str:
+    """Innermost frame inside the backend package, else the innermost frame."""
+    stack = traceback.extract_stack(frame)
+    for entry in reversed(stack):
+        if os.sep + "backend" + os.sep in entry.filename and os.sep + "benchmarks" + os.sep not in entry.filename:
+            return f"{entry.filename}:{entry.lineno} in {entry.name}"
+    entry = stack[-1]
+    return f"{entry.filename}:{entry.lineno} in {entry.name}"
+
+
+def _parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation '{name}'")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class Workload:
+    """Shared state of the virtual users: per-operation samples and the videos they uploaded."""
+
+    def __init__(self, client, mix: Dict[str, int], upload_bytes: bytes, seed: int):
+        self.client = client
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.upload_bytes = upload_bytes
+        self.seed = seed
+        self.latencies: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.statuses: Dict[str, Counter] = {name: Counter() for name in OPERATIONS}
+        self.uploaded: List[int] = []
+
+    async def user(self, index: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + index)
+        while time.monotonic() < deadline:
+            op = rng.choices(self.names, self.weights)[0]
+            if op in ("progress", "delete") and not self.uploaded:
+                op = "list"  # Nothing uploaded yet to poll or delete
+            start = time.perf_counter()
+            try:
+                status = await getattr(self, f"_{op}")(rng)
+            except Exception as e:
+                status = type(e).__name__
+            if status is None:
+                continue
+            self.latencies[op].append(time.perf_counter() - start)
+            self.statuses[op][status] += 1
+
+    async def _search(self, rng):
+        response = await self.client.get("/api/clips/search", params={"q": rng.choice(SEARCH_QUERIES)})
+        return response.status_code
+
+    async def _list(self, rng):
+        return (await self.client.get("/api/videos")).status_code
+
+    async def _progress(self, rng):
+        return (await self.client.get(f"/api/videos/{rng.choice(self.uploaded)}")).status_code
+
+    async def _upload(self, rng):
+        response = await self.client.post(
+            "/api/videos", data={"title": "load test"},
+            files={"file": ("load_test.mp4", self.upload_bytes, "video/mp4")})
+        if response.status_code == 200:
+            self.uploaded.append(int(response.json()["id"]))
+        return response.status_code
+
+    async def _delete(self, rng):
+        if not self.uploaded:
+            return None
+        video_id = self.uploaded.pop(rng.randrange(len(self.uploaded)))
+        return (await self.client.delete(f"/api/videos/{video_id}")).status_code
+
+
+def _is_error(status) -> bool:
+    """Transport exceptions and 5xx; 503/429 are load shedding and reported separately."""
+    return not isinstance(status, int) or (status >= 500 and status != 503)
+
+
+def _is_rejected(status) -> bool:
+    return status in (429, 503)
+
+
+def report(results: Results, workload: Workload, elapsed: float, monitor: LoopMonitor):
+    total = 0
+    for op in OPERATIONS:
+        samples = workload.latencies[op]
+        if not samples:
+            continue
+        statuses = workload.statuses[op]
+        total += len(samples)
+        errors = sum(n for s, n in statuses.items() if _is_error(s))
+        rejected = sum(n for s, n in statuses.items() if _is_rejected(s))
+        results.add(f"load.{op}.requests_per_second", len(samples) / elapsed, "req/s", "higher")
+        results.add(f"load.{op}.p50_ms", _percentile(samples, 50) * 1000, "ms", "lower")
+        results.add(f"load.{op}.p99_ms", _percentile(samples, 99) * 1000, "ms", "lower")
+        results.add(f"load.{op}.max_ms", max(samples) * 1000, "ms", "lower")
+        results.add(f"load.{op}.error_rate", errors / len(samples), "", "lower")
+        results.add(f"load.{op}.rejected_rate", rejected / len(samples), "", "lower")
+        print(f"    statuses: {dict(statuses)}")
+    results.add("load.total.requests_per_second", total / elapsed, "req/s", "higher")
+
+    loop = monitor.stats()
+    results.add("loop.lag_p99_ms", loop["lag_p99_ms"], "ms", "lower")
+    results.add("loop.lag_max_ms", loop["lag_max_ms"], "ms", "lower")
+    results.add("loop.stalls", loop["stalls"], "stalls", "lower")
+    if loop["blocking_sites"]:
+        print(f"\n  Event loop blocked > {monitor.threshold * 1000:.0f} ms at:")
+        for site, count in loop["blocking_sites"]:
+            print(f"    {count:>4}x {site}")
+
+
+# --- Transports ---
+
+def _install_hooks(app, monitor: LoopMonitor, threadpool: int):
+    """Startup hook that runs inside the serving loop: sizes the threadpool and starts the monitor."""
+
+    async def start_monitor():
+        if threadpool:
+            import anyio.to_thread
+            anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool
+        monitor.start()
+
+    app.router.add_event_handler("startup", start_monitor)
+    app.router.add_event_handler("shutdown", monitor.stop)
+
+
+async def _run_asgi(app, run):
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            return await run(client)
+
+
+def _run_uvicorn(app, run):
+    import httpx
+    import uvicorn
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    # Long keep-alive: the client reuses connections, and a server-side close mid-reuse reads as an error
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on", backlog=4096,
+                                           timeout_keep_alive=300))
+    server.install_signal_handlers = lambda: None  # Serving from a non-main thread
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+
+    async def client_side():
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            return await run(client)
+
+    try:
+        return asyncio.run(client_side())
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mixed-workload load test of the API with stub models")
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users sending requests back to back")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--transport", choices=("uvicorn", "asgi"), default="uvicorn")
+    parser.add_argument("--threadpool", type=int, default=0, help="AnyIO threadpool size for sync (non-search) endpoints (0 = default 40)")
+    parser.add_argument("--segments", type=int, default=10_000, help="Pre-indexed segments searched by every query")
+    parser.add_argument("--upload-seconds", type=float, default=4.0, help="Length of the uploaded synthetic video")
+    parser.add_argument("--block-threshold", type=float, default=0.1, help="Loop stall (s) that captures a stack")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Keep the DB/uploads here instead of a temp dir")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json output")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    try:
+        mix = _parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    # Resolved before moving into the work dir
+    json_path = args.json and os.path.abspath(args.json)
+    baseline_path = args.baseline and os.path.abspath(args.baseline)
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="tacsearch-load-"))
+    for sub in ("static/uploads", "uploads"):
+        os.makedirs(os.path.join(workdir, sub), exist_ok=True)
+    # The app mounts static/ and uploads/ relative to the cwd; DB and artifacts go to the work dir too
+    os.environ["TACSEARCH_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ["TACSEARCH_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        workload, elapsed, monitor = _load_test(args, mix, workdir)
+    finally:
+        os.chdir(cwd)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = Results()
+    print()
+    report(results, workload, elapsed, monitor)
+
+    report_dict = results.to_dict(args)
+    report_dict["meta"]["blocking_sites"] = monitor.stats()["blocking_sites"]
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report_dict, f, indent=2)
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(report_dict, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+def _load_test(args, mix: Dict[str, int], workdir: str):
+    """Seeds the index, starts the app and runs the virtual users; returns (workload, seconds, monitor)."""
+    from .stubs import install_stub_models
+    from .synthetic import generate_match_video
+    from ..database import create_db_and_tables
+    from .. import models  # noqa: F401 - registers the tables with create_db_and_tables
+
+    create_db_and_tables()
+    install_stub_models()
+    print(f"Indexing {args.segments} synthetic segments...")
+    _insert_segments(args.segments, videos=max(1, args.segments // 10_000), seed=args.seed)
+    upload_path = generate_match_video(os.path.join(workdir, "upload.mp4"), args.upload_seconds, 640, 360,
+                                       seed=args.seed)
+    with open(upload_path, "rb") as f:
+        upload_bytes = f.read()
+
+    from ..main import app
+    # The app configures INFO logging on import; per-request ingest lines would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+    monitor = LoopMonitor(threshold=args.block_threshold)
+    _install_hooks(app, monitor, args.threadpool)
+
+    async def run(client):
+        workload = Workload(client, mix, upload_bytes, args.seed)
+        print(f"Running {args.concurrency} users for {args.duration:.0f}s over {args.transport} ({args.mix})")
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(workload.user(i, deadline) for i in range(args.concurrency)))
+        return workload, time.monotonic() - start
+
+    if args.transport == "asgi":
+        workload, elapsed = asyncio.run(_run_asgi(app, run))
+    else:
+        workload, elapsed = _run_uvicorn(app, run)
+    return workload, elapsed, monitor
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+ONNX Parity and Throughput Check
+Loads CLIP and VideoMAE with both backends, compares outputs on the same inputs
+and reports CPU throughput.
+
+Usage:
+    python -m backend.benchmarks.onnx_parity [--int8] [--runs 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ..ai import onnx_backend
+
+
+def _timed(fn, runs: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def run(runs: int = 20):
+    from ..ai.clip_search import CLIPSearchEngine
+    from ..ai.football_model import FootballActionModel
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    clip_frames = [frame] * 16
+
+    torch_clip = CLIPSearchEngine(backend="torch")
+    onnx_clip = CLIPSearchEngine(backend="onnx")
+    print("\nCLIP")
+    print(f"  text parity cosine:  {onnx_backend.cosine(torch_clip.get_text_embedding('goal'), onnx_clip.get_text_embedding('goal')):.5f}")
+    print(f"  image parity cosine: {onnx_backend.cosine(torch_clip.embed_frame(frame), onnx_clip.embed_frame(frame)):.5f}")
+    for name, engine in (("torch", torch_clip), ("onnx", onnx_clip)):
+        text_ms = _timed(lambda: engine.get_text_embedding("goal scored"), runs) * 1000
+        image_ms = _timed(lambda: engine.embed_frames(clip_frames), max(1, runs // 4)) * 1000 / len(clip_frames)
+        print(f"  {name:<6} text {text_ms:7.1f} ms/query   image {image_ms:7.1f} ms/frame")
+
+    torch_mae = FootballActionModel(backend="torch")
+    onnx_mae = FootballActionModel(backend="onnx")
+    print("\nVideoMAE")
+    print(f"  embedding parity cosine: "
+          f"{onnx_backend.cosine(torch_mae.get_action_embedding(clip_frames), onnx_mae.get_action_embedding(clip_frames)):.5f}")
+    for name, model in (("torch", torch_mae), ("onnx", onnx_mae)):
+        clip_ms = _timed(lambda: model.get_action_embedding(clip_frames), max(1, runs // 4)) * 1000
+        print(f"  {name:<6} {clip_ms:7.1f} ms/16-frame clip")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX Runtime backends")
+    parser.add_argument("--int8", action="store_true", help="Use dynamic int8 quantized graphs")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    onnx_backend.ONNX_QUANTIZE = args.int8
+    run(args.runs)
@@ -0,0 +1,142 @@
+"""
+Stub Models
+Deterministic stand-ins for CLIP, VideoMAE and YOLO with the same methods the
+backend calls. They do real (NumPy) work proportional to their input - a fixed
+random projection of the downscaled pixels - so throughput numbers move with
+frame counts and batch sizes, and can add a per-call cost to mimic a model.
+No weights, no downloads, identical output on every run.
+
+    from backend.benchmarks.stubs import install_stub_models
+    install_stub_models()          # registry now serves the stubs
+"""
+import time
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+CLIP_DIM = 512
+VIDEOMAE_DIM = 768
+STUB_INPUT = 32  # Pixels per side the stubs look at
+
+
+def _features(frames: List[np.ndarray]) -> np.ndarray:
+    """(n, STUB_INPUT*STUB_INPUT*3) float features; nearest-neighbour downscale without OpenCV."""
+    out = np.empty((len(frames), STUB_INPUT * STUB_INPUT * 3), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        ys = np.linspace(0, h - 1, STUB_INPUT).astype(int)
+        xs = np.linspace(0, w - 1, STUB_INPUT).astype(int)
+        out[i] = frame[ys][:, xs].reshape(-1) / 255.0
+    return out
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    return x / (np.linalg.norm(x, axis=-1, keepdims=True) + 1e-9)
+
+
+def _spin(seconds: float):
+    """Busy-wait (not sleep) so the cost shows up as CPU like real inference."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class StubCLIP:
+    def __init__(self, text_cost_ms: float = 2.0, image_cost_ms: float = 4.0, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.model_id = "stub-clip"
+        self.projection = rng.standard_normal((STUB_INPUT * STUB_INPUT * 3, CLIP_DIM)).astype(np.float32)
+        self.text_cost = text_cost_ms / 1000
+        self.image_cost = image_cost_ms / 1000
+
+    def get_text_embedding(self, text: str):
+        return self.get_text_embeddings([text])[0]
+
+    def get_text_embeddings(self, texts):
+        _spin(self.text_cost * len(texts))
+        vectors = [np.random.default_rng(zlib.crc32(t.encode())).standard_normal(CLIP_DIM) for t in texts]
+        return _normalise(np.array(vectors, dtype=np.float32)).tolist()
+
+    def embed_frame(self, frame):
+        return self.embed_frames([frame])[0]
+
+    def embed_frames(self, frames, batch_size: int = 32, rgb: bool = False):
+        _spin(self.image_cost * len(frames))
+        return _normalise(_features(frames) @ self.projection).tolist()
+
+
+class StubActionModel:
+    LABELS = ("playing soccer", "kicking soccer ball", "running", "jumping", "celebrating")
+
+    def __init__(self, cost_ms: float = 40.0, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.projection = rng.standard_normal((STUB_INPUT * STUB_INPUT * 3, VIDEOMAE_DIM)).astype(np.float32)
+        self.classifier = rng.standard_normal((VIDEOMAE_DIM, len(self.LABELS))).astype(np.float32)
+        self.cost = cost_ms / 1000
+
+    def is_loaded(self) -> bool:
+        return True
+
+    def analyze_actions(self, clips: List[List[np.ndarray]], top_k: int = 5) -> List[tuple]:
+        _spin(self.cost * len(clips))
+        results = []
+        for frames in clips:
+            embedding = _normalise(_features(frames).mean(axis=0) @ self.projection)
+            logits = embedding @ self.classifier
+            probs = np.exp(logits - logits.max())
+            probs /= probs.sum()
+            scores = {self.LABELS[i]: float(probs[i]) for i in np.argsort(-probs)[:top_k]}
+            results.append((embedding.tolist(), scores))
+        return results
+
+    def analyze_action(self, frames: List[np.ndarray], top_k: int = 5) -> tuple:
+        return self.analyze_actions([frames], top_k)[0]
+
+    def get_action_embedding(self, frames: List[np.ndarray]):
+        return self.analyze_action(frames)[0]
+
+    def classify_action(self, frames: List[np.ndarray], top_k: int = 5) -> Dict[str, float]:
+        return self.analyze_action(frames, top_k)[1]
+
+
+class StubYOLO:
+    """Boxes at fixed pseudo-random spots seeded by the frame content."""
+
+    def __init__(self, cost_ms: float = 8.0, detections: int = 20):
+        self.cost = cost_ms / 1000
+        self.detections = detections
+
+    def detect_batch(self, frames: List[np.ndarray], batch_size: int = 16):
+        _spin(self.cost * len(frames))
+        results = []
+        for feature in _features(frames):
+            rng = np.random.default_rng(int(feature.sum() * 1000) % 2**32)
+            centres = rng.uniform(0.05, 0.95, size=(self.detections, 2))
+            sizes = rng.uniform(0.01, 0.05, size=(self.detections, 2))
+            boxes = np.concatenate([centres - sizes, centres + sizes], axis=1).clip(0, 1).astype(np.float32)
+            classes = np.zeros(self.detections, dtype=np.uint8)
+            classes[-1] = 32  # One ball
+            scores = rng.uniform(0.3, 0.95, size=self.detections).astype(np.float32)
+            results.append((boxes, classes, scores))
+        return results
+
+    def count_players(self, frame) -> int:
+        return len(self.detect_batch([frame])[0][0])
+
+    @staticmethod
+    def track(table):
+        from ..ai.yolo_tracker import YOLOTracker
+        return YOLOTracker.track(table)
+
+
+def install_stub_models(text_cost_ms: float = 2.0, image_cost_ms: float = 4.0,
+                        action_cost_ms: float = 40.0, yolo_cost_ms: float = 8.0):
+    """Replaces the registry's loaders so every caller gets the stubs."""
+    from ..ai.registry import registry
+
+    for name in ("clip", "videomae", "yolo"):
+        registry.unload(name)
+    registry.register("clip", lambda: StubCLIP(text_cost_ms, image_cost_ms))
+    registry.register("videomae", lambda: StubActionModel(action_cost_ms))
+    registry.register("yolo", lambda: StubYOLO(yolo_cost_ms))
@@ -0,0 +1,282 @@
+"""
+Benchmark Suite
+Reproducible, offline throughput numbers: a synthetic match video, stub models
+and a throwaway database, so runs need no downloads and no real footage.
+
+Scenarios:
+    decode   frames/s of each decoder backend on the synthetic video
+    ingest   process_video_task frames/s and realtime factor with stub models
+    db       segment insert rate through the ORM, like ingest writes them
+    search   search_video p50/p99 latency (and search_batch of all queries) against
+             synthetic indexes of N segments
+
+Usage:
+    python -m backend.benchmarks.suite [--scenarios decode,ingest,db,search]
+        [--segments 10000,100000] [--json results.json] [--baseline baseline.json]
+
+With --baseline, metrics that got worse by more than --tolerance (default 10%)
+are listed and the exit code is 1, so the suite can gate changes.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+from typing import Dict, List
+
+SCENARIOS = ("decode", "ingest", "db", "search")
+SEARCH_QUERIES = ("goal", "shot", "corner", "foul", "save", "pass", "header", "tackle")
+EMBEDDING_DIM = 512
+
+
+class Results:
+    """Flat metric name -> {value, unit, better} with the direction used for regressions."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str):
+        self.metrics[name] = {"value": round(float(value), 4), "unit": unit, "better": better}
+        print(f"  {name:<40} {value:>12.2f} {unit}")
+
+    def to_dict(self, args) -> Dict:
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": vars(args),
+            },
+            "metrics": self.metrics,
+        }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _create_video(session, path: str, title: str):
+    from ..models import Video
+
+    video = Video(title=title, filename=os.path.basename(path), filepath=path)
+    session.add(video)
+    session.commit()
+    session.refresh(video)
+    return video
+
+
+# --- Scenarios ---
+
+def bench_decode(results: Results, video_path: str, seconds: float):
+    from .decode import measure
+    from ..ai.decoders import pyav_available
+
+    for label, backend, options in (("opencv", "opencv", {}), ("opencv-224", "opencv", {"size": (224, 224)}),
+                                    ("pyav", "pyav", {"threads": 0})):
+        if backend == "pyav" and not pyav_available():
+            continue
+        stats = measure(video_path, backend, options, seconds)
+        results.add(f"decode.{label}.frames_per_second", stats["frames_per_second"], "frames/s", "higher")
+
+
+def bench_ingest(results: Results, video_path: str, seconds: float):
+    from sqlmodel import Session, select
+    from ..database import engine
+    from ..models import Video, VideoSegment
+    from ..ai.processor import process_video_task
+
+    with Session(engine) as session:
+        video_id = _create_video(session, video_path, "benchmark ingest").id
+    start = time.perf_counter()
+    process_video_task(video_id)
+    elapsed = time.perf_counter() - start
+    with Session(engine) as session:
+        segments = len(session.exec(select(VideoSegment.id).where(VideoSegment.video_id == video_id)).all())
+        memory = (session.get(Video, video_id).metadata_info or {}).get("ingest_memory", {})
+    fps = _probe_fps(video_path)
+    results.add("ingest.frames_per_second", seconds * fps / elapsed, "frames/s", "higher")
+    results.add("ingest.realtime_factor", seconds / elapsed, "x", "higher")
+    results.add("ingest.segments", segments, "segments", "higher")
+    if memory:
+        results.add("ingest.peak_rss_growth_mb", memory["peak_growth_mb"], "MB", "lower")
+
+
+def _probe_fps(video_path: str) -> float:
+    from ..ai.decoders import open_frame_source
+    with open_frame_source(video_path) as source:
+        return source.fps
+
+
+def _insert_segments(count: int, videos: int, seed: int, batch: int = 1000) -> float:
+    """Adds `count` random segments spread over `videos` new videos; returns rows/s."""
+    import numpy as np
+    from sqlmodel import Session
+    from ..database import engine
+    from ..models import VideoSegment
+
+    rng = np.random.default_rng(seed)
+    with Session(engine) as session:
+        video_ids = [_create_video(session, f"synthetic_{seed}_{v}.mp4", f"synthetic {seed}/{v}").id
+                     for v in range(videos)]
+    per_video = max(1, count // videos)
+    start = time.perf_counter()
+    written = 0
+    with Session(engine) as session:
+        while written < count:
+            n = min(batch, count - written)
+            vectors = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            for i in range(n):
+                index = written + i
+                t = (index % per_video) * 0.5
+                session.add(VideoSegment(video_id=video_ids[min(index // per_video, videos - 1)],
+                                         start_time=t, end_time=t + 15.0,
+                                         embedding=vectors[i].tolist(), text_description="synthetic"))
+            session.commit()
+            written += n
+    return count / (time.perf_counter() - start)
+
+
+def bench_db(results: Results, rows: int):
+    results.add("db.segment_inserts_per_second", _insert_segments(rows, videos=1, seed=1), "rows/s", "higher")
+
+
+def bench_search(results: Results, sizes: List[int], repeats: int):
+    from sqlmodel import Session
+    from sqlalchemy import delete
+    from ..database import engine
+    from ..models import VideoSegment
+    from ..ai.search import search_video, search_batch, _result_cache
+
+    with Session(engine) as session:
+        session.execute(delete(VideoSegment))
+        session.commit()
+    indexed = 0
+    for size in sorted(sizes):
+        if size > 1_000_000:
+            print(f"  (search over {size} segments stores ~{size * 10 // 2**20} GB of JSON embeddings)")
+        # Grow the index incrementally; ~90 minutes of segments per video
+        _insert_segments(size - indexed, videos=max(1, (size - indexed) // 10_000), seed=size)
+        indexed = size
+        search_video(SEARCH_QUERIES[0], threshold=0.05)  # Warm caches, as in steady state
+        latencies, cached, batched = [], [], []
+        for _ in range(repeats):
+            for query in SEARCH_QUERIES:
+                # Scored from the (warm) per-video partitions, then answered from the result cache
+                _result_cache.clear()
+                for samples in (latencies, cached):
+                    start = time.perf_counter()
+                    search_video(query, threshold=0.05)
+                    samples.append((time.perf_counter() - start) * 1000)
+            # All queries at once, as a match report asks for them
+            _result_cache.clear()
+            start = time.perf_counter()
+            search_batch(list(SEARCH_QUERIES), threshold=0.05)
+            batched.append((time.perf_counter() - start) * 1000)
+        results.add(f"search.{size}.p50_ms", _percentile(latencies, 50), "ms", "lower")
+        results.add(f"search.{size}.p99_ms", _percentile(latencies, 99), "ms", "lower")
+        results.add(f"search.{size}.cached_p50_ms", _percentile(cached, 50), "ms", "lower")
+        results.add(f"search.{size}.batch_{len(SEARCH_QUERIES)}_p50_ms", _percentile(batched, 50), "ms", "lower")
+
+
+# --- Baseline comparison ---
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Names (with old -> new) of metrics that regressed by more than `tolerance`."""
+    regressions = []
+    for name, metric in current["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = -change if metric["better"] == "higher" else change
+        if worse > tolerance:
+            regressions.append(f"{name}: {base['value']} -> {metric['value']} {metric['unit']} ({worse:+.1%} worse)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline ingest and search benchmarks with stub models")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--video-seconds", type=float, default=30.0, help="Length of the synthetic video")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--db-rows", type=int, default=5000, help="Rows for the insert-rate scenario")
+    parser.add_argument("--segments", default="10000", help="Comma separated index sizes for search")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs of each query per index size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Keep the synthetic video/DB here instead of a temp dir")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json output")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tacsearch-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    # Everything the backend writes goes to the work dir; must happen before backend.database is imported
+    os.environ["TACSEARCH_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["TACSEARCH_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    logging.basicConfig(level=logging.WARNING)
+
+    from .stubs import install_stub_models
+    from .synthetic import generate_match_video
+    from ..database import create_db_and_tables
+    from .. import models  # noqa: F401 - registers the tables with create_db_and_tables
+
+    create_db_and_tables()
+    install_stub_models()
+    video_path = os.path.join(workdir, f"synthetic_{args.width}x{args.height}_{int(args.video_seconds)}s.mp4")
+    if {"decode", "ingest"} & set(scenarios) and not os.path.exists(video_path):
+        generate_match_video(video_path, args.video_seconds, args.width, args.height, seed=args.seed)
+
+    results = Results()
+    try:
+        if "decode" in scenarios:
+            print("\n[decode]")
+            bench_decode(results, video_path, args.video_seconds)
+        if "ingest" in scenarios:
+            print("\n[ingest]")
+            bench_ingest(results, video_path, args.video_seconds)
+        if "db" in scenarios:
+            print("\n[db]")
+            bench_db(results, args.db_rows)
+        if "search" in scenarios:
+            print("\n[search]")
+            bench_search(results, [int(s) for s in args.segments.split(",") if s.strip()], args.repeats)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = results.to_dict(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import sys
+import os
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import Session, select
+from backend.database import engine
+from backend.models import Video
+from backend.ai.frame_cache import FrameCache, build_frame_cache
+
+def build_all(force: bool = False):
+    """
+    Writes the downscaled frame cache for every uploaded video, so later
+    re-analysis passes and experiments read frames from the memory map
+    instead of decoding the original file again.
+    """
+    with Session(engine) as session:
+        videos = session.exec(select(Video)).all()
+        for video in videos:
+            if FrameCache(video.id).exists() and not force:
+                print(f"  -> Skipping '{video.title}' (cache exists)")
+                continue
+            if not os.path.exists(video.filepath):
+                print(f"  -> Skipping '{video.title}' (file missing)")
+                continue
+            print(f"Building frame cache for '{video.title}'...")
+            cache = build_frame_cache(video.id, video.filepath)
+            print(f"  -> {len(cache)} frames at {cache.size}px")
+
+if __name__ == "__main__":
+    build_all(force="--force" in sys.argv)
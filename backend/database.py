@@ -1,13 +1,58 @@
+import os
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import inspect, text
 
 sqlite_file_name = "tacsearch_v2.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+# TACSEARCH_DATABASE_URL points benchmarks and load tests at a throwaway database
+sqlite_url = os.environ.get("TACSEARCH_DATABASE_URL", f"sqlite:///{sqlite_file_name}")
 
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, echo=False, connect_args=connect_args)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    _add_missing_indexes()
+
+def _add_missing_columns():
+    """
+    create_all() does not alter existing tables, so columns added to the models
+    later are appended here (nullable, so old rows stay valid).
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}{_default_clause(column)}'
+                ))
+
+def _add_missing_indexes():
+    """Same for indexes: create_all() skips the indexes of tables that already exist."""
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def _default_clause(column) -> str:
+    """SQL DEFAULT for scalar model defaults, so existing rows get the same value as new ones."""
+    if column.default is None or not column.default.is_scalar:
+        return ""
+    value = column.default.arg
+    if isinstance(value, bool):
+        return f" DEFAULT {int(value)}"
+    if isinstance(value, (int, float)):
+        return f" DEFAULT {value}"
+    if isinstance(value, str):
+        escaped = value.replace("'", "''")
+        return f" DEFAULT '{escaped}'"
+    return ""
 
 def get_session():
     with Session(engine) as session:
@@ -0,0 +1,169 @@
+"""
+Preload-then-fork Launcher
+Loads the models once in a parent process, freezes them for inference and forks
+the API workers, so read-only weights are shared copy-on-write instead of being
+loaded again by every worker. A lighter alternative to the shared inference
+server for small deployments.
+
+    python -m backend.launcher --workers 4 --preload clip,videomae --port 8000
+
+Run from the repository root, like `uvicorn backend.main:app`. Ingest jobs run
+inside the API workers (as background tasks), so they use the shared weights too.
+"""
+import os
+import gc
+import sys
+import signal
+import socket
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+LAUNCHER_WORKERS = int(os.environ.get("TACSEARCH_WORKERS", "2"))
+LAUNCHER_PRELOAD = os.environ.get("TACSEARCH_PRELOAD", "clip")
+WORKER_THREADS = int(os.environ.get("TACSEARCH_WORKER_THREADS", "0"))  # 0 = cores / workers
+
+
+def preload_models(names: List[str]) -> Dict[str, object]:
+    """
+    Loads models through the registry in the parent. Torch runs single-threaded here:
+    a parent that has spun up an OpenMP pool can deadlock its forked children.
+    """
+    from .ai.registry import registry
+
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    # Children must not unload inherited models: that frees nothing shared and forces a private reload
+    registry.idle_seconds = 0
+    models = {}
+    for name in names:
+        model = registry.get(name)
+        if model is None:
+            logger.error(f"[Launcher] {name} failed to preload, workers will load it lazily")
+            continue
+        models[name] = model
+    return models
+
+
+def freeze_for_inference(models: Dict[str, object]):
+    """
+    Puts every torch module in eval mode without autograd, then moves all live Python
+    objects into the GC's permanent generation so collections in the children do not
+    write to (and thereby copy) the pages holding them.
+    """
+    for model in models.values():
+        for value in vars(model).values():
+            for module in (value, getattr(value, "model", None)):
+                if hasattr(module, "eval") and hasattr(module, "parameters"):
+                    module.eval()
+                    for param in module.parameters():
+                        param.requires_grad_(False)
+    gc.collect()
+    gc.freeze()
+
+
+def configure_worker_threads(threads: int):
+    """Per-child torch thread pools, created after fork."""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(max(1, threads))
+    try:
+        torch.set_num_interop_threads(max(1, threads // 2))
+    except RuntimeError:
+        pass  # Already fixed in this process; intra-op threads are what matter for inference
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, threads: int):
+    import uvicorn
+
+    configure_worker_threads(threads)
+    config = uvicorn.Config("backend.main:app", log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            _run_worker(sock, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(workers: int = LAUNCHER_WORKERS, preload: Optional[List[str]] = None,
+          host: str = "0.0.0.0", port: int = 8000, threads: int = WORKER_THREADS):
+    """Preloads, forks `workers` API processes sharing one listening socket and restarts crashed ones."""
+    preload = [m.strip() for m in LAUNCHER_PRELOAD.split(",") if m.strip()] if preload is None else preload
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    import backend.main  # noqa: F401  (imported once here so the children share it too)
+    models = preload_models(preload)
+    freeze_for_inference(models)
+    sock = _bind(host, port)
+    logger.info(f"[Launcher] Preloaded {sorted(models)}; forking {workers} workers "
+                f"({threads} torch threads each) on {host}:{port}")
+
+    children = {_fork_worker(sock, threads) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            logger.warning(f"[Launcher] Worker {pid} exited ({status}), restarting")
+            children.add(_fork_worker(sock, threads))
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preload models, then fork API workers")
+    parser.add_argument("--workers", type=int, default=LAUNCHER_WORKERS)
+    parser.add_argument("--preload", default=LAUNCHER_PRELOAD, help="Comma separated: clip,videomae,yolo")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS, help="Torch threads per worker")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    preload = [m.strip() for m in args.preload.split(",") if m.strip()]
+    serve(args.workers, preload, args.host, args.port, args.threads)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
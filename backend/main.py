@@ -1,7 +1,13 @@
+import os
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .database import create_db_and_tables
-from .api import videos, clips, auth
+from .api import videos, clips, auth, system
+
+# Leveled logging for the backend (ingest progress, model loading); DEBUG adds per-sample lines
+logging.basicConfig(level=os.environ.get("TACSEARCH_LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 app = FastAPI()
 
@@ -32,9 +38,16 @@ def on_startup():
     print("Serving static files from /static")
     create_db_and_tables()
 
+    from .ai.registry import registry
+    registry.start_janitor()
+
+    from .ai.warmup import start_warmup
+    start_warmup()
+
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(videos.router, prefix="/api/videos", tags=["videos"])
 app.include_router(clips.router, prefix="/api/clips", tags=["clips"])
+app.include_router(system.router, prefix="/api", tags=["system"])
 
 @app.get("/api/health")
 def health_check():
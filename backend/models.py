@@ -1,7 +1,7 @@
 from typing import Optional, List
 from datetime import datetime, timezone
 from sqlmodel import Field, SQLModel, Relationship, JSON
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 
 class VideoBase(SQLModel):
     title: str
@@ -11,22 +11,33 @@ class VideoBase(SQLModel):
     processed: bool = False
     processing_progress: float = Field(default=0.0, alias="processingProgress")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), alias="createdAt")
-    match_id: Optional[str] = Field(default=None, alias="matchId")
+    match_id: Optional[str] = Field(default=None, alias="matchId", index=True)  # Search filter
+    proxy_path: Optional[str] = Field(default=None, alias="proxyPath")  # Low-res rendition used for analysis
+    index_tier: str = Field(default="none", alias="indexTier")  # Searchable index: "none", "preliminary" or "full"
 
 class Video(VideoBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    segments_version: int = 0  # Index version of the last change to this video's searchable segments
     clips: List["Clip"] = Relationship(back_populates="video")
     segments: List["VideoSegment"] = Relationship(back_populates="video")
 
 class VideoSegment(SQLModel, table=True):
+    # Search reads one video's segments in time order (per-video partitions, time windows)
+    __table_args__ = (Index("ix_videosegment_video_id_start_time", "video_id", "start_time"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     video_id: int = Field(foreign_key="video.id", alias="videoId")
     start_time: float = Field(alias="startTime")
     end_time: float = Field(alias="endTime")
     embedding: List[float] = Field(sa_column=Column(JSON))
     text_description: Optional[str] = None
+    tier: str = "full"  # "preliminary" (keyframe CLIP quick index), "staging" (full pass in progress) or "full"
     video: Optional[Video] = Relationship(back_populates="segments")
 
+class IndexState(SQLModel, table=True):
+    """Single row whose version increments whenever the searchable segments change."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = 0
+
 class ClipBase(SQLModel):
     video_id: int = Field(foreign_key="video.id", alias="videoId")
     start_time: float = Field(alias="startTime")
@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ai.model_store import MODEL_STORE_DIR, fetch_pretrained, resolve_yolo
+
+CLIP_MODEL = "openai/clip-vit-base-patch16"
+VIDEOMAE_MODEL = "MCG-NJU/videomae-base-finetuned-kinetics"
+YOLO_MODEL = "yolov8n.pt"
+
+def prepare_all():
+    """
+    Downloads CLIP, VideoMAE and YOLO once into the local model store, so the
+    backend can run with TACSEARCH_OFFLINE=1 and load weights memory-mapped.
+    """
+    from transformers import CLIPModel, CLIPProcessor, VideoMAEForVideoClassification, VideoMAEImageProcessor
+
+    print(f"Preparing model store in {MODEL_STORE_DIR}...")
+    print(f"  -> {fetch_pretrained(CLIP_MODEL, CLIPModel, CLIPProcessor)}")
+    print(f"  -> {fetch_pretrained(VIDEOMAE_MODEL, VideoMAEForVideoClassification, VideoMAEImageProcessor)}")
+    print(f"  -> {resolve_yolo(YOLO_MODEL)}")
+
+if __name__ == "__main__":
+    prepare_all()
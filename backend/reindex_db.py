@@ -39,6 +39,8 @@ def reset_analysis():
             session.add(video)
             print(f"  -> Reset '{video.title}'")
             
+        from backend.ai.index_state import bump_index_version
+        bump_index_version(session, all_videos=True)
         session.commit()
         print("Database reset complete. Please restart the backend and re-process your videos.")
 
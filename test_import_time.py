@@ -0,0 +1,53 @@
+"""
+Import-time check for the API: `import backend.main` must not pull in the ML stack
+(torch, transformers, ultralytics, OpenCV, ONNX Runtime, PyAV). Those are only
+imported when a model or decoder is first used. The import time is reported, not
+asserted: FastAPI and SQLAlchemy dominate it and it varies too much across machines.
+
+Run with `python test_import_time.py` or `pytest test_import_time.py`.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("torch", "transformers", "ultralytics", "cv2", "onnxruntime", "av")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import():
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        # main.py mounts these at import time and creates the SQLite file in the cwd
+        os.makedirs(os.path.join(workdir, "static"))
+        os.makedirs(os.path.join(workdir, "uploads"))
+        env = dict(os.environ, PYTHONPATH=repo + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_no_heavy_modules(report):
+    assert not report["loaded"], f"backend.main imported heavy modules: {report['loaded']}"
+
+
+def test_import_time():
+    report = measure_import()
+    print(f"import backend.main: {report['seconds']:.3f}s")
+    check_no_heavy_modules(report)
+
+
+if __name__ == "__main__":
+    report = measure_import()
+    print(f"import backend.main: {report['seconds']:.3f}s")
+    print(f"heavy modules loaded: {report['loaded'] or 'none'}")
+    check_no_heavy_modules(report)
+    print("OK")
@@ -0,0 +1,72 @@
+"""
+Ingest memory budget: with default settings (no YOLO at ingest) the governor must
+still bound what ingest holds, by shrinking the VideoMAE/CLIP embedding batch.
+Runs process_video_task with the benchmark stub models on a short synthetic video.
+
+Run with `python test_ingest_memory.py` or `pytest test_ingest_memory.py`.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import collections, json, os
+from backend.benchmarks.stubs import install_stub_models, StubActionModel
+from backend.benchmarks.synthetic import generate_match_video
+install_stub_models()
+batches = collections.Counter()
+analyze_actions = StubActionModel.analyze_actions
+def counting(self, clips, top_k=5):
+    batches[len(clips)] += 1
+    return analyze_actions(self, clips, top_k)
+StubActionModel.analyze_actions = counting
+
+from sqlmodel import Session, select
+from backend.database import create_db_and_tables, engine
+from backend.models import Video, VideoSegment
+from backend.ai.processor import process_video_task
+create_db_and_tables()
+generate_match_video("match.mp4", seconds=6)
+with Session(engine) as session:
+    video = Video(title="memory", filename="match.mp4", filepath=os.path.abspath("match.mp4"))
+    session.add(video)
+    session.commit()
+    video_id = video.id
+process_video_task(video_id)
+with Session(engine) as session:
+    segments = len(session.exec(select(VideoSegment.id).where(VideoSegment.video_id == video_id)).all())
+print(json.dumps({"batches": {str(k): v for k, v in batches.items()}, "segments": segments}))
+"""
+
+
+def run_ingest(budget_mb: float):
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ,
+                   PYTHONPATH=repo + os.pathsep + os.environ.get("PYTHONPATH", ""),
+                   TACSEARCH_DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'test.db')}",
+                   TACSEARCH_ARTIFACT_DIR=os.path.join(workdir, "artifacts"),
+                   TACSEARCH_DETECT_AT_INGEST="0",
+                   TACSEARCH_INGEST_EMBED_BATCH="4",
+                   TACSEARCH_INGEST_MEMORY_BUDGET_MB=str(budget_mb),
+                   TACSEARCH_MEMORY_SAMPLE_INTERVAL="0.01")
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_budget_shrinks_embedding_batches():
+    unbounded = run_ingest(0)
+    # 1 MB is always exceeded, so the governor halves the batch down to a single clip
+    squeezed = run_ingest(1)
+    assert max(int(size) for size in unbounded["batches"]) == 4, unbounded
+    assert max(int(size) for size in squeezed["batches"]) < 4, squeezed
+    assert "1" in squeezed["batches"], squeezed
+    assert squeezed["segments"] == unbounded["segments"]
+
+
+if __name__ == "__main__":
+    test_budget_shrinks_embedding_batches()
+    print("OK")
@@ -0,0 +1,56 @@
+"""
+Structured spatial queries over a hand-built track index: box conditions must
+hold for the same penalty area, including when the query uses box="any".
+
+Run with `python test_track_index.py` or `pytest test_track_index.py`.
+"""
+import numpy as np
+
+from backend.ai.track_index import TrackIndex, BOX_CODES, query_moments
+
+LEFT_BALL = (0.15, 0.6)    # inside the left penalty area
+RIGHT_BALL = (0.85, 0.6)   # inside the right penalty area
+
+
+def make_index(frames):
+    """frames: list of (players_in_left, players_in_right, ball_xy) at 1 s spacing."""
+    n = len(frames)
+    ball_xy = np.array([f[2] for f in frames], dtype=np.float32)
+    ball_box = np.array([BOX_CODES["left"] if x < 0.5 else BOX_CODES["right"] for x, _ in ball_xy],
+                        dtype=np.int8)
+    return TrackIndex(
+        timestamps=np.arange(n, dtype=np.float64),
+        player_count=np.full(n, 22, dtype=np.int16),
+        ball_xy=ball_xy,
+        players_in_left=np.array([f[0] for f in frames], dtype=np.int16),
+        players_in_right=np.array([f[1] for f in frames], dtype=np.int16),
+        ball_box=ball_box,
+        ball_box_distance=np.zeros(n, dtype=np.float32),
+    )
+
+
+def test_players_and_ball_in_different_boxes_do_not_match():
+    index = make_index([(8, 0, RIGHT_BALL), (0, 8, LEFT_BALL)])
+    assert query_moments(index, min_players_in_box=8, ball_near_box=True) == []
+    assert query_moments(index, min_players_in_box=8, ball_in_box=True) == []
+
+
+def test_players_and_ball_in_the_same_box_match():
+    index = make_index([(8, 0, RIGHT_BALL), (8, 0, LEFT_BALL), (0, 8, RIGHT_BALL)])
+    moments = query_moments(index, min_players_in_box=8, ball_near_box=True, merge_gap=0.5)
+    assert [(m["startTime"], m["endTime"]) for m in moments] == [(1.0, 1.0), (2.0, 2.0)]
+    assert query_moments(index, min_players_in_box=8, box="left", ball_near_box=True)[0]["startTime"] == 1.0
+    assert query_moments(index, min_players_in_box=8, box="right", ball_in_box=True)[0]["startTime"] == 2.0
+
+
+def test_players_only_uses_either_box():
+    index = make_index([(8, 0, RIGHT_BALL), (0, 8, LEFT_BALL), (3, 3, LEFT_BALL)])
+    moments = query_moments(index, min_players_in_box=8)
+    assert [(m["startTime"], m["endTime"]) for m in moments] == [(0.0, 1.0)]
+
+
+if __name__ == "__main__":
+    test_players_and_ball_in_different_boxes_do_not_match()
+    test_players_and_ball_in_the_same_box_match()
+    test_players_only_uses_either_box()
+    print("OK")